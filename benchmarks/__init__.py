@@ -0,0 +1,4 @@
+"""Замеры производительности игрового движка.
+
+Запуск из корня репозитория: python -m benchmarks.<модуль>
+"""
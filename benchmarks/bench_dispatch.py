@@ -0,0 +1,109 @@
+"""Замер накладных расходов разбора и диспетчеризации команды.
+
+Сравнивает прежний разбор (импорты внутри функции, match и список
+направлений на каждый вызов) с реестром команд и префиксным деревом.
+Команды выбраны так, чтобы сами действия были дешёвыми и время
+определялось разбором: справка, неизвестная команда, отсутствующий
+предмет, направление без выхода.
+
+Запуск: python -m benchmarks.bench_dispatch
+"""
+
+import timeit
+
+from labyrinth_game.commands import dispatch
+from labyrinth_game.main import new_game_state
+
+COMMANDS = ("look", "inventory", "xyzzy", "take lamp", "use lamp", "west", "help")
+
+ROUNDS = 20_000
+
+
+def legacy_dispatch(game_state, command):
+    """Прежний process_command() до реестра команд (для сравнения)."""
+    from labyrinth_game.player_actions import (
+        move_player,
+        show_inventory,
+        take_item,
+        use_item,
+    )
+    from labyrinth_game.utils import (
+        attempt_open_treasure,
+        describe_current_room,
+        emit,
+        show_help,
+        solve_puzzle,
+    )
+
+    parts = command.strip().split(maxsplit=1)
+    if not parts:
+        return True
+
+    cmd = parts[0].lower()
+    arg = parts[1].lower() if len(parts) > 1 else None
+
+    directions = ["north", "south", "east", "west"]
+
+    match cmd:
+        case "look":
+            describe_current_room(game_state)
+        case "inventory":
+            show_inventory(game_state)
+        case "go":
+            if not arg:
+                emit(game_state, "need_direction")
+            else:
+                move_player(game_state, arg)
+        case "take":
+            if not arg:
+                emit(game_state, "need_item_take")
+            else:
+                take_item(game_state, arg)
+        case "use":
+            if not arg:
+                emit(game_state, "need_item_use")
+            else:
+                use_item(game_state, arg)
+        case "solve":
+            if game_state["current_room"] == "treasure_room":
+                if attempt_open_treasure(game_state):
+                    return False
+            else:
+                solve_puzzle(game_state)
+        case "help":
+            show_help(game_state)
+        case "quit" | "exit":
+            return False
+        case cmd if cmd in directions:
+            move_player(game_state, cmd)
+        case _:
+            emit(game_state, "unknown_command", cmd)
+
+    return True
+
+
+def measure(function):
+    """Вернуть среднее время одной команды в микросекундах."""
+    game_state = new_game_state()
+    events = game_state["events"]
+
+    def run():
+        for command in COMMANDS:
+            function(game_state, command)
+        events.clear()
+
+    seconds = min(timeit.repeat(run, number=ROUNDS, repeat=5))
+    return seconds / (ROUNDS * len(COMMANDS)) * 1e6
+
+
+def main():
+    """Вывести время диспетчеризации до и после."""
+    before = measure(legacy_dispatch)
+    after = measure(dispatch)
+    print(f"Прежний разбор:  {before:.3f} мкс/команда")
+    print(f"Реестр команд:   {after:.3f} мкс/команда")
+    print(f"Ускорение:       {before / after:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Замер цены случайных событий при росте таблицы событий.
+
+К встроенным событиям добавляются N случайных (веса 1..10, условия
+по предметам, часть - только в комнатах с метками), и для каждого N
+выводятся:
+
+- сборка таблицы (EventTable.compile());
+- выбор события в комнате: bisect по накопленным весам
+  (RoomEvents.pick()) и, для сравнения, линейный проход по описанию
+  с проверкой условий сравнением строк, как в ветках if/elif;
+- ход: партия случайной стратегии на процедурном лабиринте. С другой
+  таблицей выпадают другие события, и партии расходятся, поэтому
+  время хода колеблется на несколько микросекунд без связи с N.
+
+Запуск: python -m benchmarks.bench_events
+"""
+
+import random
+import time
+import timeit
+
+from labyrinth_game.constants import EVENTS
+from labyrinth_game.events import EventTable
+from labyrinth_game.main import new_game_state, process_command
+from labyrinth_game.procedural import ProceduralTemplate
+from labyrinth_game.simulation import random_policy
+from labyrinth_game.world import World
+
+SIZES = (3, 30, 300, 3000)
+
+STEPS = 20_000
+
+SIDE = 60
+
+ROUNDS = 3
+
+ITEMS = ("torch", "sword", "coin", "rusty_key")
+
+
+def make_events(count, rng):
+    """Вернуть встроенные события и count случайных."""
+    events = list(EVENTS)
+    for index in range(count - len(EVENTS)):
+        event = {
+            "name": f"event_{index}",
+            "weight": rng.randint(1, 10),
+            "effects": [{"text": f"Событие {index}."}],
+        }
+        if index % 3 == 0:
+            event["if"] = {"items": [rng.choice(ITEMS)]}
+        if index % 5 == 0:
+            event["tags"] = ["dark"]
+        events.append(event)
+    return events
+
+
+def linear_pick(events, room_name, tags, inventory, value):
+    """Выбрать событие проходом по описанию (для сравнения)."""
+    for event in events:
+        if "rooms" in event and room_name not in event["rooms"]:
+            continue
+        if not set(event.get("tags", ())) <= tags:
+            continue
+        value -= event.get("weight", 1)
+        if value < 0:
+            condition = event.get("if", {})
+            if all(item in inventory for item in condition.get("items", ())):
+                return event
+            return None
+    return None
+
+
+def play(template):
+    """Вернуть лучшее за ROUNDS время хода в микросекундах."""
+    best = float("inf")
+    for _ in range(ROUNDS):
+        rng = random.Random(0)
+        game_state = new_game_state(World(template), seed=0, history=False)
+        started = time.perf_counter()
+        for index in range(STEPS):
+            if game_state.game_over:
+                game_state = new_game_state(
+                    World(template), seed=index, history=False
+                )
+            process_command(game_state, random_policy(game_state, rng))
+        best = min(best, time.perf_counter() - started)
+    return best / STEPS * 1e6
+
+
+def main():
+    """Вывести цену выбора события и хода для таблиц разного размера."""
+    rng = random.Random(0)
+    template = ProceduralTemplate(0, SIDE)
+    print(f"{'событий':>8} {'сборка, мс':>11} {'bisect, нс':>11} "
+          f"{'проход, нс':>11} {'ход, мкс':>9}")
+    for size in SIZES:
+        events = make_events(size, rng)
+        table = EventTable(events)
+        started = time.perf_counter()
+        table.compile()
+        compiled = (time.perf_counter() - started) * 1e3
+        room_events = table.room("cell_0_0")
+        values = [rng.randrange(room_events.total) for _ in range(1000)]
+        picked = min(timeit.repeat(
+            "for value in values: pick(value)",
+            globals={"values": values, "pick": room_events.pick},
+            number=100, repeat=5,
+        )) / 100_000 * 1e9
+        inventory = {"torch", "sword"}
+        scanned = min(timeit.repeat(
+            "for value in values: pick(events, 'cell_0_0', tags, inventory, value)",
+            globals={
+                "values": values, "pick": linear_pick, "events": events,
+                "tags": frozenset(), "inventory": inventory,
+            },
+            number=1, repeat=5,
+        )) / 1000 * 1e9
+
+        template.event_table = table
+        moved = play(template)
+        print(f"{size:>8} {compiled:>11.2f} {picked:>11.0f} "
+              f"{scanned:>11.0f} {moved:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
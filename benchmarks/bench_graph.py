@@ -0,0 +1,103 @@
+"""Замер памяти и скорости перемещений на карте в миллион комнат.
+
+Строит решётку 1000 x 1000 комнат в двух видах: прежнем (словарь
+комнат со словарём выходов по именам) и компактном WorldGraph
+(таблица array('i') по номерам). Сравнивает память на комнату
+по tracemalloc, скорость случайного блуждания в перемещениях
+в секунду и время поиска кратчайшего пути через всю карту.
+
+Запуск: python -m benchmarks.bench_graph
+"""
+
+import gc
+import random
+import time
+import tracemalloc
+
+from labyrinth_game.constants import DIRECTIONS
+from labyrinth_game.graph import DIRECTIONS_COUNT, NO_EXIT, grid_graph
+
+WIDTH = 1000
+HEIGHT = 1000
+
+MOVES = 1_000_000
+
+
+def legacy_rooms(graph):
+    """Та же карта в прежнем виде: имя -> {"exits": {направление: имя}}."""
+    names = graph.names
+    return {
+        name: {
+            "exits": {
+                DIRECTIONS[direction_id]: names[target]
+                for direction_id, target in graph.neighbors(room_id)
+            }
+        }
+        for room_id, name in enumerate(names)
+    }
+
+
+def measure_memory(factory):
+    """Вернуть (результат factory(), байт на комнату)."""
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    result = factory()
+    used = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return result, used / (WIDTH * HEIGHT)
+
+
+def walk_legacy(rooms, room_name, directions):
+    """Случайное блуждание по словарям имён."""
+    for direction in directions:
+        room_name = rooms[room_name]["exits"].get(direction, room_name)
+    return room_name
+
+
+def walk_compiled(graph, room_id, direction_ids):
+    """Случайное блуждание по таблице выходов."""
+    exits = graph.exits
+    for direction_id in direction_ids:
+        target = exits[room_id * DIRECTIONS_COUNT + direction_id]
+        if target != NO_EXIT:
+            room_id = target
+    return room_id
+
+
+def rate(function, *args):
+    """Вернуть перемещений в секунду для блуждания function(*args)."""
+    started = time.perf_counter()
+    function(*args)
+    return MOVES / (time.perf_counter() - started)
+
+
+def main():
+    """Вывести память на комнату, скорость перемещений и поиска пути."""
+    graph, compiled_bytes = measure_memory(lambda: grid_graph(WIDTH, HEIGHT))
+    rooms, legacy_bytes = measure_memory(lambda: legacy_rooms(graph))
+
+    rng = random.Random(0)
+    direction_ids = [rng.randrange(DIRECTIONS_COUNT) for _ in range(MOVES)]
+    directions = [DIRECTIONS[direction_id] for direction_id in direction_ids]
+    start = graph.ids["room_500_500"]
+
+    legacy_rate = rate(walk_legacy, rooms, graph.names[start], directions)
+    compiled_rate = rate(walk_compiled, graph, start, direction_ids)
+
+    started = time.perf_counter()
+    path = graph.shortest_path(0, len(graph) - 1)
+    path_seconds = time.perf_counter() - started
+
+    table_bytes = graph.exits.itemsize * DIRECTIONS_COUNT
+    print(f"Комнат:                 {len(graph)}")
+    print(f"Словари (прежний вид):  {legacy_bytes:.0f} байт/комната")
+    print(f"WorldGraph:             {compiled_bytes:.0f} байт/комната "
+          f"(таблица выходов - {table_bytes} байт)")
+    print(f"Перемещения, словари:   {legacy_rate:,.0f} в секунду")
+    print(f"Перемещения, таблица:   {compiled_rate:,.0f} в секунду")
+    print(f"Путь через карту:       {len(path)} шагов за {path_seconds:.2f} с")
+
+
+if __name__ == "__main__":
+    main()
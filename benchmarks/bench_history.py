@@ -0,0 +1,107 @@
+"""Замер истории ходов: память, накладные расходы, undo/redo, fork.
+
+Партия из STEPS команд случайной стратегии в процедурном лабиринте
+(монеты и загадки меняют много комнат):
+
+- память истории из STEPS ходов (дельты с общими записями оверлея)
+  против наивной истории - глубокой копии состояния сессии на каждый
+  ход; память - по tracemalloc как освобождённое при удалении истории;
+- время команды с историей и без неё;
+- время undo и redo;
+- ответвление партии GameState.fork() против глубокой копии состояния.
+
+Запуск: python -m benchmarks.bench_history
+"""
+
+import copy
+import gc
+import random
+import time
+import tracemalloc
+
+from labyrinth_game.history import capture
+from labyrinth_game.main import new_game_state, process_command
+from labyrinth_game.procedural import ProceduralTemplate
+from labyrinth_game.simulation import random_policy
+from labyrinth_game.world import World
+
+STEPS = 1_000
+
+SIDE = 1_000
+
+FORKS = 10_000
+
+
+def play(template, history, naive=None):
+    """Сыграть STEPS команд, вернуть (состояние, секунды)."""
+    rng = random.Random(0)
+    game_state = new_game_state(World(template), seed=0, history=history)
+    started = time.perf_counter()
+    for _ in range(STEPS):
+        process_command(game_state, random_policy(game_state, rng))
+        if naive is not None:
+            world = game_state.world
+            naive.append(copy.deepcopy(
+                (capture(game_state), world.overlay, world.versions)
+            ))
+    return game_state, time.perf_counter() - started
+
+
+def freed_bytes(drop):
+    """Вернуть, сколько памяти освободил вызов drop()."""
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    drop()
+    gc.collect()
+    return before - tracemalloc.get_traced_memory()[0]
+
+
+def main():
+    """Вывести память и время истории ходов."""
+    template = ProceduralTemplate(0, SIDE)
+    play(template, history=False)
+    game_state, bare = play(template, history=False)
+    game_state, timed = play(template, history=True)
+
+    turns = len(game_state.history.undo)
+
+    tracemalloc.start()
+    traced, _ = play(template, history=True)
+    delta_bytes = freed_bytes(lambda: setattr(traced, "history", None))
+    naive = []
+    play(template, history=False, naive=naive)
+    naive_bytes = freed_bytes(naive.clear)
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    for _ in range(turns):
+        process_command(game_state, "undo")
+    undo = (time.perf_counter() - started) / turns
+    started = time.perf_counter()
+    for _ in range(turns):
+        process_command(game_state, "redo")
+    redo = (time.perf_counter() - started) / turns
+
+    world = game_state.world
+    started = time.perf_counter()
+    for _ in range(FORKS):
+        game_state.fork()
+    fork = (time.perf_counter() - started) / FORKS
+    started = time.perf_counter()
+    for _ in range(FORKS):
+        copy.deepcopy((capture(game_state), world.overlay, world.versions))
+    deep = (time.perf_counter() - started) / FORKS
+
+    print(f"Партия: {STEPS} команд, в истории {turns} ходов, "
+          f"изменено комнат {len(world.overlay)}")
+    print(f"История (дельты):  {delta_bytes / 1024:.0f} КБ "
+          f"({delta_bytes / turns:.0f} байт на ход)")
+    print(f"Копия на каждый ход: {naive_bytes / 1024:.0f} КБ")
+    print(f"Команда: {bare / STEPS * 1e6:.1f} мкс без истории, "
+          f"{timed / STEPS * 1e6:.1f} мкс с историей")
+    print(f"undo: {undo * 1e6:.1f} мкс, redo: {redo * 1e6:.1f} мкс")
+    print(f"fork: {fork * 1e6:.1f} мкс, глубокая копия: {deep * 1e6:.1f} мкс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Замер журнала команд: пакетная запись против fsync на каждую команду.
+
+Ведёт SESSIONS сессий, по очереди отдавая каждой команды прохождения,
+и сравнивает:
+
+- игру без журнала;
+- игру с журналом: запись в память на каждую команду и пакетную
+  запись на диск раз в "интервал" (здесь - раз в ROUND команд каждой
+  сессии); первый пакет создаёт файлы всех сессий;
+- прежний наивный подход: открыть журнал, дописать строку и вызвать
+  fsync на каждую команду (на части команд, с пересчётом).
+
+В конце проверяет, что восстановление из снимка и хвоста журнала
+даёт то же состояние, что и живая сессия.
+
+Запуск: python -m benchmarks.bench_journal
+"""
+
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from labyrinth_game.journal import JournalStore, apply_command, snapshot_state
+from labyrinth_game.main import new_game_state
+from labyrinth_game.world import DEFAULT_TEMPLATE
+
+SESSIONS = 20_000
+
+COMMANDS = (
+    "look", "east", "take rusty_key", "west", "north", "inventory", "west",
+    "north", "take bronze_box", "south", "east", "look",
+)
+
+ROUND = 4
+
+NAIVE_COMMANDS = 2_000
+
+
+def play(sessions, store=None):
+    """Провести все сессии, вернуть (секунды, секунды записи, журналы)."""
+    journals = []
+    if store is not None:
+        journals = [store.create(f"s{index}", index, "builtin")
+                    for index in range(len(sessions))]
+    writing = 0.0
+    started = time.perf_counter()
+    for position, command in enumerate(COMMANDS):
+        for index, game_state in enumerate(sessions):
+            apply_command(game_state, command)
+            if store is not None:
+                store.record(journals[index], game_state, command)
+        if store is not None and (position + 1) % ROUND == 0:
+            flush_started = time.perf_counter()
+            store.flush()
+            writing += time.perf_counter() - flush_started
+    return time.perf_counter() - started, writing, journals
+
+
+def naive_seconds(directory):
+    """Вернуть время одной команды при записи с fsync на каждую."""
+    path = Path(directory) / "naive.journal"
+    started = time.perf_counter()
+    for index in range(NAIVE_COMMANDS):
+        with path.open("ab") as journal_file:
+            journal_file.write(COMMANDS[index % len(COMMANDS)].encode() + b"\n")
+            journal_file.flush()
+            os.fsync(journal_file.fileno())
+    return (time.perf_counter() - started) / NAIVE_COMMANDS
+
+
+def new_sessions():
+    """Создать SESSIONS сессий без отрисовки."""
+    return [new_game_state(seed=index) for index in range(SESSIONS)]
+
+
+def main():
+    """Вывести скорость игры с журналом и без него."""
+    total = SESSIONS * len(COMMANDS)
+    bare, _, _ = play(new_sessions())
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = JournalStore(directory, snapshot_every=6)
+        sessions = new_sessions()
+        journaled, writing, journals = play(sessions, store)
+        store.close()
+
+        per_command = naive_seconds(directory)
+
+        checked = range(0, SESSIONS, SESSIONS // 100)
+        identical = all(
+            snapshot_state(store.resume(
+                journals[index].session_id, DEFAULT_TEMPLATE, "builtin"
+            )[0]) == snapshot_state(sessions[index])
+            for index in checked
+        )
+
+    flushes = len(COMMANDS) // ROUND
+    print(f"Сессий: {SESSIONS}, команд: {total}")
+    print(f"Без журнала:            {total / bare:,.0f} команд/с")
+    print(f"С журналом (fsync):     {total / journaled:,.0f} команд/с, "
+          f"запись {flushes} пакетов за {writing:.2f} с")
+    print(f"fsync на каждую команду: {1 / per_command:,.0f} команд/с "
+          f"({per_command * 1e6:.0f} мкс на команду)")
+    print(f"Восстановление совпадает с живой сессией: {identical}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Замер загрузки мира в 100 000 комнат: разбор против кэша.
+
+Строит решётку 400 x 250 комнат с описаниями, предметами и загадками,
+сохраняет её в JSON и сравнивает холодную загрузку (разбор, проверка,
+сборка шаблона) с загрузкой собранного шаблона из кэша.
+
+Запуск: python -m benchmarks.bench_loader
+"""
+
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from labyrinth_game.constants import DIRECTIONS
+from labyrinth_game.graph import grid_graph
+from labyrinth_game.loader import cache_path, load_world
+
+WIDTH = 400
+HEIGHT = 250
+
+REPEAT = 3
+
+
+def world_data():
+    """Вернуть данные мира-решётки в формате файла мира."""
+    graph = grid_graph(WIDTH, HEIGHT)
+    names = graph.names
+    rooms = {}
+    for room_id, name in enumerate(names):
+        room = {
+            "description": f"Комната {room_id}. Стены покрыты мхом.",
+            "exits": {
+                DIRECTIONS[direction_id]: names[target]
+                for direction_id, target in graph.neighbors(room_id)
+            },
+            "items": ["coin"] if room_id % 7 == 0 else [],
+        }
+        if room_id % 11 == 0:
+            room["puzzle"] = ["Сколько будет пять плюс пять?", "10"]
+            room["answers"] = ["10", "десять"]
+            room["reward"] = "coin"
+        rooms[name] = room
+    return {"start": names[0], "rooms": rooms}
+
+
+def best_seconds(function):
+    """Вернуть лучшее время из REPEAT вызовов."""
+    best = float("inf")
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    """Вывести время холодной загрузки и загрузки из кэша."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "world.json"
+        path.write_text(json.dumps(world_data(), ensure_ascii=False), "utf-8")
+
+        cold = best_seconds(lambda: load_world(path, use_cache=False))
+        template = load_world(path)
+        cached = best_seconds(lambda: load_world(path))
+
+        source_size = path.stat().st_size
+        cache_size = cache_path(path).stat().st_size
+
+    print(f"Комнат:            {len(template.names)}")
+    print(f"JSON:              {source_size / 2**20:.1f} МиБ, "
+          f"кэш: {cache_size / 2**20:.1f} МиБ")
+    print(f"Холодная загрузка: {cold * 1000:.0f} мс")
+    print(f"Из кэша:           {cached * 1000:.0f} мс")
+    print(f"Ускорение:         {cold / cached:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Замер накладных расходов метрик на команду.
+
+Одна и та же партия (случайная стратегия, процедурный лабиринт)
+без метрик, с пробой команд (GameState.probe), с пробой и таймерами
+функций (metrics.instrument()) и под cProfile. Отдельно - цена
+выключенных метрик: проверка game_state.probe в process_command().
+
+Запуск: python -m benchmarks.bench_metrics
+"""
+
+import random
+import time
+import timeit
+
+from labyrinth_game import metrics
+from labyrinth_game.main import new_game_state, process_command
+from labyrinth_game.procedural import ProceduralTemplate
+from labyrinth_game.simulation import random_policy
+from labyrinth_game.world import World
+
+STEPS = 50_000
+
+SIDE = 100
+
+ROUNDS = 3
+
+
+def play(template, probe=False, profile=False):
+    """Вернуть лучшее за ROUNDS время команды в микросекундах."""
+    best = float("inf")
+    for _ in range(ROUNDS):
+        rng = random.Random(0)
+        game_state = new_game_state(World(template), seed=0, history=False)
+        if probe:
+            metrics.attach(game_state, metrics.Metrics(), profile)
+        started = time.perf_counter()
+        for index in range(STEPS):
+            if game_state.game_over:
+                current = game_state.probe
+                game_state = new_game_state(World(template), seed=index,
+                                            history=False)
+                game_state.probe = current
+            process_command(game_state, random_policy(game_state, rng))
+        best = min(best, time.perf_counter() - started)
+        metrics.detach(game_state)
+    return best / STEPS * 1e6
+
+
+def main():
+    """Вывести время команды с метриками и без них."""
+    template = ProceduralTemplate(0, SIDE)
+    game_state = new_game_state(World(template), seed=0)
+    branch = min(timeit.repeat(
+        "game_state.probe is not None", globals=locals(), number=1_000_000
+    )) * 1e3
+
+    bare = play(template)
+    probed = play(template, probe=True)
+    metrics.instrument()
+    timed = play(template, probe=True)
+    profiled = play(template, probe=True, profile=True)
+
+    print(f"Выключенные метрики: {branch:.1f} нс на проверку")
+    print(f"Без метрик:          {bare:.2f} мкс на команду")
+    for label, value in (
+        ("Проба команд:", probed),
+        ("Проба и таймеры:", timed),
+        ("cProfile:", profiled),
+    ):
+        print(f"{label:<21}{value:.2f} мкс на команду "
+              f"({value / bare - 1:+.0%})")
+
+
+if __name__ == "__main__":
+    main()
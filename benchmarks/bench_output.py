@@ -0,0 +1,84 @@
+"""Замер числа записей в поток и скорости вывода.
+
+Прогоняет сценарий нагрузочного теста с выводом в небуферизованный
+поток (как stdout под python -u или сокет) и считает вызовы write()
+нижнего уровня - каждый из них был бы системным вызовом. Сравнивает
+прежний отрисовщик (print() на каждое событие) с приёмником
+BufferedSink, который выгружает вывод команды одной записью.
+
+Запуск: python -m benchmarks.bench_output
+"""
+
+import io
+import time
+
+from labyrinth_game.loadtest import SCRIPT
+from labyrinth_game.main import new_game_state, process_command
+from labyrinth_game.output import BufferedSink, make_renderer
+from labyrinth_game.render import render_event
+
+ROUNDS = 2_000
+
+
+class CountingRaw(io.RawIOBase):
+    """Поток нижнего уровня, который только считает записи."""
+
+    def __init__(self):
+        self.writes = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.writes += 1
+        return len(data)
+
+
+def unbuffered_stream():
+    """Вернуть (текстовый поток без буфера, счётчик записей)."""
+    raw = CountingRaw()
+    return io.TextIOWrapper(raw, encoding="utf-8", write_through=True), raw
+
+
+def legacy_renderer(stream):
+    """Прежний отрисовщик: print() на каждое событие (для сравнения)."""
+
+    def renderer(game_state, event):
+        text = render_event(game_state, event)
+        if text is not None:
+            print(text, file=stream)
+
+    return renderer
+
+
+def measure(buffered):
+    """Вернуть (записей на команду, команд в секунду)."""
+    stream, raw = unbuffered_stream()
+    sink = BufferedSink(stream)
+    renderer = make_renderer(sink) if buffered else legacy_renderer(stream)
+
+    commands = 0
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        game_state = new_game_state(renderer=renderer)
+        for command in SCRIPT:
+            process_command(game_state, command)
+            sink.flush()
+            commands += 1
+    elapsed = time.perf_counter() - started
+    return raw.writes / commands, commands / elapsed
+
+
+def main():
+    """Вывести число записей и скорость до и после."""
+    before_writes, before_rate = measure(buffered=False)
+    after_writes, after_rate = measure(buffered=True)
+    print(f"print() на событие: {before_writes:.2f} записей/команда, "
+          f"{before_rate:.0f} команд/с")
+    print(f"BufferedSink:       {after_writes:.2f} записей/команда, "
+          f"{after_rate:.0f} команд/с")
+    print(f"Ускорение:          {after_rate / before_rate:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Замер процедурного лабиринта: запуск, блуждание, память.
+
+- время создания шаблона для карт от 10^2 до 10^12 комнат
+  (не должно зависеть от размера);
+- случайное блуждание игрока по карте 10^6 x 10^6: перемещений
+  в секунду, построено и вытеснено кусков;
+- пик памяти по tracemalloc при блуждании с ограничением памяти
+  (tracemalloc сильно замедляет построение кусков, поэтому этот
+  прогон короче и скорость в нём не измеряется);
+- вытесненный кусок при повторном построении совпадает с исходным.
+
+Запуск: python -m benchmarks.bench_procedural
+"""
+
+import random
+import time
+import tracemalloc
+
+from labyrinth_game.graph import DIRECTIONS_COUNT, NO_EXIT
+from labyrinth_game.procedural import CHUNK_BYTES, ProceduralTemplate
+
+SIDES = (10, 1_000, 1_000_000)
+
+SIDE = 1_000_000
+
+MOVES = 200_000
+
+TRACED_MOVES = 20_000
+
+MEMORY_LIMIT = 8 * 1024 * 1024
+
+
+def startup_seconds(side):
+    """Вернуть время создания шаблона карты side x side."""
+    started = time.perf_counter()
+    ProceduralTemplate(0, side)
+    return time.perf_counter() - started
+
+
+def walk(template, moves, rng):
+    """Блуждать по карте moves шагов, возвращая перемещений в секунду."""
+    graph = template.graph
+    room_id = template.start_id
+    started = time.perf_counter()
+    for _ in range(moves):
+        target = graph.neighbor(room_id, rng.randrange(DIRECTIONS_COUNT))
+        if target != NO_EXIT:
+            room_id = target
+        elif rng.random() < 0.001:
+            room_id = rng.randrange(len(graph))
+    return moves / (time.perf_counter() - started)
+
+
+def regenerates_identically(seed):
+    """Проверить, что вытесненный кусок строится заново так же."""
+    template = ProceduralTemplate(seed, SIDE, memory_limit=CHUNK_BYTES)
+    first = template.chunk_of(template.start_id)
+    template.chunk_of(0)
+    again = template.chunk_of(template.start_id)
+    return (
+        template.stats.evicted == 2
+        and first is not again
+        and first.exits == again.exits
+        and first.rooms == again.rooms
+    )
+
+
+def main():
+    """Вывести время запуска, скорость блуждания и расход памяти."""
+    for side in SIDES:
+        seconds = startup_seconds(side)
+        print(f"Запуск {side}x{side}: {seconds * 1e6:.1f} мкс")
+
+    template = ProceduralTemplate(1, SIDE)
+    moves_per_second = walk(template, MOVES, random.Random(0))
+    stats = template.stats
+    print(f"Блуждание:        {moves_per_second:,.0f} перемещений/с")
+    print(f"Кусков в памяти:  {len(template.chunks)} из {template.max_chunks}")
+    print(f"Построено:        {stats.generated}, вытеснено: {stats.evicted}")
+
+    template = ProceduralTemplate(1, SIDE, memory_limit=MEMORY_LIMIT)
+    tracemalloc.start()
+    walk(template, TRACED_MOVES, random.Random(0))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"Пик памяти:       {peak / 2**20:.1f} МиБ "
+          f"(ограничение {MEMORY_LIMIT / 2**20:.0f} МиБ, "
+          f"вытеснено {template.stats.evicted} кусков)")
+    print(f"Повторная сборка совпадает: {regenerates_identically(1)}")
+
+
+if __name__ == "__main__":
+    main()
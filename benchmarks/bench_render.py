@@ -0,0 +1,52 @@
+"""Замер стоимости описания комнаты с кэшем и без.
+
+Бот ходит туда-обратно между двумя комнатами и осматривается после
+каждого шага - самый частый сценарий для describe_current_room().
+Сравнивает сборку описания заново (build_room_text) с кэшированным
+render_room() и выводит счётчики попаданий и промахов кэша.
+
+Запуск: python -m benchmarks.bench_render
+"""
+
+import timeit
+
+from labyrinth_game.main import new_game_state
+from labyrinth_game.render import ROOM_CACHE_STATS, build_room_text, render_room
+
+ROUTE = ("entrance", "hall", "library", "hall")
+
+ROUNDS = 20_000
+
+
+def measure(function):
+    """Вернуть среднее время одного описания в микросекундах."""
+    game_state = new_game_state()
+    game_state.world.add_item("hall", "coin", 3)
+
+    def run():
+        for room_name in ROUTE:
+            function(game_state, room_name)
+
+    seconds = min(timeit.repeat(run, number=ROUNDS, repeat=5))
+    return seconds / (ROUNDS * len(ROUTE)) * 1e6
+
+
+def uncached(game_state, room_name):
+    """Описание без кэша (для сравнения)."""
+    return build_room_text(game_state.world, room_name)
+
+
+def main():
+    """Вывести время описания до и после и счётчики кэша."""
+    before = measure(uncached)
+    after = measure(render_room)
+    print(f"Без кэша:   {before:.3f} мкс/описание")
+    print(f"С кэшем:    {after:.3f} мкс/описание")
+    print(f"Ускорение:  {before / after:.2f}x")
+    print(f"Кэш:        {ROOM_CACHE_STATS.hits} попаданий, "
+          f"{ROOM_CACHE_STATS.misses} промахов "
+          f"({ROOM_CACHE_STATS.hit_rate():.2%})")
+
+
+if __name__ == "__main__":
+    main()
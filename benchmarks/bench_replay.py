@@ -0,0 +1,425 @@
+"""Набор замеров движка на записанных партиях.
+
+Команды берутся из записей asciinema (.cast, по эху ввода после
+приглашений игры) и из журналов сессий (каталог с *.journal, см.
+labyrinth_game.journal) и проигрываются без отрисовщика через
+process_command() на полной скорости:
+
+- пропускная способность: команд в секунду (медиана по SLICES отрезкам);
+- задержка по видам команд (go, look, take, use, solve, answer - ответы
+  на вопросы, ...): среднее, p50 и p99 в микросекундах;
+- выделения памяти на команду: пик по tracemalloc над памятью до
+  команды, в байтах (отдельный прогон, tracemalloc сильно замедляет игру).
+
+Абсолютная пропускная способность зависит от машины и её загрузки,
+поэтому с базовыми результатами (benchmarks/baseline_replay.json)
+сравнивается относительная: команд на итерацию калибровочного цикла
+(calibration_loop()). Игра и калибровка замеряются в том же процессе
+короткими отрезками вперемешку, так что соседние отрезки видят одну
+и ту же скорость машины; берётся медиана отношений по парам отрезков.
+Если относительная скорость упала больше чем на --max-regression
+процентов, замер повторяется до --retries раз (берётся лучший),
+и только потом завершается с кодом 1. --update-baseline записывает
+текущие результаты как базовые.
+
+Запуск: python -m benchmarks.bench_replay [файлы.cast или каталоги журналов]
+"""
+
+import argparse
+import json
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from labyrinth_game.constants import PROMPTS
+from labyrinth_game.journal import JournalStore
+from labyrinth_game.main import new_game_state, process_command
+from labyrinth_game.metrics import command_kind
+from labyrinth_game.world import DEFAULT_TEMPLATE, World
+
+ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_SOURCES = (ROOT / "demo.cast",)
+
+BASELINE = Path(__file__).resolve().parent / "baseline_replay.json"
+
+MAX_REGRESSION = 10.0
+
+ROUND_COMMANDS = 100_000
+
+SLICES = 60
+
+SLICE_COMMANDS = 2000
+
+CALIBRATION_ITERATIONS = 30_000
+
+RETRIES = 2
+
+ESCAPES = re.compile(
+    r"\x1b\[[0-?]*[ -/]*[@-~]"
+    r"|\x1b\][^\x07\x1b]*(?:\x07|\x1b\\)"
+    r"|\x1b[@-Z\\-_78]"
+)
+
+GAME_PROMPTS = re.compile(
+    "|".join(re.escape(prompt.replace("\n", "\r\n")) for prompt in PROMPTS.values())
+)
+
+BACKSPACES = ("\x08", "\x7f")
+
+
+class Transcript:
+    """Записанная партия.
+
+    Attributes:
+        name (str): Откуда взята партия.
+        template (WorldTemplate): Мир партии.
+        seed (int | None): Зерно случайных событий.
+        commands (list[str]): Команды по порядку.
+    """
+
+    __slots__ = ("name", "template", "seed", "commands")
+
+    def __init__(self, name, commands, template=DEFAULT_TEMPLATE, seed=None):
+        self.name = name
+        self.template = template
+        self.seed = seed
+        self.commands = commands
+
+
+def typed_line(echo):
+    """Применить к эху ввода стирания символов (Backspace)."""
+    chars = []
+    for char in echo.replace("\x08 \x08", "\x08"):
+        if char in BACKSPACES:
+            if chars:
+                chars.pop()
+        else:
+            chars.append(char)
+    return "".join(chars)
+
+
+def cast_commands(path):
+    """Извлечь введённые в игре команды из записи asciinema (v2 и v3).
+
+    Терминал показывает ввод эхом, поэтому команда - это текст между
+    приглашением игры (см. PROMPTS) и концом строки.
+
+    Args:
+        path (Path): Файл .cast.
+
+    Returns:
+        list[str]: Команды по порядку.
+    """
+    with path.open(encoding="utf-8") as cast_file:
+        next(cast_file)
+        output = "".join(
+            event[2]
+            for event in map(json.loads, filter(str.strip, cast_file))
+            if event[1] == "o"
+        )
+    output = ESCAPES.sub("", output)
+
+    commands = []
+    position = 0
+    while True:
+        prompt = GAME_PROMPTS.search(output, position)
+        if prompt is None:
+            return commands
+        end = output.find("\r\n", prompt.end())
+        if end == -1:
+            return commands
+        commands.append(typed_line(output[prompt.end():end]))
+        position = end
+
+
+def world_template(label):
+    """Вернуть шаблон мира по описанию из заголовка журнала.
+
+    Returns:
+        WorldTemplate | ProceduralTemplate: Шаблон мира.
+    """
+    kind, _, rest = label.partition(":")
+    if kind == "world":
+        from labyrinth_game.loader import load_world
+
+        return load_world(rest)
+    if kind == "generate":
+        from labyrinth_game.procedural import ProceduralTemplate
+
+        size, _, seed = rest.partition(":")
+        return ProceduralTemplate(int(seed), int(size))
+    return DEFAULT_TEMPLATE
+
+
+def display_name(path):
+    """Вернуть имя файла партии относительно корня проекта, если можно."""
+    path = path.resolve()
+    return str(path.relative_to(ROOT)) if path.is_relative_to(ROOT) else str(path)
+
+
+def journal_transcripts(directory):
+    """Прочитать все журналы сессий из каталога."""
+    store = JournalStore(directory)
+    for path in sorted(Path(directory).glob("*.journal")):
+        header, commands = store.read(path.stem)
+        yield Transcript(
+            display_name(path),
+            commands,
+            world_template(header.get("world", "builtin")),
+            header.get("seed"),
+        )
+
+
+def load_transcripts(sources):
+    """Собрать партии из файлов .cast и каталогов журналов."""
+    transcripts = []
+    for source in map(Path, sources):
+        if source.is_dir():
+            transcripts.extend(journal_transcripts(source))
+        else:
+            transcripts.append(
+                Transcript(display_name(source), cast_commands(source))
+            )
+    return [transcript for transcript in transcripts if transcript.commands]
+
+
+def play(transcript, observe=None):
+    """Проиграть партию без отрисовщика.
+
+    Args:
+        transcript (Transcript): Партия.
+        observe (callable | None): observe(game_state, line, run) -
+            выполняет команду через run() и снимает замеры.
+
+    Returns:
+        int: Число выполненных команд.
+    """
+    game_state = new_game_state(World(transcript.template), seed=transcript.seed)
+    done = 0
+    for line in transcript.commands:
+        if game_state.game_over:
+            break
+        if observe is None:
+            result = process_command(game_state, line)
+        else:
+            result = observe(game_state, line, process_command)
+        if result is False:
+            game_state.game_over = True
+        done += 1
+    return done
+
+
+def calibration_loop(iterations):
+    """Калибровочный цикл: поиск по словарю и разбор строк, как в командах."""
+    table = {str(index): index for index in range(64)}
+    total = 0
+    for index in range(iterations):
+        key = str(index & 63)
+        total += table[key] + len(key.split())
+    return total
+
+
+def throughput(transcripts, slices):
+    """Замерить скорость игры относительно калибровочного цикла.
+
+    Отрезок калибровки и отрезок игры (около 10 мс каждый) чередуются
+    slices раз.
+
+    Returns:
+        dict: throughput - команд в секунду, calibration - итераций
+        калибровки в секунду (медианы по отрезкам), relative - медиана
+        отношений скоростей соседних отрезков.
+    """
+    games, calibrations, ratios = [], [], []
+    for _ in range(slices):
+        started = time.perf_counter()
+        calibration_loop(CALIBRATION_ITERATIONS)
+        calibration = CALIBRATION_ITERATIONS / (time.perf_counter() - started)
+        commands = 0
+        started = time.perf_counter()
+        while commands < SLICE_COMMANDS:
+            for transcript in transcripts:
+                commands += play(transcript)
+        speed = commands / (time.perf_counter() - started)
+        games.append(speed)
+        calibrations.append(calibration)
+        ratios.append(speed / calibration)
+    return {
+        "throughput": statistics.median(games),
+        "calibration": statistics.median(calibrations),
+        "relative": statistics.median(ratios),
+    }
+
+
+def latencies(transcripts):
+    """Собрать задержки команд по видам, в наносекундах."""
+    samples = {}
+    clock = time.perf_counter_ns
+
+    def observe(game_state, line, run):
+        kind = command_kind(game_state, line)
+        started = clock()
+        result = run(game_state, line)
+        samples.setdefault(kind, []).append(clock() - started)
+        return result
+
+    commands = 0
+    while commands < ROUND_COMMANDS:
+        for transcript in transcripts:
+            commands += play(transcript, observe)
+    return samples
+
+
+def allocations(transcripts):
+    """Собрать пиковые выделения памяти команд по видам, в байтах."""
+    samples = {}
+
+    def observe(game_state, line, run):
+        kind = command_kind(game_state, line)
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        result = run(game_state, line)
+        samples.setdefault(kind, []).append(tracemalloc.get_traced_memory()[1] - before)
+        return result
+
+    tracemalloc.start()
+    # Первый проход прогревает кэши (описания комнат, модели решателя).
+    for transcript in transcripts:
+        play(transcript)
+    for transcript in transcripts:
+        play(transcript, observe)
+    tracemalloc.stop()
+    return samples
+
+
+def percentile(values, fraction):
+    """Вернуть перцентиль отсортированного списка."""
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def measure(transcripts, slices=SLICES):
+    """Снять все замеры.
+
+    Returns:
+        dict: Результаты в виде, пригодном для JSON.
+    """
+    timings = latencies(transcripts)
+    allocated = allocations(transcripts)
+    kinds = {}
+    for kind, values in sorted(timings.items()):
+        values.sort()
+        sizes = allocated.get(kind, [0])
+        kinds[kind] = {
+            "count": len(values),
+            "mean_us": sum(values) / len(values) / 1000,
+            "p50_us": percentile(values, 0.5) / 1000,
+            "p99_us": percentile(values, 0.99) / 1000,
+            "alloc_bytes": sum(sizes) / len(sizes),
+        }
+    return {
+        "transcripts": [transcript.name for transcript in transcripts],
+        "commands": sum(len(transcript.commands) for transcript in transcripts),
+        **throughput(transcripts, slices),
+        "kinds": kinds,
+    }
+
+
+def report(results, baseline=None):
+    """Вывести результаты и сравнение с базовыми."""
+    print(f"Партий: {len(results['transcripts'])}, "
+          f"команд в партиях: {results['commands']}")
+    print(f"{'вид':<10}{'команд':>8}{'среднее':>10}{'p50':>9}{'p99':>9}"
+          f"{'байт':>9}")
+    for kind, row in results["kinds"].items():
+        print(f"{kind:<10}{row['count']:>8}{row['mean_us']:>8.1f}мкс"
+              f"{row['p50_us']:>6.1f}мкс{row['p99_us']:>6.1f}мкс"
+              f"{row['alloc_bytes']:>9.0f}")
+    print(f"Пропускная способность: {results['throughput']:,.0f} команд/с, "
+          f"калибровка: {results['calibration']:,.0f} итераций/с")
+    line = f"Команд на итерацию калибровки: {results['relative']:.4f}"
+    if baseline is not None:
+        change = results["relative"] / baseline["relative"] - 1
+        line += f" (базовая {baseline['relative']:.4f}, {change:+.1%})"
+    print(line)
+
+
+def main(argv=None):
+    """Снять замеры и сравнить с базовыми.
+
+    Returns:
+        int: 0 - без регрессии, 1 - пропускная способность упала
+        больше допустимого.
+    """
+    parser = argparse.ArgumentParser(description="Замер движка на партиях")
+    parser.add_argument("sources", nargs="*", default=DEFAULT_SOURCES)
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument(
+        "--max-regression",
+        metavar="PERCENT",
+        type=float,
+        default=MAX_REGRESSION,
+        help=f"допустимое падение пропускной способности (по умолчанию "
+        f"{MAX_REGRESSION:g}%%)",
+    )
+    parser.add_argument("--slices", type=int, default=SLICES)
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=RETRIES,
+        help=f"повторных замеров перед тем, как признать регрессию "
+        f"(по умолчанию {RETRIES})",
+    )
+    args = parser.parse_args(argv)
+
+    transcripts = load_transcripts(args.sources)
+    if not transcripts:
+        print("Нет партий для замера.", file=sys.stderr)
+        return 1
+    results = measure(transcripts, args.slices)
+
+    baseline = None
+    if not args.update_baseline and args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if baseline["transcripts"] != results["transcripts"]:
+            print("Базовые результаты сняты на других партиях; "
+                  "обновите их флагом --update-baseline.")
+            baseline = None
+        elif "relative" not in baseline:
+            print("В базовых результатах нет калибровки; "
+                  "обновите их флагом --update-baseline.")
+            baseline = None
+
+    floor = 0.0
+    if baseline is not None:
+        floor = baseline["relative"] * (1 - args.max_regression / 100)
+    for _ in range(args.retries):
+        if results["relative"] >= floor:
+            break
+        # Падение может быть шумом (соседняя нагрузка, частота ядра):
+        # перед тем как признать регрессию, замер повторяется.
+        retry = throughput(transcripts, args.slices)
+        if retry["relative"] > results["relative"]:
+            results = {**results, **retry}
+    report(results, baseline)
+
+    if args.update_baseline:
+        args.baseline.write_text(
+            json.dumps(results, ensure_ascii=False, indent=2) + "\n",
+            encoding="utf-8",
+        )
+        print(f"Базовые результаты записаны в {args.baseline}")
+        return 0
+    if results["relative"] < floor:
+        print(f"Регрессия: ниже {floor:.4f} команд на итерацию калибровки "
+              f"(допуск {args.max_regression:g}%, повторов {args.retries}).")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
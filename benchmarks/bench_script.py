@@ -0,0 +1,81 @@
+"""Замер пакетного режима: большие сценарии через канал.
+
+Готовит сценарии из LINES и 4 * LINES команд (ходьба туда и обратно,
+осмотр, инвентарь - игра не заканчивается) и запускает игру отдельным
+процессом:
+
+- пакетный режим (--script): строк в секунду и пик памяти процесса;
+  пик не должен расти с размером сценария;
+- прежний режим (--interactive): input() и приглашение на каждую строку.
+
+Вывод игры уходит в /dev/null. Игра идёт с --seed: в режиме
+совместимости таблица синус-хэша растёт на 8 байт за шаг (см. schedule),
+а здесь измеряется сам ввод.
+
+Запуск: python -m benchmarks.bench_script
+"""
+
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+LINES = 200_000
+
+CYCLE = ("north", "look", "south", "inventory", "n", "s", "look")
+
+RUNNER = (
+    "import resource, sys\n"
+    "from labyrinth_game.main import main\n"
+    "code = main(sys.argv[1:])\n"
+    "peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss\n"
+    "print(peak, file=sys.stderr)\n"
+    "sys.exit(code)\n"
+)
+
+
+def write_script(path, lines):
+    """Записать сценарий из lines команд."""
+    with path.open("w", encoding="utf-8") as script_file:
+        for index in range(lines):
+            script_file.write(CYCLE[index % len(CYCLE)] + "\n")
+
+
+def run(path, *flags):
+    """Сыграть сценарий в отдельном процессе.
+
+    Returns:
+        tuple: (секунды, пик памяти в КБ, код выхода).
+    """
+    started = time.perf_counter()
+    with path.open("rb") as script_file:
+        finished = subprocess.run(
+            [sys.executable, "-c", RUNNER, *flags],
+            stdin=script_file,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            check=False,
+        )
+    elapsed = time.perf_counter() - started
+    return elapsed, int(finished.stderr.split()[-1]), finished.returncode
+
+
+def main():
+    """Вывести скорость и память пакетного режима."""
+    with tempfile.TemporaryDirectory() as directory:
+        for lines in (LINES, 4 * LINES):
+            path = Path(directory) / f"script_{lines}.txt"
+            write_script(path, lines)
+            seconds, peak, code = run(path, "--seed", "1", "--script", str(path))
+            print(f"--script, {lines} строк: {lines / seconds:,.0f} строк/с, "
+                  f"пик памяти {peak / 1024:.1f} МБ, код выхода {code}")
+
+        path = Path(directory) / f"script_{LINES}.txt"
+        seconds, peak, code = run(path, "--seed", "1", "--interactive")
+        print(f"--interactive, {LINES} строк: {LINES / seconds:,.0f} строк/с, "
+              f"пик памяти {peak / 1024:.1f} МБ")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Замер памяти процессов-обработчиков: мир в общей памяти против копий.
+
+Мир - процедурный лабиринт SIDE x SIDE, собранный целиком, как большой
+мир из файла. Процесс готовит мир, замораживает объекты (gc.freeze())
+и запускает N обработчиков через fork, как serve_workers(). Каждый
+обработчик обходит все комнаты (описание, предметы, выходы, загадка,
+замок), как это делают игроки за время работы сервера:
+
+- словари: WorldTemplate с компактной RoomTable, унаследованный через
+  fork; обращения меняют счётчики ссылок объектов мира, и страницы
+  с ними копируются в каждый обработчик;
+- общая память: SharedTemplate поверх share_world().
+
+Обход в самом процессе показывает цену чтения мира из буфера.
+
+Для каждого N выводится собственная память обработчика (USS - страницы
+только этого процесса) и суммарная PSS обработчиков (общие страницы
+делятся между процессами) по /proc/<pid>/smaps_rollup (только Linux).
+
+Запуск: python -m benchmarks.bench_shared
+"""
+
+import gc
+import os
+import time
+
+from labyrinth_game.procedural import ProceduralTemplate
+from labyrinth_game.render import build_room_text
+from labyrinth_game.shared import share_world
+from labyrinth_game.world import World, WorldTemplate
+
+SIDE = 200
+
+WORKERS = (1, 2, 4, 8)
+
+
+def build_template():
+    """Собрать процедурную карту целиком в WorldTemplate."""
+    procedural = ProceduralTemplate(0, SIDE)
+    rooms = {name: procedural.rooms[name] for name in procedural.names}
+    return WorldTemplate(rooms, procedural.names[procedural.start_id], compact=True)
+
+
+def walk(template):
+    """Обойти все комнаты мира."""
+    world = World(template)
+    for name in template.names:
+        build_room_text(world, name)
+        world.answers(name)
+        world.lock(name)
+
+
+def memory_kb(pid):
+    """Вернуть (USS, PSS) процесса в КБ."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup", encoding="ascii") as smaps:
+        for line in smaps:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return fields["Private_Clean"] + fields["Private_Dirty"], fields["Pss"]
+
+
+def run_workers(template, count):
+    """Запустить count обработчиков и вернуть их (USS, PSS) после обхода."""
+    gc.freeze()
+    ready_read, ready_write = os.pipe()
+    done_read, done_write = os.pipe()
+    children = []
+    for _ in range(count):
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_read)
+            os.close(done_write)
+            walk(template)
+            os.write(ready_write, b".")
+            os.read(done_read, 1)
+            os._exit(0)
+        children.append(pid)
+    os.close(ready_write)
+    os.close(done_read)
+    for _ in range(count):
+        os.read(ready_read, 1)
+    usage = [memory_kb(pid) for pid in children]
+    os.close(done_write)
+    os.close(ready_read)
+    for pid in children:
+        os.waitpid(pid, 0)
+    gc.unfreeze()
+    return usage
+
+
+def report(label, template):
+    """Вывести время обхода и память обработчиков для каждого из WORKERS."""
+    started = time.perf_counter()
+    walk(template)
+    elapsed = time.perf_counter() - started
+    print(f"{label}: обход {elapsed / len(template.names) * 1e6:.1f} мкс на комнату")
+    for count in WORKERS:
+        usage = run_workers(template, count)
+        uss = max(item[0] for item in usage)
+        pss = sum(item[1] for item in usage)
+        print(f"  обработчиков: {count}, USS {uss / 1024:5.1f} МБ на процесс, "
+              f"PSS всех {pss / 1024:6.1f} МБ")
+
+
+def main():
+    """Вывести память обработчиков с копиями мира и с общей памятью."""
+    started = time.perf_counter()
+    template = build_template()
+    built = time.perf_counter() - started
+    started = time.perf_counter()
+    world = share_world(template)
+    packed = time.perf_counter() - started
+    print(f"Мир: {len(template.names)} комнат, сборка {built:.1f} с, "
+          f"упаковка {packed:.1f} с, в общей памяти "
+          f"{world.memory.size / 2**20:.1f} МБ")
+    try:
+        report("словари", template)
+        report("общая память", world.template)
+    finally:
+        world.close()
+        world.unlink()
+
+
+if __name__ == "__main__":
+    main()
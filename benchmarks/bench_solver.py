@@ -0,0 +1,151 @@
+"""Замер решателя: проверка мира и задержка подсказок.
+
+- полная проверка встроенного мира: состояний, тупиков, время;
+- подсказка к победе во встроенном мире;
+- мир-решётка 300 x 300 с запертой комнатой сокровищ в дальнем углу
+  и ключом посреди карты: первая подсказка (со сборкой таблиц
+  расстояний) и подсказки на каждом шаге дороги к победе;
+- путь к комнате в процедурном лабиринте 10^6 x 10^6: обычный поиск
+  в ширину против двунаправленного и подсказки на каждом шаге
+  найденного пути (по сохранённому дереву поиска).
+
+Запуск: python -m benchmarks.bench_solver
+"""
+
+import time
+from collections import deque
+
+from labyrinth_game.procedural import ProceduralTemplate
+from labyrinth_game.solver import (
+    bidirectional_path,
+    model_for,
+    verify,
+    winning_route,
+)
+from labyrinth_game.world import DEFAULT_TEMPLATE, WorldTemplate
+
+SIDE = 300
+
+HINTS = 1000
+
+OFFSET = 150
+
+
+def grid_world(side):
+    """Вернуть шаблон решётки с запертой комнатой сокровищ в углу."""
+    def name(x, y):
+        return "treasure_room" if x == y == side - 1 else f"room_{x}_{y}"
+
+    rooms = {}
+    for y in range(side):
+        for x in range(side):
+            exits = {}
+            if y > 0:
+                exits["north"] = name(x, y - 1)
+            if y < side - 1:
+                exits["south"] = name(x, y + 1)
+            if x < side - 1:
+                exits["east"] = name(x + 1, y)
+            if x > 0:
+                exits["west"] = name(x - 1, y)
+            rooms[name(x, y)] = {
+                "description": f"Комната {x}, {y}.",
+                "exits": exits,
+                "items": [],
+                "puzzle": None,
+            }
+    treasure = rooms["treasure_room"]
+    treasure["items"] = ["treasure_chest"]
+    treasure["puzzle"] = ("Введите код.", "10")
+    treasure["locked_by"] = "rusty_key"
+    rooms[name(side // 2, side // 3)]["items"] = ["rusty_key"]
+    return WorldTemplate(rooms, name(0, 0))
+
+
+def timed(function, *args):
+    """Вернуть (результат, секунды) для function(*args)."""
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def walk_hints(model, route):
+    """Пройти дорогу до сундука, спрашивая подсказку перед каждым шагом.
+
+    Returns:
+        tuple: (средняя, наибольшая) задержка подсказки в секундах.
+    """
+    key = model.start_key()
+    latencies = []
+    for _ in route[:-1]:
+        steps, seconds = timed(winning_route, model, key)
+        latencies.append(seconds)
+        key = next(
+            target for step, target in model.successors(key) if step == steps[0]
+        )
+    return sum(latencies) / len(latencies), max(latencies)
+
+
+def plain_bfs(graph, start_id, goal_id):
+    """Обычный поиск в ширину; вернуть длину пути и число комнат."""
+    parents = {start_id: None}
+    queue = deque([start_id])
+    while queue:
+        room_id = queue.popleft()
+        for _, target in graph.neighbors(room_id):
+            if target in parents:
+                continue
+            parents[target] = room_id
+            if target == goal_id:
+                length = 0
+                while parents[target] is not None:
+                    target = parents[target]
+                    length += 1
+                return length, len(parents)
+            queue.append(target)
+    return None, len(parents)
+
+
+def main():
+    """Вывести время проверки и задержки подсказок."""
+    verdict, seconds = timed(verify, DEFAULT_TEMPLATE)
+    print(f"Встроенный мир:    {verdict.states} состояний, "
+          f"{len(verdict.dead_ends)} тупиков, проверка {seconds * 1000:.1f} мс")
+    model = model_for(DEFAULT_TEMPLATE)
+    start = model.start_key()
+    started = time.perf_counter()
+    for _ in range(HINTS):
+        winning_route(model, start)
+    per_hint = (time.perf_counter() - started) / HINTS
+    print(f"Подсказка:         {per_hint * 1e6:.0f} мкс")
+
+    template = grid_world(SIDE)
+    model = model_for(template)
+    route, first = timed(winning_route, model, model.start_key())
+    mean, worst = walk_hints(model, route)
+    print(f"Решётка {SIDE}x{SIDE}:   дорога {len(route)} шагов")
+    print(f"  первая подсказка (с таблицами): {first * 1000:.0f} мс")
+    print(f"  подсказки по дороге: {mean * 1000:.1f} мс в среднем, "
+          f"{worst * 1000:.1f} мс наибольшая")
+
+    template = ProceduralTemplate(1, 1_000_000)
+    graph = template.graph
+    start_id = template.start_id
+    goal_id = start_id + OFFSET * template.width + OFFSET
+    (length, visited), plain = timed(plain_bfs, graph, start_id, goal_id)
+    path, both = timed(bidirectional_path, graph, start_id, goal_id)
+    print(f"Процедурная карта: путь {len(path)} шагов")
+    print(f"  поиск в ширину:    {plain:.2f} с ({visited} комнат)")
+    print(f"  двунаправленный:   {both:.2f} с")
+
+    room_id = start_id
+    latencies = []
+    for direction_id in path:
+        room_id = graph.neighbor(room_id, direction_id)
+        latencies.append(timed(bidirectional_path, graph, room_id, goal_id)[1])
+    print(f"  подсказки по пути: {sum(latencies) / len(latencies) * 1e6:.0f} мкс "
+          f"в среднем, {max(latencies) * 1e6:.0f} мкс наибольшая")
+
+
+if __name__ == "__main__":
+    main()
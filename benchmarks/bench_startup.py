@@ -0,0 +1,165 @@
+"""Бюджет запуска игры: импорт и время до первого приглашения.
+
+Каждый замер - отдельный процесс Python (лучший из --runs запусков):
+
+- импорт labyrinth_game.main по python -X importtime, в миллисекундах;
+- время до первого приглашения: игра без аргументов запускается
+  на псевдотерминале, как её запускает игрок, и замер идёт до появления
+  приглашения "> " в выводе;
+- ленивые модули: после импорта labyrinth_game.main не должен быть
+  загружен ни один модуль из LAZY_MODULES (разбор аргументов, решатель,
+  сервер, общая память, журналы, метрики) - они нужны только своим
+  командам и флагам.
+
+Если время выходит за бюджет или загружен ленивый модуль, замер
+завершается с кодом 1. Перед замером байткод пакета обновляется
+(при PYTHONDONTWRITEBYTECODE устаревший байткод компилировался бы
+при каждом запуске).
+
+Запуск: python -m benchmarks.bench_startup
+"""
+
+import argparse
+import compileall
+import os
+import pty
+import select
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import labyrinth_game
+from labyrinth_game.constants import PROMPTS
+
+IMPORT_BUDGET_MS = 12.0
+
+PROMPT_BUDGET_MS = 35.0
+
+RUNS = 10
+
+PROMPT_TIMEOUT = 5.0
+
+LAZY_MODULES = (
+    "argparse",
+    "asyncio",
+    "json",
+    "labyrinth_game.journal",
+    "labyrinth_game.loader",
+    "labyrinth_game.metrics",
+    "labyrinth_game.procedural",
+    "labyrinth_game.server",
+    "labyrinth_game.shared",
+    "labyrinth_game.solver",
+)
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def import_time():
+    """Вернуть время импорта labyrinth_game.main в миллисекундах."""
+    finished = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import labyrinth_game.main"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for line in finished.stderr.splitlines():
+        if line.endswith("| labyrinth_game.main"):
+            return int(line.split("|")[1]) / 1000
+    raise RuntimeError("labyrinth_game.main нет в выводе -X importtime")
+
+
+def loaded_lazy_modules():
+    """Вернуть ленивые модули, загруженные импортом labyrinth_game.main."""
+    code = (
+        "import sys, labyrinth_game.main\n"
+        f"print(*sorted(set({LAZY_MODULES!r}) & sys.modules.keys()))\n"
+    )
+    finished = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return finished.stdout.split()
+
+
+def prompt_time():
+    """Вернуть время от запуска игры до первого приглашения, в мс."""
+    prompt = PROMPTS["command"].strip().encode()
+    master, slave = pty.openpty()
+    started = time.perf_counter()
+    game = subprocess.Popen(
+        [sys.executable, "-m", "labyrinth_game.main"],
+        cwd=ROOT,
+        stdin=slave,
+        stdout=slave,
+        # На терминале input() пишет приглашение в stderr.
+        stderr=slave,
+    )
+    os.close(slave)
+    output = b""
+    elapsed = None
+    try:
+        while elapsed is None:
+            ready, _, _ = select.select([master], [], [], PROMPT_TIMEOUT)
+            if not ready:
+                raise RuntimeError("игра не вывела приглашение")
+            output += os.read(master, 4096)
+            if output.rstrip().endswith(prompt):
+                elapsed = (time.perf_counter() - started) * 1000
+        os.write(master, b"quit\n")
+        game.wait(PROMPT_TIMEOUT)
+    finally:
+        if game.poll() is None:
+            game.kill()
+            game.wait()
+        os.close(master)
+    return elapsed
+
+
+def main(argv=None):
+    """Замерить запуск игры и сравнить с бюджетом.
+
+    Returns:
+        int: 0 - в пределах бюджета, 1 - бюджет превышен.
+    """
+    parser = argparse.ArgumentParser(description="Бюджет запуска игры")
+    parser.add_argument(
+        "--import-budget", metavar="MS", type=float, default=IMPORT_BUDGET_MS,
+        help=f"бюджет импорта (по умолчанию {IMPORT_BUDGET_MS:g} мс)",
+    )
+    parser.add_argument(
+        "--prompt-budget", metavar="MS", type=float, default=PROMPT_BUDGET_MS,
+        help=f"бюджет до первого приглашения (по умолчанию {PROMPT_BUDGET_MS:g} мс)",
+    )
+    parser.add_argument("--runs", type=int, default=RUNS)
+    args = parser.parse_args(argv)
+
+    compileall.compile_dir(Path(labyrinth_game.__file__).parent, quiet=1)
+    imported = min(import_time() for _ in range(args.runs))
+    prompted = min(prompt_time() for _ in range(args.runs))
+    lazy = loaded_lazy_modules()
+
+    print(f"Импорт labyrinth_game.main: {imported:.1f} мс "
+          f"(бюджет {args.import_budget:g} мс)")
+    print(f"До первого приглашения:     {prompted:.1f} мс "
+          f"(бюджет {args.prompt_budget:g} мс)")
+    failed = False
+    if lazy:
+        print(f"При запуске загружены ленивые модули: {', '.join(lazy)}")
+        failed = True
+    if imported > args.import_budget:
+        print("Импорт не укладывается в бюджет.")
+        failed = True
+    if prompted > args.prompt_budget:
+        print("Первое приглашение не укладывается в бюджет.")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
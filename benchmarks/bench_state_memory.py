@@ -0,0 +1,73 @@
+"""Замер памяти на одно состояние игры.
+
+Создаёт 100 000 состояний с одинаковым содержимым (комната, три
+предмета в инвентаре, несколько монет) в прежнем виде - словарь со
+списком инвентаря - и в виде GameState, и сравнивает объём памяти по
+tracemalloc. Мир и генератор у всех состояний общие, чтобы замер
+показывал именно стоимость самого состояния.
+
+Запуск: python -m benchmarks.bench_state_memory
+"""
+
+import gc
+import tracemalloc
+
+from labyrinth_game.rng import LEGACY_RNG
+from labyrinth_game.state import GameState
+from labyrinth_game.world import World
+
+STATES = 100_000
+
+ITEMS = ("torch", "rusty_key", "sword", "coin", "coin", "coin")
+
+
+def legacy_state(world):
+    """Состояние в прежнем виде: словарь со списком инвентаря."""
+    return {
+        "player_inventory": list(ITEMS),
+        "current_room": "hall",
+        "game_over": False,
+        "steps_taken": 12,
+        "pending_prompt": None,
+        "outcome": None,
+        "world": world,
+        "rng": LEGACY_RNG,
+        "events": [],
+        "renderer": None,
+    }
+
+
+def compact_state(world):
+    """Состояние в виде GameState с битовой маской инвентаря."""
+    state = GameState(world, LEGACY_RNG)
+    state.current_room = "hall"
+    state.steps_taken = 12
+    for item_name in ITEMS:
+        state.add_item(item_name)
+    return state
+
+
+def measure(factory):
+    """Вернуть средний объём памяти одного состояния в байтах."""
+    world = World()
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    states = [factory(world) for _ in range(STATES)]
+    used = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    del states
+    return used / STATES
+
+
+def main():
+    """Вывести память на состояние до и после."""
+    before = measure(legacy_state)
+    after = measure(compact_state)
+    print(f"Словарь состояния: {before:.0f} байт/состояние")
+    print(f"GameState:         {after:.0f} байт/состояние")
+    print(f"Экономия:          {1 - after / before:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# labyrinth_game/answers.py
+"""Нормализация ответов на загадки.
+
+Допустимые ответы загадки объявляются вместе с ней в ROOMS и один раз,
+при создании шаблона мира, сводятся к множеству нормальных форм.
+Проверка ответа игрока - это нормализация строки и одна проверка
+вхождения в множество.
+
+Нормальная форма: регистр сложен (casefold), пробелы схлопнуты,
+"ё" заменена на "е", числительные словами заменены цифрами
+("Двадцать  пять" -> "25"), поэтому "десять" и "10" совпадают.
+"""
+
+UNITS = {
+    "ноль": 0,
+    "один": 1,
+    "одна": 1,
+    "два": 2,
+    "две": 2,
+    "три": 3,
+    "четыре": 4,
+    "пять": 5,
+    "шесть": 6,
+    "семь": 7,
+    "восемь": 8,
+    "девять": 9,
+}
+
+TEENS = {
+    "десять": 10,
+    "одиннадцать": 11,
+    "двенадцать": 12,
+    "тринадцать": 13,
+    "четырнадцать": 14,
+    "пятнадцать": 15,
+    "шестнадцать": 16,
+    "семнадцать": 17,
+    "восемнадцать": 18,
+    "девятнадцать": 19,
+}
+
+TENS = {
+    "двадцать": 20,
+    "тридцать": 30,
+    "сорок": 40,
+    "пятьдесят": 50,
+    "шестьдесят": 60,
+    "семьдесят": 70,
+    "восемьдесят": 80,
+    "девяносто": 90,
+}
+
+NUMERALS = {**UNITS, **TEENS, **TENS, "сто": 100}
+
+
+def normalize_answer(text):
+    """Привести ответ к нормальной форме.
+
+    Args:
+        text (str): Ответ в произвольном виде.
+
+    Returns:
+        str: Нормальная форма ответа.
+    """
+    words = []
+    tens = False
+    for word in text.casefold().replace("ё", "е").split():
+        value = NUMERALS.get(word)
+        if value is None:
+            words.append(word)
+            tens = False
+        elif tens and 0 < value < 10:
+            words[-1] = str(int(words[-1]) + value)
+            tens = False
+        else:
+            words.append(str(value))
+            tens = word in TENS
+    return " ".join(words)
+
+
+def compile_answers(answers):
+    """Собрать множество нормальных форм допустимых ответов.
+
+    Args:
+        answers (Iterable[str]): Допустимые ответы загадки.
+
+    Returns:
+        frozenset[str]: Нормальные формы ответов.
+    """
+    return frozenset(normalize_answer(answer) for answer in answers)
@@ -0,0 +1,296 @@
+# labyrinth_game/commands.py
+"""Реестр команд и разбор введённой строки.
+
+Таблица команд строится один раз при импорте. Имя команды разрешается
+по префиксному дереву за время, пропорциональное длине слова, поэтому
+работают псевдонимы (n, i, exit) и любые однозначные сокращения
+(inv, ta torch). Аргумент дополняется по направлениям, предметам
+комнаты или инвентаря: "take to" поднимет torch, если он один такой.
+Дополняется только первое слово аргумента, остальное (например,
+количество в "take coin 5") передаётся обработчику как есть.
+"""
+
+from labyrinth_game.constants import DIRECTIONS
+from labyrinth_game.history import redo_turn, undo_turn
+from labyrinth_game.player_actions import (
+    move_player,
+    show_hint,
+    show_inventory,
+    take_all,
+    take_item,
+    use_item,
+)
+from labyrinth_game.utils import (
+    attempt_open_treasure,
+    check_puzzle_answer,
+    confirm_treasure_code,
+    describe_current_room,
+    emit,
+    enter_treasure_code,
+    show_help,
+    solve_puzzle,
+)
+
+ALIASES = {
+    "n": "north",
+    "s": "south",
+    "e": "east",
+    "w": "west",
+    "i": "inventory",
+    "l": "look",
+    "h": "help",
+    "?": "help",
+    "q": "quit",
+    "exit": "quit",
+}
+
+
+class _TrieNode:
+    """Узел префиксного дерева.
+
+    Attributes:
+        children (dict): Символ -> дочерний узел.
+        exact (str | None): Команда, имя которой заканчивается в узле.
+        unique (str | None): Единственная команда с этим префиксом.
+        candidates (tuple[str]): Все команды с этим префиксом.
+    """
+
+    __slots__ = ("children", "exact", "unique", "candidates")
+
+    def __init__(self):
+        self.children = {}
+        self.exact = None
+        self.unique = None
+        self.candidates = ()
+
+
+class PrefixTrie:
+    """Префиксное дерево слов с однозначным разрешением сокращений."""
+
+    __slots__ = ("root",)
+
+    def __init__(self, words):
+        """Построить дерево.
+
+        Args:
+            words (dict): Слово (имя или псевдоним) -> целевое имя.
+        """
+        self.root = _TrieNode()
+        targets = {}
+        for word, target in words.items():
+            node = self.root
+            path = [node]
+            for char in word:
+                node = node.children.setdefault(char, _TrieNode())
+                path.append(node)
+            node.exact = target
+            for visited in path:
+                targets.setdefault(id(visited), (visited, set()))[1].add(target)
+
+        for node, names in targets.values():
+            node.candidates = tuple(sorted(names))
+            if len(names) == 1:
+                node.unique = node.candidates[0]
+
+    def resolve(self, word):
+        """Разрешить слово или его сокращение.
+
+        Args:
+            word (str): Введённое слово.
+
+        Returns:
+            tuple: (целевое имя или None, кандидаты при неоднозначности).
+        """
+        node = self.root
+        for char in word:
+            node = node.children.get(char)
+            if node is None:
+                return None, ()
+        if node.exact is not None:
+            return node.exact, ()
+        if node.unique is not None:
+            return node.unique, ()
+        return None, node.candidates
+
+
+class Command:
+    """Описание команды.
+
+    Attributes:
+        name (str): Имя команды.
+        handler (callable): Обработчик handler(game_state, arg);
+            возвращает False, если игру нужно завершить.
+        argument (str | None): Вид аргумента для дополнения:
+            "direction", "room_item", "inventory_item" или None.
+        missing_event (str | None): Событие, если обязательный
+            аргумент не указан.
+    """
+
+    __slots__ = ("name", "handler", "argument", "missing_event")
+
+    def __init__(self, name, handler, argument=None, missing_event=None):
+        self.name = name
+        self.handler = handler
+        self.argument = argument
+        self.missing_event = missing_event
+
+
+def _look(game_state, arg):
+    describe_current_room(game_state)
+
+
+def _inventory(game_state, arg):
+    show_inventory(game_state)
+
+
+def _take(game_state, arg):
+    item_name, _, count = arg.partition(" ")
+    if item_name == "all":
+        take_all(game_state)
+    elif not count:
+        take_item(game_state, item_name)
+    elif count.isdigit() and int(count) > 0:
+        take_item(game_state, item_name, int(count))
+    else:
+        emit(game_state, "bad_count", count)
+
+
+def _solve(game_state, arg):
+    if game_state.current_room == "treasure_room":
+        return not attempt_open_treasure(game_state)
+    solve_puzzle(game_state)
+
+
+def _hint(game_state, arg):
+    show_hint(game_state, arg)
+
+
+def _undo(game_state, arg):
+    undo_turn(game_state)
+
+
+def _redo(game_state, arg):
+    redo_turn(game_state)
+
+
+def _help(game_state, arg):
+    show_help(game_state)
+
+
+def _quit(game_state, arg):
+    game_state.outcome = "quit"
+    return False
+
+
+def _direction_handler(direction):
+    def handler(game_state, arg):
+        move_player(game_state, direction)
+
+    return handler
+
+
+def _enter_treasure_code(game_state, code):
+    return not enter_treasure_code(game_state, code)
+
+
+_COMMANDS = [
+    Command("look", _look),
+    Command("inventory", _inventory),
+    Command("go", move_player, "direction", "need_direction"),
+    Command("take", _take, "room_item", "need_item_take"),
+    Command("use", use_item, "inventory_item", "need_item_use"),
+    Command("solve", _solve),
+    Command("hint", _hint),
+    Command("undo", _undo),
+    Command("redo", _redo),
+    Command("help", _help),
+    Command("quit", _quit),
+]
+_COMMANDS.extend(
+    Command(direction, _direction_handler(direction)) for direction in DIRECTIONS
+)
+
+REGISTRY = {command.name: command for command in _COMMANDS}
+
+COMMAND_TRIE = PrefixTrie({**{name: name for name in REGISTRY}, **ALIASES})
+
+DIRECTION_TRIE = PrefixTrie(
+    {
+        **{direction: direction for direction in DIRECTIONS},
+        **{alias: target for alias, target in ALIASES.items() if target in DIRECTIONS},
+    }
+)
+
+PROMPT_HANDLERS = {
+    "puzzle_answer": check_puzzle_answer,
+    "treasure_confirm": confirm_treasure_code,
+    "treasure_code": _enter_treasure_code,
+}
+
+
+def complete_argument(game_state, kind, arg):
+    """Дополнить сокращённый аргумент команды.
+
+    Точное совпадение возвращается как есть, однозначный префикс
+    дополняется до полного имени, иначе аргумент остаётся без изменений
+    (и обработчик сообщит, что такого направления или предмета нет).
+
+    Args:
+        game_state (GameState): Состояние игры.
+        kind (str): "direction", "room_item" или "inventory_item".
+        arg (str): Введённый аргумент.
+
+    Returns:
+        str: Дополненный аргумент.
+    """
+    if kind == "direction":
+        direction, _ = DIRECTION_TRIE.resolve(arg)
+        return direction or arg
+
+    word, sep, rest = arg.partition(" ")
+    if kind == "room_item":
+        names = game_state.world.items(game_state.current_room)
+    else:
+        names = tuple(game_state.inventory_names())
+
+    if word in names:
+        return arg
+    matches = [name for name in names if name.startswith(word)]
+    if len(matches) == 1:
+        return matches[0] + sep + rest
+    return arg
+
+
+def dispatch(game_state, line):
+    """Разобрать строку и выполнить команду.
+
+    Args:
+        game_state (GameState): Состояние игры.
+        line (str): Строка, введённая пользователем.
+
+    Returns:
+        bool: True если игра продолжается, False если нужно выйти.
+    """
+    parts = line.strip().split(maxsplit=1)
+    if not parts:
+        return True
+
+    word = parts[0].lower()
+    name, candidates = COMMAND_TRIE.resolve(word)
+    if name is None:
+        if candidates:
+            emit(game_state, "ambiguous_command", word, ", ".join(candidates))
+        else:
+            emit(game_state, "unknown_command", word)
+        return True
+
+    command = REGISTRY[name]
+    arg = parts[1].lower() if len(parts) > 1 else None
+
+    if command.argument is not None:
+        if not arg:
+            emit(game_state, command.missing_event)
+            return True
+        arg = complete_argument(game_state, command.argument, arg)
+
+    return command.handler(game_state, arg) is not False
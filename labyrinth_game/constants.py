@@ -13,7 +13,9 @@ ROOMS = {
         'exits': {'south': 'entrance', 'west': 'library', 'north': 'treasure_room'},
         'items': [],
         'puzzle': ('На пьедестале надпись: "Назовите число, которое идет после'
-                   ' девяти". Введите ответ цифрой или словом.', '10')
+                   ' девяти". Введите ответ цифрой или словом.', '10'),
+        'answers': ('10', 'десять'),
+        'reward': 'treasure_key'
     },
     'trap_room': {
           'description': 'Комната с хитрой плиточной поломкой. На стене видна'
@@ -21,7 +23,9 @@ ROOMS = {
           'exits': {'west': 'entrance'},
           'items': ['rusty_key'],
           'puzzle': ('Система плит активна. Чтобы пройти, назовите слово "шаг"'
-                     ' три раза подряд (введите "шаг шаг шаг")', 'шаг шаг шаг')
+                     ' три раза подряд (введите "шаг шаг шаг")', 'шаг шаг шаг'),
+          'answers': ('шаг шаг шаг',),
+          'reward': 'rusty_key'
     },
     'library': {
           'description': 'Пыльная библиотека. На полках старые свитки. Где-то'
@@ -29,7 +33,9 @@ ROOMS = {
           'exits': {'east': 'hall', 'north': 'armory'},
           'items': ['ancient_book'],
           'puzzle': ('В одном свитке загадка: "Что растет, когда его съедают?"'
-                     ' (ответ одно слово)', 'резонанс')
+                     ' (ответ одно слово)', 'резонанс'),
+          'answers': ('резонанс',),
+          'reward': 'ancient_scroll'
     },
     'armory': {
           'description': 'Старая оружейная комната. На стене висит меч, рядом'
@@ -43,8 +49,10 @@ ROOMS = {
                          ' нужен особый ключ.',
           'exits': {'south': 'hall'},
           'items': ['treasure_chest'],
+          'locked_by': 'rusty_key',
           'puzzle': ('Дверь защищена кодом. Введите код (подсказка: это число'
-                     ' пятикратного шага, 2*5= ? )', '10')
+                     ' пятикратного шага, 2*5= ? )', '10'),
+          'answers': ('10',)
     },
     'crystal_chamber': {
           'description': 'Сверкающая палата, выложенная кристаллами. Их блеск'
@@ -52,7 +60,9 @@ ROOMS = {
           'exits': {'west': 'library'},
           'items': ['crystal_amulet'],
           'puzzle': ('На стене надпись: "Я светлый днем, но темный ночью. Что я?"'
-                     ' (ответ одно слово)', 'луна')
+                     ' (ответ одно слово)', 'луна'),
+          'answers': ('луна',),
+          'reward': 'crystal_key'
     },
     'underground_river': {
           'description': 'Подземная река с чистой водой. Слышен гул воды о скалы. На'
@@ -60,10 +70,18 @@ ROOMS = {
           'exits': {'east': 'armory'},
           'items': ['ancient_artifact'],
           'puzzle': ('Голос эха спрашивает: "Что можно сломать, но нельзя держать?"'
-                     ' (ответ одно слово)', 'молчание')
+                     ' (ответ одно слово)', 'молчание'),
+          'answers': ('молчание',),
+          'reward': 'artifact_key'
     }
 }
 
+START_ROOM = "entrance"
+
+DIRECTIONS = ("north", "south", "east", "west")
+
+STACKABLE_ITEMS = frozenset({"coin"})
+
 COMMANDS = {
     "go <direction>": (
         "перейти в направлении (north/south/east/west)"
@@ -71,16 +89,108 @@ COMMANDS = {
     "north/south/east/west": (
         "быстрое движение в указанном направлении"
     ),
+    "n/s/e/w, i, l, q": (
+        "сокращения; подойдёт любой однозначный префикс"
+    ),
     "look": "осмотреть текущую комнату",
-    "take <item>": "поднять предмет",
+    "take <item> [n]": "поднять предмет (n штук, если их несколько)",
+    "take all": "поднять всё, что лежит в комнате",
     "use <item>": "использовать предмет из инвентаря",
     "inventory": "показать инвентарь",
     "solve": "попытаться решить загадку в комнате",
+    "hint [цель]": "подсказать шаг к победе или путь к комнате/предмету",
+    "undo": "отменить последний ход",
+    "redo": "вернуть отменённый ход",
     "quit": "выйти из игры",
     "help": "показать это сообщение",
 }
 
 EVENT_PROBABILITY = 10
 EVENT_TYPES_COUNT = 3
+
+# Случайные события при перемещении (формат - в модуле events).
+EVENTS = (
+    {"name": "coin", "effects": [{"drop": "coin"}, {"message": "coin_found"}]},
+    {"name": "rustle", "effects": [
+        {"message": "rustle"},
+        {"message": "creature_scared", "if": {"items": ["sword"]}},
+    ]},
+    {"name": "trap", "if": {"rooms": ["trap_room"], "without": ["torch"]},
+     "effects": [{"message": "trap_danger"}, {"trap": True}]},
+)
 TRAP_DAMAGE_THRESHOLD = 3
 TRAP_DAMAGE_RANGE = 10
+
+PROMPTS = {
+    "command": "\n> ",
+    "puzzle_answer": "Ваш ответ: ",
+    "treasure_confirm": "Сундук заперт. Ввести код? (да/нет): ",
+    "treasure_code": "Введите код: ",
+}
+
+MESSAGES = {
+    "welcome": (
+        "\n🎮 Добро пожаловать в Лабиринт сокровищ!\nВведите 'help' для справки.\n"
+    ),
+    "no_exit": "Нельзя пойти в этом направлении.",
+    "door_locked": "Дверь заперта. Нужен ключ, чтобы пройти дальше.",
+    "door_unlocked": (
+        "Вы используете найденный ключ, чтобы открыть путь в комнату сокровищ."
+    ),
+    "chest_too_heavy": "Вы не можете поднять сундук, он слишком тяжелый.",
+    "no_such_item": "Такого предмета здесь нет.",
+    "taken": "Вы подняли: {0}",
+    "nothing_to_take": "Здесь нечего поднять.",
+    "bad_count": "Количество должно быть положительным числом: {0}",
+    "not_in_inventory": "У вас нет такого предмета.",
+    "torch_used": "Факел озаряет всё вокруг. Становится светлее!",
+    "sword_used": "Вы берёте меч в руку. Чувствуете уверенность и силу!",
+    "box_opened": "Вы открываете бронзовую шкатулку...",
+    "key_found": "Внутри вы находите ржавый ключ!",
+    "box_empty": "Шкатулка пуста.",
+    "unknown_use": "Вы не знаете, как использовать {0}.",
+    "trap_activated": "Ловушка активирована! Пол стал дрожать...",
+    "item_lost": "Вы потеряли: {0}",
+    "death": "Ловушка нанесла смертельный урон! Вы погибли!",
+    "trap_evaded": "Вам удалось избежать опасности!",
+    "coin_found": "\nВы нашли монетку на полу!",
+    "rustle": "\n🎵 Вы слышите странный шорох...",
+    "creature_scared": "Вы отпугиваете существо своим мечом!",
+    "trap_danger": "\nОпасность! Вы активировали ловушку!",
+    "event_text": "{0}",
+    "no_puzzle": "Загадок здесь нет.",
+    "puzzle": "\n{0}",
+    "puzzle_solved": "Верно! Загадка решена!",
+    "item_received": "Вы получили: {0}",
+    "wrong_answer": "✗ Неверно. Попробуйте снова.",
+    "chest_opened_key": "Вы применяете ключ, и замок щёлкает. Сундук открыт!",
+    "chest_opened_code": "✓ Правильный код! Сундук открыт!",
+    "win": "\nВ сундуке сокровище! Вы победили!",
+    "chest_retreat": "Вы отступаете от сундука.",
+    "wrong_code": "✗ Неверный код.",
+    "hint": "Подсказка: {0} (до победы команд: {1})",
+    "hint_route": "Путь к {0}: {1} (команд: {2})",
+    "hint_here": "Вы уже у цели: {0}.",
+    "hint_none": "Отсюда сокровище уже не добыть.",
+    "hint_no_treasure": (
+        "В этом лабиринте нет сокровища, но можно спросить путь: hint <комната>."
+    ),
+    "hint_unreachable": "Отсюда не добраться до {0}.",
+    "hint_unknown": "Не знаю, где искать {0}.",
+    "undone": "Ход отменён.",
+    "redone": "Ход возвращён.",
+    "nothing_to_undo": "Нечего отменять.",
+    "nothing_to_redo": "Нечего возвращать.",
+    "resumed": "\nИгра восстановлена (команд в журнале: {0}).",
+    "resume_finished": "Игра {0} уже окончена.",
+    "resume_failed": "Сессия {0} не найдена или уже идёт.",
+    "session_code": (
+        "Код сессии: {0}. Чтобы продолжить игру после разрыва связи, "
+        "отправьте первой строкой: resume {0}"
+    ),
+    "need_direction": "Укажите направление (north/south/east/west).",
+    "need_item_take": "Укажите предмет для поднятия.",
+    "need_item_use": "Укажите предмет для использования.",
+    "unknown_command": "Неизвестная команда: {0}. Введите 'help' для справки.",
+    "ambiguous_command": "Неоднозначная команда: {0} ({1}). Уточните.",
+}
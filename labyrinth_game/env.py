@@ -0,0 +1,132 @@
+# labyrinth_game/env.py
+"""Среда в стиле Gym для автоматических агентов.
+
+LabyrinthEnv оборачивает process_command(): reset(seed) начинает новую
+партию, step(action) выполняет команду и возвращает наблюдение,
+награду и флаг окончания. Сессия создаётся без отрисовщика, поэтому
+шаг - это чистая работа с данными: без форматирования строк и вывода.
+Награда считается по событиям команды (см. utils.emit()).
+"""
+
+import random
+
+from labyrinth_game.main import new_game_state, process_command
+
+REWARDS = {
+    "win": 1.0,
+    "death": -1.0,
+    "item_lost": -0.1,
+    "puzzle_solved": 0.2,
+    "wrong_answer": -0.05,
+}
+STEP_PENALTY = -0.01
+
+
+class LabyrinthEnv:
+    """Игровая среда с интерфейсом reset()/step().
+
+    Attributes:
+        max_commands (int): Предел числа команд в партии; после него
+            партия обрывается (info["truncated"] = True).
+        game_state (GameState | None): Состояние текущей партии.
+        rng (random.Random): Генератор случайных чисел, заданный reset().
+    """
+
+    def __init__(self, max_commands=500):
+        self.max_commands = max_commands
+        self.game_state = None
+        self.rng = random.Random()
+
+    def reset(self, seed=None):
+        """Начать новую партию.
+
+        Args:
+            seed (int | None): Зерно партии: от него зависят self.rng
+                и зерно случайных событий игры.
+
+        Returns:
+            dict: Наблюдение стартового состояния.
+        """
+        self.rng = random.Random(seed)
+        self.game_state = new_game_state(seed=self.rng.getrandbits(64))
+        return self.observation()
+
+    def step(self, action):
+        """Выполнить команду игрока.
+
+        Args:
+            action (str): Команда или ответ на вопрос, как в консоли.
+
+        Returns:
+            tuple: (наблюдение, награда, done, info). В info лежат
+            события команды, исход партии и признак обрыва по пределу.
+        """
+        game_state = self.game_state
+        if process_command(game_state, action) is False:
+            game_state.game_over = True
+
+        events = tuple(game_state.events)
+        reward = STEP_PENALTY
+        for event in events:
+            reward += REWARDS.get(event[0], 0.0)
+
+        truncated = (
+            not game_state.game_over
+            and game_state.commands_issued >= self.max_commands
+        )
+        info = {
+            "events": events,
+            "outcome": game_state.outcome,
+            "truncated": truncated,
+        }
+        return self.observation(), reward, game_state.game_over or truncated, info
+
+    def observation(self):
+        """Вернуть наблюдение текущего состояния.
+
+        Returns:
+            dict: room, items, exits, inventory, puzzle (есть ли загадка)
+            и prompt (вопрос, на который ждут ответа, или None).
+        """
+        game_state = self.game_state
+        world = game_state.world
+        room_name = game_state.current_room
+        return {
+            "room": room_name,
+            "items": tuple(world.items(room_name)),
+            "exits": tuple(world.exits(room_name)),
+            "inventory": tuple(game_state.inventory_items()),
+            "puzzle": world.puzzle(room_name) is not None,
+            "prompt": game_state.pending_prompt,
+        }
+
+    def legal_actions(self):
+        """Вернуть список осмысленных команд в текущем состоянии.
+
+        Returns:
+            list[str]: Переходы, поднятие и использование предметов,
+            solve; при ожидании ответа на вопрос - варианты ответа.
+        """
+        game_state = self.game_state
+        world = game_state.world
+        room_name = game_state.current_room
+
+        match game_state.pending_prompt:
+            case "puzzle_answer":
+                return [world.puzzle(room_name)[1], "не знаю"]
+            case "treasure_confirm":
+                return ["да", "нет"]
+            case "treasure_code":
+                puzzle = world.puzzle("treasure_room")
+                return [puzzle[1] if puzzle else "0"]
+
+        actions = list(world.exits(room_name))
+        actions.extend(
+            f"take {item}"
+            for item in world.items(room_name)
+            if item != "treasure_chest"
+        )
+        actions.extend(f"use {item}" for item in game_state.inventory_names())
+        if world.puzzle(room_name) or room_name == "treasure_room":
+            actions.append("solve")
+        return actions
@@ -0,0 +1,336 @@
+# labyrinth_game/events.py
+"""Таблица случайных событий при перемещении.
+
+События описываются данными (EVENTS в constants.py или раздел "events"
+файла мира), а не ветками кода:
+
+    {
+      "name": "coin",
+      "weight": 2,
+      "rooms": ["hall"],
+      "tags": ["dark"],
+      "if": {"items": ["sword"], "without": ["torch"]},
+      "effects": [
+        {"drop": "coin"},
+        {"message": "coin_found"},
+        {"text": "Где-то звенит колокол.", "if": {"tags": ["bell"]}}
+      ]
+    }
+
+- "weight" - вес события при выборе (по умолчанию 1);
+- "rooms" и "tags" - где событие возможно: только в перечисленных
+  комнатах и только в комнатах со всеми метками (поле "tags" комнаты);
+- "if" - условие срабатывания: комнаты ("rooms"), метки ("tags"),
+  предметы, которые должны быть ("items") и которых быть не должно
+  ("without"). Если условие не выполнено, событие выбрано, но ничего
+  не происходит - его вес всё равно участвует в выборе;
+- "effects" - действия по порядку, у каждого может быть своё "if":
+  message (событие из MESSAGES), text (произвольный текст), drop
+  (положить предмет в комнату), give и take (дать и отнять предмет
+  у игрока), trap (сработать ловушке).
+
+Таблица компилируется при загрузке мира: для каждой комнаты - массив
+накопленных весов возможных в ней событий, поэтому выбор события - это
+bisect, O(log n) от числа событий. Условия по комнате и меткам
+вычисляются тогда же, а условия по предметам превращаются в битовые
+маски инвентаря и проверяются двумя битовыми операциями. Комнаты,
+которые таблица не различает (не упомянуты и без меток), делят одну
+общую скомпилированную таблицу.
+"""
+
+from bisect import bisect_right
+
+from labyrinth_game.constants import EVENTS, MESSAGES
+from labyrinth_game.state import intern_item
+from labyrinth_game.utils import emit, trigger_trap
+
+EVENT_FIELDS = ("name", "weight", "rooms", "tags", "if", "effects")
+
+CONDITION_FIELDS = ("rooms", "tags", "items", "without")
+
+NO_CONDITION = {}
+
+NO_TAGS = frozenset()
+
+
+class EventDataError(ValueError):
+    """Ошибка в описании событий."""
+
+
+def _strings(value):
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+def apply_message(game_state, kind):
+    """Действие message: породить событие kind."""
+    emit(game_state, kind)
+
+
+def apply_text(game_state, text):
+    """Действие text: показать произвольный текст."""
+    emit(game_state, "event_text", text)
+
+
+def apply_drop(game_state, item_name):
+    """Действие drop: положить предмет в текущую комнату."""
+    game_state.world.add_item(game_state.current_room, item_name)
+
+
+def apply_give(game_state, item_name):
+    """Действие give: дать предмет игроку."""
+    game_state.add_item(item_name)
+    emit(game_state, "item_received", item_name)
+
+
+def apply_take(game_state, item_name):
+    """Действие take: отнять предмет у игрока, если он есть."""
+    if game_state.remove_item(item_name):
+        emit(game_state, "item_lost", item_name)
+
+
+def apply_trap(game_state, _):
+    """Действие trap: сработать ловушке (см. utils.trigger_trap())."""
+    trigger_trap(game_state)
+
+
+EFFECTS = {
+    "message": apply_message,
+    "text": apply_text,
+    "drop": apply_drop,
+    "give": apply_give,
+    "take": apply_take,
+    "trap": apply_trap,
+}
+
+
+def check_condition(label, condition):
+    """Проверить условие "if" или место события (rooms, tags).
+
+    Raises:
+        EventDataError: Если поля условия неверны.
+    """
+    if not isinstance(condition, dict):
+        raise EventDataError(f"{label}: условие должно быть таблицей")
+    unknown = set(condition) - set(CONDITION_FIELDS)
+    if unknown:
+        raise EventDataError(f"{label}: неизвестные поля условия {sorted(unknown)}")
+    for field, value in condition.items():
+        if not _strings(value):
+            raise EventDataError(f"{label}: {field} должен быть списком строк")
+
+
+def check_effect(label, effect):
+    """Проверить действие события.
+
+    Raises:
+        EventDataError: Если действие неизвестно или его значение неверно.
+    """
+    if not isinstance(effect, dict):
+        raise EventDataError(f"{label}: действие должно быть таблицей")
+    operations = set(effect) - {"if"}
+    if len(operations) != 1 or not operations <= EFFECTS.keys():
+        raise EventDataError(
+            f"{label}: действие должно задавать одно из {sorted(EFFECTS)}"
+        )
+    operation = operations.pop()
+    value = effect[operation]
+    if operation == "trap":
+        if value is not True:
+            raise EventDataError(f"{label}: trap должен быть true")
+    elif not isinstance(value, str):
+        raise EventDataError(f"{label}: {operation} должен быть строкой")
+    elif operation == "message" and value not in MESSAGES:
+        raise EventDataError(f"{label}: неизвестное сообщение {value!r}")
+    if "if" in effect:
+        check_condition(label, effect["if"])
+
+
+def normalize_events(events, room_names=None):
+    """Проверить описание событий.
+
+    Args:
+        events (list[dict]): События в формате модуля.
+        room_names (Container[str] | None): Имена комнат мира; если заданы,
+            проверяется, что события ссылаются только на них.
+
+    Returns:
+        tuple[dict]: События с явным весом.
+
+    Raises:
+        EventDataError: При ошибках в описании.
+    """
+    if not isinstance(events, list | tuple):
+        raise EventDataError("events должен быть списком событий")
+    normalized = []
+    for index, event in enumerate(events):
+        if not isinstance(event, dict):
+            raise EventDataError(f"событие {index}: должно быть таблицей")
+        label = f"событие {event.get('name', index)!r}"
+        unknown = set(event) - set(EVENT_FIELDS)
+        if unknown:
+            raise EventDataError(f"{label}: неизвестные поля {sorted(unknown)}")
+        if not isinstance(event.get("name"), str):
+            raise EventDataError(f"{label}: нет имени (name)")
+        weight = event.get("weight", 1)
+        if isinstance(weight, bool) or not isinstance(weight, int) or weight < 1:
+            raise EventDataError(f"{label}: weight должен быть целым больше нуля")
+        place = {field: event[field] for field in ("rooms", "tags") if field in event}
+        check_condition(label, place)
+        if "if" in event:
+            check_condition(label, event["if"])
+        effects = event.get("effects")
+        if not isinstance(effects, list | tuple) or not effects:
+            raise EventDataError(f"{label}: нет действий (effects)")
+        for effect in effects:
+            check_effect(label, effect)
+        if room_names is not None:
+            for room_name in mentioned_rooms((event,)):
+                if room_name not in room_names:
+                    raise EventDataError(
+                        f"{label}: несуществующая комната {room_name!r}"
+                    )
+        normalized.append({**event, "weight": weight})
+    return tuple(normalized)
+
+
+def mentioned_rooms(events):
+    """Вернуть имена комнат, упомянутых в событиях и их условиях."""
+    rooms = set()
+    for event in events:
+        rooms.update(event.get("rooms", ()))
+        rooms.update(event.get("if", NO_CONDITION).get("rooms", ()))
+        for effect in event["effects"]:
+            rooms.update(effect.get("if", NO_CONDITION).get("rooms", ()))
+    return rooms
+
+
+def room_matches(condition, room_name, tags):
+    """Выполнено ли условие по комнате (поля rooms и tags)."""
+    rooms = condition.get("rooms")
+    if rooms is not None and room_name not in rooms:
+        return False
+    return tags.issuperset(condition.get("tags", ()))
+
+
+def item_masks(condition):
+    """Вернуть маски (нужные предметы, запрещённые предметы) условия."""
+    need = 0
+    for item_name in condition.get("items", ()):
+        need |= 1 << intern_item(item_name)
+    avoid = 0
+    for item_name in condition.get("without", ()):
+        avoid |= 1 << intern_item(item_name)
+    return need, avoid
+
+
+class RoomEvents:
+    """События, возможные в комнате.
+
+    Attributes:
+        total (int): Сумма весов; 0 - событий в комнате нет.
+        cumulative (list[int]): Накопленные веса по порядку событий.
+        actions (list[tuple | None]): (нужные, запрещённые, действия)
+            для каждого события; None - событие здесь ничего не делает.
+            Действие - (нужные, запрещённые, функция, значение).
+    """
+
+    __slots__ = ("total", "cumulative", "actions")
+
+    def __init__(self, events, room_name, tags):
+        self.total = 0
+        self.cumulative = []
+        self.actions = []
+        for event in events:
+            if not room_matches(event, room_name, tags):
+                continue
+            self.total += event["weight"]
+            self.cumulative.append(self.total)
+            guard = event.get("if", NO_CONDITION)
+            if not room_matches(guard, room_name, tags):
+                self.actions.append(None)
+                continue
+            effects = []
+            for effect in event["effects"]:
+                condition = effect.get("if", NO_CONDITION)
+                if not room_matches(condition, room_name, tags):
+                    continue
+                (operation,) = set(effect) - {"if"}
+                effects.append(
+                    (*item_masks(condition), EFFECTS[operation], effect[operation])
+                )
+            self.actions.append((*item_masks(guard), tuple(effects)))
+
+    def pick(self, value):
+        """Вернуть действие события для value из [0, total)."""
+        return self.actions[bisect_right(self.cumulative, value)]
+
+
+class EventTable:
+    """Таблица событий мира.
+
+    Компилируется методом compile() после того, как предметам мира
+    присвоены номера (см. world.intern_items()): маски условий зависят
+    от номеров предметов. При сохранении (pickle) хранится только
+    описание, и в другом процессе таблица компилируется заново.
+
+    Args:
+        events (Iterable[dict]): События (см. normalize_events()).
+        room_tags (dict | None): Имя комнаты -> метки комнаты.
+
+    Attributes:
+        events (tuple[dict]): События.
+        room_tags (dict): Имя комнаты -> кортеж меток.
+        default (RoomEvents | None): События комнат, которые таблица
+            не различает.
+        by_room (dict | None): Имя комнаты -> RoomEvents для остальных
+            комнат; None - таблица ещё не скомпилирована.
+    """
+
+    __slots__ = ("events", "room_tags", "default", "by_room")
+
+    def __init__(self, events=EVENTS, room_tags=None):
+        self.events = tuple(
+            {**event, "weight": event.get("weight", 1)} for event in events
+        )
+        self.room_tags = {
+            room_name: tuple(tags) for room_name, tags in (room_tags or {}).items()
+        }
+        self.default = None
+        self.by_room = None
+
+    def __reduce__(self):
+        return EventTable, (self.events, self.room_tags)
+
+    def compile(self):
+        """Собрать накопленные веса и маски условий для комнат.
+
+        Повторный вызов ничего не делает.
+        """
+        if self.by_room is not None:
+            return
+        named = mentioned_rooms(self.events)
+        compiled = {}
+        by_room = {}
+        for room_name in named | self.room_tags.keys():
+            key = (
+                room_name if room_name in named else None,
+                frozenset(self.room_tags.get(room_name, ())),
+            )
+            room_events = compiled.get(key)
+            if room_events is None:
+                room_events = compiled[key] = RoomEvents(self.events, *key)
+            by_room[room_name] = room_events
+        default = compiled.get((None, NO_TAGS))
+        self.default = default or RoomEvents(self.events, None, NO_TAGS)
+        self.by_room = {
+            room_name: room_events
+            for room_name, room_events in by_room.items()
+            if room_events is not self.default
+        }
+
+    def room(self, room_name):
+        """Вернуть события, возможные в комнате (RoomEvents)."""
+        return self.by_room.get(room_name, self.default)
+
+
+DEFAULT_EVENTS = EventTable()
@@ -0,0 +1,607 @@
+# labyrinth_game/fuzz.py
+"""Фаззинг игровой логики: случайные команды и проверка инвариантов.
+
+Каждая последовательность - партия со своим зерном: команды берутся
+то из стратегии random_policy() (чтобы партия продвигалась), то из
+словаря всех команд мира с искажениями (префиксы, регистр, лишние
+пробелы, странные количества). Команды выполняются через
+process_command() без консоли, с историей ходов (undo/redo
+проверяются вместе с остальными командами), а после каждой команды
+проверяются инварианты INVARIANTS:
+
+- exception и render: команда и отрисовка её событий не бросают
+  исключений;
+- inventory: бит инвентаря есть ровно у предметов из порядка
+  получения, счётчик складываемого предмета равен числу его экземпляров
+  в порядке, а в комнатах нет предметов с количеством меньше единицы;
+- unique: игра выдала нескладываемый предмет (награда за загадку,
+  rusty_key из шкатулки) не больше раз, чем у него источников, считая
+  и выданные экземпляры, которые потом отняла ловушка;
+- undo: после отмены хода сессия не ждёт ответа на вопрос (вопрос
+  и ответ отменяются вместе, см. history);
+- win: состояние партии есть среди состояний, обойдённых решателем
+  (solver.verify()), и победа становится недостижимой только там,
+  где решатель это предсказал (тупики verify()).
+
+Последовательность, нарушившая инвариант, сжимается: из неё
+выбрасываются куски, пока нарушение того же инварианта повторяется,
+и остаётся минимальный пример для --script. Последовательности
+раскладываются по процессам тем же механизмом, что и партии симуляции
+(simulation.iter_shards()); в отчёте - команд в секунду (в целом и на ядро).
+
+Пример:
+    python -m labyrinth_game.fuzz --sequences 100000 --save fuzz-failures
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import traceback
+from functools import lru_cache
+from pathlib import Path
+
+from labyrinth_game.constants import DIRECTIONS, STACKABLE_ITEMS
+from labyrinth_game.main import new_game_state, process_command
+from labyrinth_game.render import render_event
+from labyrinth_game.simulation import iter_shards, random_policy
+from labyrinth_game.solver import BOX_ITEM, BOX_KEY, SolverModel, verify
+from labyrinth_game.state import COUNT_MASK, ITEM_NAMES, STACKABLE_SHIFTS
+from labyrinth_game.world import DEFAULT_TEMPLATE, NO_ITEMS, World
+
+COUNTS = ("0", "-1", "2", "10", "99999999999999999999", "x")
+
+NOISE = ("", "   ", "???", "go", "take", "use", "да", "нет", "0", "😀")
+
+POLICY_SHARE = 0.5
+
+SHRINK_LIMIT = 2000
+
+
+class Failure:
+    """Нарушение инварианта.
+
+    Attributes:
+        invariant (str): Имя инварианта из INVARIANTS.
+        subject (str): Что нарушено (предмет, место исключения):
+            при сжатии нарушение считается тем же, если совпадают
+            инвариант и subject.
+        message (str): Описание нарушения.
+        seed (int): Зерно партии.
+        commands (tuple[str]): Команды до нарушения включительно.
+    """
+
+    __slots__ = ("invariant", "subject", "message", "seed", "commands")
+
+    def __init__(self, invariant, subject, message, seed, commands):
+        self.invariant = invariant
+        self.subject = subject
+        self.message = message
+        self.seed = seed
+        self.commands = tuple(commands)
+
+    @property
+    def key(self):
+        """Ключ для отбора одинаковых нарушений."""
+        return self.invariant, self.subject
+
+
+class Trace:
+    """Что фаззер помнит о партии между командами.
+
+    Attributes:
+        key (int | None): Состояние решателя после прошлой команды.
+        totals (dict): Предмет -> экземпляров в комнатах и инвентаре
+            после прошлой команды.
+        issued (dict): Предмет -> сколько экземпляров игра выдала
+            за партию сверх стоящих в комнатах шаблона.
+    """
+
+    __slots__ = ("key", "totals", "issued")
+
+    def __init__(self, key, totals):
+        self.key = key
+        self.totals = totals
+        self.issued = {}
+
+
+class FuzzTarget:
+    """Мир под фаззингом и всё, что нужно для проверки инвариантов.
+
+    Args:
+        template (WorldTemplate): Шаблон мира.
+
+    Attributes:
+        template (WorldTemplate): Шаблон мира.
+        vocabulary (tuple[str]): Команды для случайного выбора.
+        placed (dict): Предмет -> экземпляров в комнатах шаблона.
+        supply (dict): Нескладываемый предмет -> число источников.
+            Предметы, которые могут появиться из событий мира (drop,
+            give), не проверяются.
+        model (SolverModel | None): Модель решателя; None - мир слишком
+            велик для полного обхода или в нём нет сокровища, и
+            инвариант win не проверяется.
+        reached (dict): Состояния, обойдённые решателем.
+        alive (set[int]): Выигрышные состояния.
+        dead_ends (set[int]): Состояния, в которые решатель
+            предсказывает переход из выигрышного в тупик.
+    """
+
+    __slots__ = (
+        "template", "vocabulary", "placed", "supply", "model", "reached",
+        "alive", "dead_ends",
+    )
+
+    def __init__(self, template):
+        self.template = template
+        self.vocabulary = build_vocabulary(template)
+
+        self.placed = {}
+        for room_items in template.items.values():
+            for item_name, count in room_items.items():
+                self.placed[item_name] = self.placed.get(item_name, 0) + count
+        supply = dict(self.placed)
+        for reward in template.rewards.values():
+            supply[reward] = supply.get(reward, 0) + 1
+        if supply.get(BOX_ITEM):
+            supply[BOX_KEY] = supply.get(BOX_KEY, 0) + 1
+        for event in template.event_table.events:
+            for effect in event["effects"]:
+                for operation in ("drop", "give"):
+                    supply.pop(effect.get(operation), None)
+        self.supply = {
+            item_name: count
+            for item_name, count in supply.items()
+            if item_name not in STACKABLE_ITEMS
+        }
+
+        self.model = None
+        verdict = verify(template)
+        if verdict.complete:
+            self.model = SolverModel(template)
+            if self.model.win_id is None:
+                self.model = None
+        self.reached = verdict.reached
+        self.alive = verdict.alive
+        self.dead_ends = {target for _, _, target in verdict.dead_ends}
+
+
+def build_vocabulary(template):
+    """Собрать команды для мира: все глаголы со всеми подходящими словами."""
+    items = set(template.rewards.values()) | {"ghost"}
+    for room_items in template.items.values():
+        items.update(room_items)
+    items = sorted(items)
+    words = ["look", "inventory", "help", "solve", "take all", "hint", "undo", "redo"]
+    words.extend(DIRECTIONS)
+    words.extend(f"go {direction}" for direction in DIRECTIONS)
+    words.extend(direction[0] for direction in DIRECTIONS)
+    words.extend(f"take {item_name}" for item_name in items)
+    words.extend(f"use {item_name}" for item_name in items)
+    words.extend(f"hint {target}" for target in (*template.names, *items))
+    words.extend(f"take {item_name} {count}" for item_name in items for count in COUNTS)
+    for room_name in template.answers:
+        words.append(template.rooms[room_name]["puzzle"][1])
+        words.extend(template.answers[room_name])
+    words.extend(NOISE)
+    return tuple(words)
+
+
+def fuzz_command(game_state, rng, target):
+    """Выбрать следующую команду последовательности."""
+    if rng.random() < POLICY_SHARE and (
+        game_state.pending_prompt
+        or game_state.world.exits(game_state.current_room)
+    ):
+        return random_policy(game_state, rng)
+    command = rng.choice(target.vocabulary)
+    roll = rng.random()
+    if roll < 0.1 and command:
+        return command[:rng.randint(1, len(command))]
+    if roll < 0.15:
+        return command.upper()
+    if roll < 0.2:
+        return f"  {command}  "
+    return command
+
+
+def check_inventory(target, game_state, trace):
+    """Инвариант inventory: маска, счётчики и порядок инвентаря согласованы
+    между собой, счётчики комнат положительны."""
+    order = game_state.inventory_order
+    for item_id, item_name in enumerate(ITEM_NAMES):
+        held = game_state.inventory_mask >> item_id & 1
+        listed = order.count(chr(item_id))
+        if bool(held) != bool(listed):
+            return item_name, f"{item_name}: бит инвентаря {held}, в порядке {listed}"
+        shift = STACKABLE_SHIFTS.get(item_id)
+        if shift is not None:
+            count = game_state.inventory_counts >> shift & COUNT_MASK
+            if count != listed:
+                return item_name, f"{item_name}: счётчик {count}, в порядке {listed}"
+    for room_name, changed in game_state.world.overlay.items():
+        for item_name, count in changed["items"].items():
+            if count < 1:
+                return item_name, f"{room_name}: {item_name} × {count}"
+    return None
+
+
+def item_totals(target, game_state):
+    """Вернуть предмет -> экземпляров в комнатах и инвентаре."""
+    base_items = target.template.items
+    counts = dict(target.placed)
+    for room_name, changed in game_state.world.overlay.items():
+        for item_name, count in base_items.get(room_name, NO_ITEMS).items():
+            counts[item_name] -= count
+        for item_name, count in changed["items"].items():
+            counts[item_name] = counts.get(item_name, 0) + count
+    return {
+        item_name: counts.get(item_name, 0) + game_state.item_count(item_name)
+        for item_name in target.supply
+    }
+
+
+def check_unique(target, game_state, trace):
+    """Инвариант unique: нескладываемых предметов выдано не больше источников.
+
+    Прирост числа экземпляров - выдача, убыль - потеря (ловушка).
+    Отмена хода возвращает потери и забирает выдачи хода, возврат
+    хода - наоборот, поэтому при undo учитывается только убыль,
+    а при redo и остальных командах - только прирост.
+    """
+    totals = item_totals(target, game_state)
+    undone = ("undone",) in game_state.events
+    issued = trace.issued
+    for item_name, supply in target.supply.items():
+        change = totals[item_name] - trace.totals[item_name]
+        if undone:
+            change = min(change, 0)
+        elif change < 0:
+            continue
+        if change:
+            issued[item_name] = issued.get(item_name, 0) + change
+        handed = target.placed.get(item_name, 0) + issued.get(item_name, 0)
+        if handed > supply:
+            return item_name, (
+                f"{item_name}: за партию появилось {handed}, источников {supply}"
+            )
+    trace.totals = totals
+    return None
+
+
+def check_undo(target, game_state, trace):
+    """Инвариант undo: отмена не оставляет вопрос без показа."""
+    if game_state.pending_prompt is not None and ("undone",) in game_state.events:
+        return game_state.pending_prompt, (
+            f"после undo сессия ждёт ответа ({game_state.pending_prompt})"
+        )
+    return None
+
+
+def check_win(target, game_state, trace):
+    """Инвариант win: решатель знает состояние и предсказал тупик."""
+    model = target.model
+    if model is None:
+        return None
+    previous = trace.key
+    key = model.key_of(game_state)
+    if key not in target.reached:
+        return "unknown", f"состояние вне модели решателя: {model.describe(key)}"
+    if (
+        previous in target.alive
+        and key not in target.alive
+        and key not in target.dead_ends
+    ):
+        return "dead_end", (
+            f"победа стала недостижимой: {model.describe(previous)} -> "
+            f"{model.describe(key)}"
+        )
+    trace.key = key
+    return None
+
+
+INVARIANTS = (
+    ("inventory", check_inventory),
+    ("unique", check_unique),
+    ("undo", check_undo),
+    ("win", check_win),
+)
+
+
+def exception_subject(error):
+    """Вернуть место исключения: тип и последний кадр."""
+    frame = traceback.extract_tb(error.__traceback__)[-1]
+    return f"{type(error).__name__} {Path(frame.filename).name}:{frame.lineno}"
+
+
+def run_sequence(target, seed, source):
+    """Сыграть последовательность команд и проверять инварианты.
+
+    Args:
+        target (FuzzTarget): Мир под фаззингом.
+        seed (int): Зерно партии.
+        source (callable): source(game_state) -> команда или None
+            (конец последовательности).
+
+    Returns:
+        tuple: (выполненные команды, Failure или None).
+    """
+    game_state = new_game_state(World(target.template), seed=seed)
+    model = target.model
+    trace = Trace(
+        model.start_key() if model is not None else None,
+        item_totals(target, game_state),
+    )
+    commands = []
+    while not game_state.game_over:
+        command = source(game_state)
+        if command is None:
+            break
+        commands.append(command)
+        try:
+            proceed = process_command(game_state, command)
+        except Exception as error:
+            return commands, Failure(
+                "exception", exception_subject(error), repr(error), seed, commands
+            )
+        try:
+            for event in game_state.events:
+                render_event(game_state, event)
+        except Exception as error:
+            return commands, Failure(
+                "render", exception_subject(error), repr(error), seed, commands
+            )
+        for name, check in INVARIANTS:
+            found = check(target, game_state, trace)
+            if found is not None:
+                return commands, Failure(name, *found, seed, commands)
+        if proceed is False:
+            break
+    return commands, None
+
+
+def replay(target, seed, commands):
+    """Повторить команды; вернуть (выполнено команд, Failure или None)."""
+    feed = iter(commands)
+    executed, failure = run_sequence(target, seed, lambda game_state: next(feed, None))
+    return len(executed), failure
+
+
+def shrink(target, failure, limit=SHRINK_LIMIT):
+    """Сжать последовательность, сохраняя нарушение того же инварианта.
+
+    Из команд выбрасываются куски всё меньшей длины (от половины до
+    одной команды), пока нарушение повторяется; после каждого удачного
+    шага хвост после нарушения отбрасывается.
+
+    Args:
+        target (FuzzTarget): Мир под фаззингом.
+        failure (Failure): Нарушение.
+        limit (int): Наибольшее число повторов.
+
+    Returns:
+        tuple: (сжатое нарушение, выполнено команд при сжатии).
+    """
+    executed = 0
+    replays = 0
+    chunk = len(failure.commands) // 2
+    while chunk >= 1 and replays < limit:
+        index = 0
+        while index < len(failure.commands) and replays < limit:
+            commands = failure.commands
+            candidate = commands[:index] + commands[index + chunk:]
+            count, found = replay(target, failure.seed, candidate)
+            executed += count
+            replays += 1
+            if found is not None and found.key == failure.key:
+                failure = found
+            else:
+                index += chunk
+        chunk //= 2
+    return failure, executed
+
+
+class FuzzStats:
+    """Итоги фаззинга, которые можно объединять.
+
+    Attributes:
+        sequences (int): Сыграно последовательностей.
+        commands (int): Выполнено команд в последовательностях.
+        shrink_commands (int): Выполнено команд при сжатии примеров.
+        failures (dict): (инвариант, subject) -> самое короткое нарушение.
+        cpu_seconds (float): Процессорное время рабочих процессов.
+    """
+
+    __slots__ = ("sequences", "commands", "shrink_commands", "failures", "cpu_seconds")
+
+    def __init__(self):
+        self.sequences = 0
+        self.commands = 0
+        self.shrink_commands = 0
+        self.failures = {}
+        self.cpu_seconds = 0.0
+
+    def add_failure(self, failure):
+        """Учесть нарушение, если такого ещё нет или оно короче известного."""
+        known = self.failures.get(failure.key)
+        if known is None or len(failure.commands) < len(known.commands):
+            self.failures[failure.key] = failure
+
+    def merge(self, other):
+        """Добавить итоги другой части."""
+        self.sequences += other.sequences
+        self.commands += other.commands
+        self.shrink_commands += other.shrink_commands
+        self.cpu_seconds += other.cpu_seconds
+        for failure in other.failures.values():
+            self.add_failure(failure)
+
+    def commands_per_core_second(self):
+        """Вернуть команд в секунду на одно ядро (со сжатием)."""
+        total = self.commands + self.shrink_commands
+        return total / self.cpu_seconds if self.cpu_seconds else 0.0
+
+
+@lru_cache(maxsize=1)
+def target_for(world_path):
+    """Вернуть FuzzTarget для мира из файла (None - встроенный мир)."""
+    if world_path is None:
+        return FuzzTarget(DEFAULT_TEMPLATE)
+    from labyrinth_game.loader import load_world
+
+    return FuzzTarget(load_world(world_path))
+
+
+def fuzz_sequence(stats, seed, world_path, max_commands):
+    """Прогнать последовательность с зерном seed и учесть её в итогах.
+
+    Партия для simulation.run_shard().
+
+    Args:
+        stats (FuzzStats): Итоги части.
+        seed (int): Зерно последовательности.
+        world_path (str | None): Файл мира; None - встроенный мир.
+        max_commands (int): Наибольшая длина последовательности.
+    """
+    target = target_for(world_path)
+    rng = random.Random(seed)
+    length = rng.randint(1, max_commands)
+
+    def source(game_state):
+        if game_state.commands_issued >= length:
+            return None
+        return fuzz_command(game_state, rng, target)
+
+    commands, failure = run_sequence(target, seed, source)
+    stats.sequences += 1
+    stats.commands += len(commands)
+    if failure is not None and failure.key not in stats.failures:
+        failure, executed = shrink(target, failure)
+        stats.shrink_commands += executed
+        stats.add_failure(failure)
+
+
+def iter_batch(sequences, world_path=None, workers=None, shard_size=1000,
+               max_commands=200, first_seed=0):
+    """Прогнать последовательности параллельно, отдавая промежуточные итоги.
+
+    Args:
+        sequences (int): Общее число последовательностей.
+        world_path (str | None): Файл мира; None - встроенный мир.
+        workers (int | None): Число процессов. По умолчанию - число ядер.
+        shard_size (int): Последовательностей в одной задаче.
+        max_commands (int): Наибольшая длина последовательности.
+        first_seed (int): Зерно первой последовательности.
+
+    Yields:
+        FuzzStats: Накопленные итоги после каждой готовой части.
+    """
+    yield from iter_shards(
+        fuzz_sequence, FuzzStats, sequences, workers, shard_size, first_seed,
+        world_path, max_commands,
+    )
+
+
+def repro_command(failure, world_path, script):
+    """Вернуть команду запуска игры, повторяющую нарушение."""
+    world = f" --world {world_path}" if world_path is not None else ""
+    return (
+        f"python -m labyrinth_game.main --seed {failure.seed}{world} "
+        f"--script {script}"
+    )
+
+
+def format_report(stats, elapsed, world_path=None, save=None):
+    """Сформировать отчёт фаззинга.
+
+    Args:
+        stats (FuzzStats): Итоги.
+        elapsed (float): Прошедшее время в секундах.
+        world_path (str | None): Файл мира (для команды повтора).
+        save (Path | None): Каталог, куда записаны примеры.
+
+    Returns:
+        str: Многострочный отчёт.
+    """
+    total = stats.commands + stats.shrink_commands
+    lines = [
+        f"Последовательностей: {stats.sequences}",
+        f"Команд:              {stats.commands} (и {stats.shrink_commands} "
+        "при сжатии примеров)",
+        f"Команд в секунду:    {total / elapsed if elapsed else 0:.0f}",
+        f"Команд/с на ядро:    {stats.commands_per_core_second():.0f}",
+        f"Нарушений:           {len(stats.failures)}",
+    ]
+    for failure in sorted(stats.failures.values(), key=lambda item: item.key):
+        lines.append(f"[{failure.invariant}] {failure.message}")
+        lines.append(
+            f"  зерно {failure.seed}, команд {len(failure.commands)}: "
+            + " | ".join(repr(command) for command in failure.commands)
+        )
+        if save is not None:
+            script = save / f"{failure.invariant}-{failure.seed}.txt"
+            lines.append(f"  повтор: {repro_command(failure, world_path, script)}")
+    return "\n".join(lines)
+
+
+def save_failures(stats, directory):
+    """Записать минимальные примеры в каталог, по файлу --script на нарушение."""
+    directory.mkdir(parents=True, exist_ok=True)
+    for failure in stats.failures.values():
+        script = directory / f"{failure.invariant}-{failure.seed}.txt"
+        script.write_text(
+            "".join(f"{command}\n" for command in failure.commands), encoding="utf-8"
+        )
+
+
+def main(argv=None):
+    """Запустить фаззинг из командной строки.
+
+    Returns:
+        int: Код выхода: 0 - нарушений нет, 1 - найдены нарушения.
+    """
+    parser = argparse.ArgumentParser(description="Фаззинг игровой логики")
+    parser.add_argument("--sequences", type=int, default=10_000)
+    parser.add_argument("--max-commands", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--shard-size", type=int, default=1000)
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument(
+        "--world", metavar="PATH", help="файл мира (по умолчанию встроенный мир)"
+    )
+    parser.add_argument(
+        "--save", metavar="DIR", type=Path,
+        help="записать минимальные примеры в DIR (файлы для --script)",
+    )
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    stats = FuzzStats()
+    for stats in iter_batch(
+        args.sequences,
+        args.world,
+        args.workers,
+        args.shard_size,
+        args.max_commands,
+        args.first_seed,
+    ):
+        elapsed = time.perf_counter() - started
+        print(
+            f"\r{stats.sequences}/{args.sequences} последовательностей, "
+            f"{stats.commands / elapsed:.0f} команд/с, "
+            f"нарушений: {len(stats.failures)}",
+            end="",
+            flush=True,
+        )
+    print()
+    if args.save is not None and stats.failures:
+        save_failures(stats, args.save)
+    print(format_report(
+        stats, time.perf_counter() - started, args.world, args.save
+    ))
+    return 1 if stats.failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
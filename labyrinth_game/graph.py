@@ -0,0 +1,156 @@
+# labyrinth_game/graph.py
+"""Компактный граф переходов между комнатами.
+
+Комнаты и направления - небольшие целые числа, а выходы лежат в одной
+плоской таблице array('i'): переход из комнаты room в направлении
+direction - это exits[room * 4 + direction], NO_EXIT (-1), если выхода
+нет. Имена комнат нужны только на границе ввода-вывода (разбор команд,
+отрисовка), поэтому перемещение - одно обращение к массиву, а поиск
+пути идёт по целым числам без словарей.
+
+Таблица занимает 16 байт на комнату, что позволяет держать в памяти
+карты на миллионы комнат.
+"""
+
+from array import array
+from collections import deque
+
+from labyrinth_game.constants import DIRECTIONS
+
+DIRECTION_IDS = {direction: index for index, direction in enumerate(DIRECTIONS)}
+DIRECTIONS_COUNT = len(DIRECTIONS)
+
+NO_EXIT = -1
+
+
+class WorldGraph:
+    """Граф комнат с таблицей выходов.
+
+    Attributes:
+        names (tuple[str]): Имена комнат по номерам.
+        ids (dict): Имя комнаты -> номер.
+        exits (array): Таблица выходов, DIRECTIONS_COUNT ячеек на комнату.
+    """
+
+    __slots__ = ("names", "ids", "exits")
+
+    def __init__(self, names, exits):
+        self.names = tuple(names)
+        self.ids = {name: room_id for room_id, name in enumerate(self.names)}
+        self.exits = exits
+
+    def __len__(self):
+        return len(self.names)
+
+    def neighbor(self, room_id, direction_id):
+        """Вернуть номер соседней комнаты или NO_EXIT."""
+        return self.exits[room_id * DIRECTIONS_COUNT + direction_id]
+
+    def neighbors(self, room_id):
+        """Вернуть список пар (номер направления, номер комнаты)."""
+        base = room_id * DIRECTIONS_COUNT
+        exits = self.exits
+        return [
+            (direction_id, exits[base + direction_id])
+            for direction_id in range(DIRECTIONS_COUNT)
+            if exits[base + direction_id] != NO_EXIT
+        ]
+
+    def shortest_path(self, start_id, goal_id):
+        """Найти кратчайший путь поиском в ширину.
+
+        Args:
+            start_id (int): Номер начальной комнаты.
+            goal_id (int): Номер целевой комнаты.
+
+        Returns:
+            list[int] | None: Номера направлений по порядку или None,
+            если цель недостижима.
+        """
+        if start_id == goal_id:
+            return []
+        exits = self.exits
+        parents = array("i", [NO_EXIT]) * len(self.names)
+        moves = bytearray(len(self.names))
+        parents[start_id] = start_id
+        queue = deque([start_id])
+        while queue:
+            room_id = queue.popleft()
+            base = room_id * DIRECTIONS_COUNT
+            for direction_id in range(DIRECTIONS_COUNT):
+                target = exits[base + direction_id]
+                if target == NO_EXIT or parents[target] != NO_EXIT:
+                    continue
+                parents[target] = room_id
+                moves[target] = direction_id
+                if target == goal_id:
+                    return _trace_path(parents, moves, start_id, goal_id)
+                queue.append(target)
+        return None
+
+
+def _trace_path(parents, moves, start_id, goal_id):
+    path = []
+    room_id = goal_id
+    while room_id != start_id:
+        path.append(moves[room_id])
+        room_id = parents[room_id]
+    path.reverse()
+    return path
+
+
+def compile_graph(rooms):
+    """Построить граф по словарю комнат в формате ROOMS.
+
+    Args:
+        rooms (dict): Имя комнаты -> данные с ключом "exits".
+
+    Returns:
+        WorldGraph: Граф комнат.
+
+    Raises:
+        ValueError: Если выход ведёт в неизвестную комнату или
+            по неизвестному направлению.
+    """
+    names = tuple(rooms)
+    ids = {name: room_id for room_id, name in enumerate(names)}
+    exits = array("i", [NO_EXIT]) * (len(names) * DIRECTIONS_COUNT)
+    for room_id, name in enumerate(names):
+        for direction, target in rooms[name]["exits"].items():
+            direction_id = DIRECTION_IDS.get(direction)
+            if direction_id is None:
+                raise ValueError(f"{name}: неизвестное направление {direction!r}")
+            if target not in ids:
+                raise ValueError(f"{name}: выход в неизвестную комнату {target!r}")
+            exits[room_id * DIRECTIONS_COUNT + direction_id] = ids[target]
+    return WorldGraph(names, exits)
+
+
+def grid_graph(width, height):
+    """Построить граф-решётку width x height (для замеров и тестовых карт).
+
+    Комнаты нумеруются по строкам: room = y * width + x, north - это
+    y - 1, south - y + 1, east - x + 1, west - x - 1.
+
+    Args:
+        width (int): Ширина решётки.
+        height (int): Высота решётки.
+
+    Returns:
+        WorldGraph: Граф комнат с именами вида "room_x_y".
+    """
+    north, south, east, west = (DIRECTION_IDS[d] for d in DIRECTIONS)
+    exits = array("i", [NO_EXIT]) * (width * height * DIRECTIONS_COUNT)
+    for y in range(height):
+        for x in range(width):
+            base = (y * width + x) * DIRECTIONS_COUNT
+            if y > 0:
+                exits[base + north] = (y - 1) * width + x
+            if y < height - 1:
+                exits[base + south] = (y + 1) * width + x
+            if x < width - 1:
+                exits[base + east] = y * width + x + 1
+            if x > 0:
+                exits[base + west] = y * width + x - 1
+    names = (f"room_{x}_{y}" for y in range(height) for x in range(width))
+    return WorldGraph(names, exits)
@@ -0,0 +1,213 @@
+# labyrinth_game/history.py
+"""История ходов для команд undo и redo.
+
+Ход хранится дельтой: кортежем полей состояния до хода (комната, шаги,
+инвентарь, ожидаемый ответ, исход) и прежними записями оверлея только
+тех комнат, которые ход изменил. Остальной мир общий у всех версий:
+записи оверлея не меняются на месте, пока их держит история (см.
+World.owned), поэтому тысяча ходов стоит килобайты, а не тысячу копий
+состояния.
+
+Отмена хода применяет его дельту и кладёт в стек возврата обратную
+дельту (текущие значения тех же полей и комнат); возврат делает то же
+в обратную сторону. Ходы, которые ничего не изменили (look, help,
+hint), в историю не попадают.
+
+Вопрос и ответ на него - один ход: команда, задавшая вопрос (solve
+у загадки или сундука), не закрывает ход, и он заканчивается вместе
+с ответом. Поэтому undo после неверного ответа возвращает состояние
+до solve, а undo во время вопроса снимает вопрос.
+
+Случайные события зависят только от зерна и номера шага (см. rng),
+поэтому после отмены тот же ход даёт тот же исход.
+"""
+
+from collections import deque
+
+from labyrinth_game.utils import describe_current_room, emit
+
+HISTORY_LIMIT = 1000
+
+HISTORY_COMMANDS = ("undo", "redo")
+
+FIELDS = (
+    "room_id",
+    "steps_taken",
+    "game_over",
+    "pending_prompt",
+    "outcome",
+    "inventory_mask",
+    "inventory_counts",
+    "inventory_order",
+    "spent_mask",
+)
+
+
+class History:
+    """Стеки отмены и возврата ходов одной сессии.
+
+    Ход - пара (поля, комнаты): кортеж значений FIELDS и словарь
+    имя комнаты -> запись оверлея (None, если ход комнат не менял).
+
+    Attributes:
+        undo (deque): Ходы для отмены, не больше limit последних.
+        redo (list): Отменённые ходы для возврата.
+        before (tuple | None): Поля состояния в начале текущего хода;
+            None - текущий ход не запоминается.
+    """
+
+    __slots__ = ("undo", "redo", "before")
+
+    def __init__(self, limit=HISTORY_LIMIT, undo=(), redo=()):
+        self.undo = deque(undo, maxlen=limit)
+        self.redo = list(redo)
+        self.before = None
+
+
+def capture(game_state):
+    """Вернуть кортеж значений FIELDS состояния."""
+    return (
+        game_state.room_id,
+        game_state.steps_taken,
+        game_state.game_over,
+        game_state.pending_prompt,
+        game_state.outcome,
+        game_state.inventory_mask,
+        game_state.inventory_counts,
+        game_state.inventory_order,
+        game_state.spent_mask,
+    )
+
+
+def begin_turn(game_state):
+    """Начать запоминать ход.
+
+    Если ход ещё не закончен (сессия ждёт ответа на вопрос), команда
+    продолжает его.
+
+    Side Effects:
+        - Запоминает поля состояния и включает учёт изменённых комнат
+    """
+    history = game_state.history
+    if history.before is not None:
+        return
+    world = game_state.world
+    history.before = capture(game_state)
+    world.owned.clear()
+    world.touched = {}
+
+
+def end_turn(game_state):
+    """Закончить ход и положить его дельту в историю.
+
+    Ход, который ничего не изменил, не запоминается; новый ход
+    очищает стек возврата. Если сессия ждёт ответа на вопрос, ход
+    не заканчивается: ответ войдёт в него же.
+    """
+    history = game_state.history
+    if game_state.pending_prompt is not None and history.before is not None:
+        return
+    world = game_state.world
+    touched = world.touched
+    world.touched = None
+    before = history.before
+    history.before = None
+    if before is None or (not touched and before == capture(game_state)):
+        return
+    history.undo.append((before, touched or None))
+    history.redo.clear()
+
+
+def apply_turn(game_state, turn):
+    """Вернуть состояние к дельте хода.
+
+    Args:
+        game_state (GameState): Состояние игры.
+        turn (tuple): Ход (поля, комнаты).
+
+    Returns:
+        tuple: Обратная дельта - текущие значения тех же полей и комнат.
+    """
+    fields, rooms = turn
+    inverse = capture(game_state)
+    (
+        game_state.room_id,
+        game_state.steps_taken,
+        game_state.game_over,
+        game_state.pending_prompt,
+        game_state.outcome,
+        game_state.inventory_mask,
+        game_state.inventory_counts,
+        game_state.inventory_order,
+        game_state.spent_mask,
+    ) = fields
+    if rooms is None:
+        return inverse, None
+    world = game_state.world
+    return inverse, {
+        room_name: world.restore(room_name, changed)
+        for room_name, changed in rooms.items()
+    }
+
+
+def _cancel_question(game_state):
+    """Снять вопрос: вернуть состояние к началу незаконченного хода."""
+    history = game_state.history
+    world = game_state.world
+    turn = (history.before, world.touched or None)
+    history.before = None
+    world.touched = None
+    apply_turn(game_state, turn)
+
+
+def _step(game_state, source, target, done_event, empty_event):
+    history = game_state.history
+    # Сама отмена не ход: её не нужно запоминать.
+    history.before = None
+    game_state.world.touched = None
+    if not source:
+        emit(game_state, empty_event)
+        return
+    target.append(apply_turn(game_state, source.pop()))
+    emit(game_state, done_event)
+    describe_current_room(game_state)
+
+
+def undo_turn(game_state):
+    """Отменить последний ход.
+
+    Во время вопроса отменяется незаконченный ход с ним: состояние
+    возвращается к началу команды, задавшей вопрос.
+
+    Side Effects:
+        - Возвращает поля состояния и комнаты к началу хода
+        - Порождает событие "undone" и описание комнаты
+          или "nothing_to_undo"
+    """
+    history = game_state.history
+    if history is None:
+        emit(game_state, "nothing_to_undo")
+        return
+    if game_state.pending_prompt is not None and history.before is not None:
+        _cancel_question(game_state)
+        emit(game_state, "undone")
+        describe_current_room(game_state)
+        return
+    _step(game_state, history.undo, history.redo, "undone", "nothing_to_undo")
+
+
+def redo_turn(game_state):
+    """Вернуть последний отменённый ход.
+
+    Во время вопроса возвращать нечего: вопрос начал новый ход.
+
+    Side Effects:
+        - Повторяет изменения отменённого хода
+        - Порождает событие "redone" и описание комнаты
+          или "nothing_to_redo"
+    """
+    history = game_state.history
+    if history is None or game_state.pending_prompt is not None:
+        emit(game_state, "nothing_to_redo")
+        return
+    _step(game_state, history.redo, history.undo, "redone", "nothing_to_redo")
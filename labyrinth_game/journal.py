@@ -0,0 +1,429 @@
+# labyrinth_game/journal.py
+"""Журнал команд и снимки состояния игровых сессий.
+
+Каждая принятая команда дописывается строкой в журнал сессии
+(<каталог>/<сессия>.journal, первая строка - заголовок JSON с зерном
+и миром), а каждые snapshot_every команд сохраняется компактный снимок
+состояния (<сессия>.snapshot). Чтобы восстановить сессию, достаточно
+загрузить последний снимок и повторить команды журнала после него.
+Повтор детерминирован: случайные события зависят только от зерна
+сессии и номера шага (см. rng), а оба входят в снимок.
+
+Запись пакетная: команды копятся в памяти и уходят в файлы раз
+в sync_interval секунд - одна запись и один fsync на сессию за
+интервал, а не на каждую команду. При сбое теряются только команды
+последнего интервала. Снимок пишется после журнала того же пакета
+во временный файл и атомарно переименовывается. Если после сбоя снимок
+всё же опередил журнал или не читается, он пропускается и журнал
+повторяется с начала.
+"""
+
+import json
+import os
+import pickle
+import time
+from pathlib import Path
+
+from labyrinth_game.history import History
+from labyrinth_game.main import new_game_state, process_command, show_welcome
+from labyrinth_game.rng import make_rng
+from labyrinth_game.state import GameState
+from labyrinth_game.world import World
+
+JOURNAL_VERSION = 1
+SNAPSHOT_VERSION = 4
+
+SYNC_FILES_LIMIT = 32
+
+JOURNAL_SUFFIX = ".journal"
+SNAPSHOT_SUFFIX = ".snapshot"
+ENCODING = "utf-8"
+
+
+class JournalError(ValueError):
+    """Журнал или снимок повреждён либо относится к другому миру."""
+
+
+class SessionJournal:
+    """Журнал одной сессии.
+
+    Attributes:
+        session_id (str): Имя сессии.
+        path (Path): Файл журнала.
+        snapshot_path (Path): Файл снимка.
+        commands (int): Сколько команд записано в журнал (включая
+            ожидающие записи).
+        header (str | None): Заголовок, ещё не записанный на диск.
+        lines (list[str]): Команды, ждущие записи.
+        snapshot (bytes | None): Снимок, ждущий записи.
+    """
+
+    __slots__ = (
+        "session_id", "path", "snapshot_path", "commands", "header", "lines",
+        "snapshot",
+    )
+
+    def __init__(self, directory, session_id, commands=0, header=None):
+        self.session_id = session_id
+        self.path = directory / f"{session_id}{JOURNAL_SUFFIX}"
+        self.snapshot_path = directory / f"{session_id}{SNAPSHOT_SUFFIX}"
+        self.commands = commands
+        self.header = header
+        self.lines = []
+        self.snapshot = None
+
+
+def snapshot_state(game_state):
+    """Собрать снимок состояния сессии в виде простых значений.
+
+    Инвентарь хранится именами, комната - именем: номера предметов
+    и комнат зависят от процесса и шаблона, а имена - нет. История
+    ходов (см. history) входит в снимок, чтобы undo после
+    восстановления отменял те же ходы, вместе с незаконченным ходом
+    (вопрос без ответа); её поля с номерами предметов
+    одинаковы в любом процессе с тем же миром (см. world.intern_items()).
+
+    Args:
+        game_state (GameState): Состояние игры.
+
+    Returns:
+        dict: Поля состояния и оверлей мира.
+    """
+    world = game_state.world
+    history = game_state.history
+    return {
+        "room": game_state.current_room,
+        "steps_taken": game_state.steps_taken,
+        "game_over": game_state.game_over,
+        "pending_prompt": game_state.pending_prompt,
+        "outcome": game_state.outcome,
+        "commands_issued": game_state.commands_issued,
+        "inventory": list(game_state.inventory_items()),
+        "spent_mask": game_state.spent_mask,
+        "overlay": world.overlay,
+        "versions": world.versions,
+        "history": (
+            None
+            if history is None
+            else (
+                tuple(history.undo),
+                tuple(history.redo),
+                history.before,
+                world.touched,
+            )
+        ),
+    }
+
+
+def restore_state(data, template, seed, renderer=None):
+    """Восстановить состояние сессии из снимка.
+
+    Args:
+        data (dict): Снимок (см. snapshot_state()).
+        template (WorldTemplate): Шаблон мира сессии.
+        seed (int | None): Зерно сессии.
+        renderer (callable | None): Отрисовщик событий.
+
+    Returns:
+        GameState: Состояние игры.
+    """
+    world = World(template)
+    world.overlay = data["overlay"]
+    world.versions = data["versions"]
+    game_state = GameState(world, make_rng(seed), renderer)
+    game_state.room_id = template.ids[data["room"]]
+    game_state.steps_taken = data["steps_taken"]
+    game_state.game_over = data["game_over"]
+    game_state.pending_prompt = data["pending_prompt"]
+    game_state.outcome = data["outcome"]
+    game_state.commands_issued = data["commands_issued"]
+    for item_name in data["inventory"]:
+        game_state.add_item(item_name)
+    game_state.spent_mask = data["spent_mask"]
+    if data["history"] is not None:
+        undo, redo, before, touched = data["history"]
+        game_state.history = History(undo=undo, redo=redo)
+        game_state.history.before = before
+        world.touched = touched
+    return game_state
+
+
+def apply_command(game_state, command):
+    """Выполнить команду так же, как игровой цикл.
+
+    Side Effects:
+        - Устанавливает game_over, если команда завершает игру
+    """
+    if process_command(game_state, command) is False:
+        game_state.game_over = True
+
+
+class JournalStore:
+    """Каталог журналов сессий с пакетной записью.
+
+    Args:
+        directory (str | Path): Каталог журналов (создаётся при нужде).
+        snapshot_every (int): Через сколько команд сохранять снимок.
+        sync_interval (float): Как часто (в секундах) maybe_flush()
+            записывает накопленное на диск.
+        fsync (bool): Вызывать ли os.fsync() после записи. Без fsync
+            данные переживают падение процесса, но не сбой питания.
+        clock (callable): Источник времени для интервала записи.
+
+    Attributes:
+        dirty (dict): Сессии с данными, ждущими записи (id -> журнал).
+        active (set[str]): Сессии, которые сейчас ведутся.
+        last_flush (float): Время последней записи.
+    """
+
+    __slots__ = (
+        "directory", "snapshot_every", "sync_interval", "fsync", "clock",
+        "dirty", "active", "last_flush",
+    )
+
+    def __init__(
+        self, directory, snapshot_every=100, sync_interval=1.0, fsync=True,
+        clock=time.monotonic,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.snapshot_every = snapshot_every
+        self.sync_interval = sync_interval
+        self.fsync = fsync
+        self.clock = clock
+        self.dirty = {}
+        self.active = set()
+        self.last_flush = clock()
+
+    def exists(self, session_id):
+        """Есть ли на диске журнал сессии."""
+        return (self.directory / f"{session_id}{JOURNAL_SUFFIX}").exists()
+
+    def create(self, session_id, seed, world_label):
+        """Начать журнал новой сессии.
+
+        Файл появляется на диске с первой записанной командой.
+
+        Args:
+            session_id (str): Имя сессии (имя файла без расширения).
+            seed (int | None): Зерно случайных событий сессии.
+            world_label (str): Описание мира; при восстановлении
+                должно совпасть.
+
+        Returns:
+            SessionJournal: Журнал сессии.
+        """
+        header = json.dumps(
+            {"journal": JOURNAL_VERSION, "seed": seed, "world": world_label}
+        )
+        journal = SessionJournal(self.directory, session_id, header=header + "\n")
+        self.active.add(session_id)
+        return journal
+
+    def release(self, journal):
+        """Отметить, что сессия больше не ведётся (игрок отключился)."""
+        self.active.discard(journal.session_id)
+
+    def record(self, journal, game_state, command):
+        """Дописать принятую команду и при необходимости снимок.
+
+        Вызывается после process_command(): снимок, сделанный здесь,
+        уже учитывает эту команду.
+
+        Args:
+            journal (SessionJournal): Журнал сессии.
+            game_state (GameState): Состояние после команды.
+            command (str): Введённая строка.
+        """
+        journal.lines.append(command + "\n")
+        journal.commands += 1
+        if journal.commands % self.snapshot_every == 0:
+            journal.snapshot = pickle.dumps(
+                (SNAPSHOT_VERSION, journal.commands, snapshot_state(game_state)),
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        self.dirty[journal.session_id] = journal
+
+    def due(self):
+        """Пора ли записывать накопленное (прошёл sync_interval)."""
+        return bool(self.dirty) and (
+            self.clock() - self.last_flush >= self.sync_interval
+        )
+
+    def maybe_flush(self):
+        """Записать накопленное, если прошёл sync_interval."""
+        if self.due():
+            self.flush()
+
+    def take_batch(self):
+        """Забрать накопленные данные для записи.
+
+        Пакет не ссылается на журналы сессий, поэтому его можно
+        записывать в другом потоке, пока сессии копят новые команды.
+
+        Returns:
+            list[tuple]: (файл журнала, текст, файл снимка, снимок).
+        """
+        batch = []
+        for journal in self.dirty.values():
+            text = (journal.header or "") + "".join(journal.lines)
+            batch.append((journal.path, text, journal.snapshot_path, journal.snapshot))
+            journal.header = None
+            journal.lines = []
+            journal.snapshot = None
+        self.dirty = {}
+        self.last_flush = self.clock()
+        return batch
+
+    def write_batch(self, batch):
+        """Записать пакет на диск.
+
+        Небольшой пакет сбрасывается на диск fsync каждого файла.
+        Для большого пакета (тысячи сессий) fsync по файлу стоит
+        дороже самой записи, поэтому файлы пишутся без него, а затем
+        один раз вызывается os.sync(): он сбрасывает все файловые
+        системы, но обходится как один fsync на весь пакет.
+
+        Side Effects:
+            - Дописывает журналы, заменяет снимки, сбрасывает их на диск
+        """
+        per_file = self.fsync and (
+            len(batch) <= SYNC_FILES_LIMIT or not hasattr(os, "sync")
+        )
+        created = False
+        for path, text, snapshot_path, snapshot in batch:
+            created = created or not path.exists()
+            with path.open("ab") as journal_file:
+                journal_file.write(text.encode(ENCODING))
+                if per_file:
+                    journal_file.flush()
+                    os.fsync(journal_file.fileno())
+            if snapshot is not None:
+                temporary = snapshot_path.with_name(snapshot_path.name + ".tmp")
+                with temporary.open("wb") as snapshot_file:
+                    snapshot_file.write(snapshot)
+                    if per_file:
+                        snapshot_file.flush()
+                        os.fsync(snapshot_file.fileno())
+                temporary.replace(snapshot_path)
+                created = True
+        if per_file and created:
+            # Новые файлы и переименования надёжны только после fsync каталога.
+            directory = os.open(self.directory, os.O_RDONLY)
+            try:
+                os.fsync(directory)
+            finally:
+                os.close(directory)
+        elif self.fsync and not per_file:
+            os.sync()
+
+    def flush(self):
+        """Записать всё накопленное на диск."""
+        self.write_batch(self.take_batch())
+
+    def close(self):
+        """Записать накопленное перед завершением."""
+        self.flush()
+
+    def read(self, session_id):
+        """Прочитать журнал сессии.
+
+        Недописанная последняя строка (сбой посреди записи) отбрасывается
+        и обрезается в файле, чтобы следующие команды не склеились с ней.
+
+        Returns:
+            tuple: (заголовок dict, список команд).
+
+        Raises:
+            OSError: Если журнал не прочитать.
+            JournalError: Если заголовок повреждён.
+        """
+        path = self.directory / f"{session_id}{JOURNAL_SUFFIX}"
+        data = path.read_bytes()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            os.truncate(path, end)
+            data = data[:end]
+        lines = data.decode(ENCODING).split("\n")[:-1]
+        try:
+            header = json.loads(lines[0])
+        except (IndexError, ValueError) as error:
+            raise JournalError(f"{path}: нет заголовка журнала") from error
+        if not isinstance(header, dict) or header.get("journal") != JOURNAL_VERSION:
+            raise JournalError(f"{path}: неизвестная версия журнала")
+        return header, lines[1:]
+
+    def read_snapshot(self, session_id):
+        """Прочитать последний снимок сессии.
+
+        Returns:
+            tuple | None: (число команд, снимок dict) или None, если
+            снимка нет или он повреждён.
+        """
+        path = self.directory / f"{session_id}{SNAPSHOT_SUFFIX}"
+        try:
+            with path.open("rb") as snapshot_file:
+                version, commands, data = pickle.load(snapshot_file)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError):
+            return None
+        if version != SNAPSHOT_VERSION:
+            return None
+        return commands, data
+
+    def resume(self, session_id, template, world_label, renderer=None):
+        """Восстановить сессию: последний снимок и хвост журнала.
+
+        Хвост повторяется без отрисовщика: его вывод игрок уже видел.
+
+        Args:
+            session_id (str): Имя сессии.
+            template (WorldTemplate): Шаблон мира сессии.
+            world_label (str): Описание мира (как при create()).
+            renderer (callable | None): Отрисовщик для дальнейшей игры.
+
+        Returns:
+            tuple: (GameState, SessionJournal).
+
+        Raises:
+            OSError: Если журнал не прочитать.
+            JournalError: Если журнал повреждён или от другого мира.
+        """
+        header, commands = self.read(session_id)
+        if header.get("world") != world_label:
+            raise JournalError(
+                f"{session_id}: журнал мира {header.get('world')!r}, "
+                f"а не {world_label!r}"
+            )
+        seed = header.get("seed")
+
+        snapshot = self.read_snapshot(session_id)
+        if snapshot is not None and snapshot[0] <= len(commands):
+            done, data = snapshot
+            game_state = restore_state(data, template, seed)
+        else:
+            done = 0
+            game_state = new_game_state(World(template), seed=seed)
+        for command in commands[done:]:
+            apply_command(game_state, command)
+
+        game_state.renderer = renderer
+        self.active.add(session_id)
+        return game_state, SessionJournal(
+            self.directory, session_id, commands=len(commands)
+        )
+
+    def replay(self, session_id, template, renderer=None):
+        """Повторить журнал сессии с начала, без снимков.
+
+        С отрисовщиком воспроизводит весь вывод сессии, начиная
+        с приветствия, - так же, как его видел игрок.
+
+        Returns:
+            GameState: Состояние после последней команды.
+        """
+        header, commands = self.read(session_id)
+        game_state = new_game_state(World(template), renderer, header.get("seed"))
+        show_welcome(game_state)
+        for command in commands:
+            apply_command(game_state, command)
+        return game_state
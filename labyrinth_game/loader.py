@@ -0,0 +1,388 @@
+# labyrinth_game/loader.py
+"""Загрузка мира из файла JSON или TOML.
+
+Файл описывает мир в том же виде, что и ROOMS в constants.py:
+
+    {
+      "start": "entrance",
+      "rooms": {
+        "entrance": {
+          "description": "...",
+          "exits": {"north": "hall"},
+          "items": ["torch"],
+          "puzzle": ["Вопрос", "ответ"],
+          "answers": ["ответ", "другой ответ"],
+          "reward": "rusty_key",
+          "locked_by": "rusty_key",
+          "tags": ["dark"]
+        }
+      },
+      "events": [
+        {"name": "coin", "effects": [{"drop": "coin"}, {"message": "coin_found"}]}
+      ]
+    }
+
+Обязательны только "description" и "exits"; в TOML комнаты без загадки
+просто не задают "puzzle". Метки "tags" и таблица "events" задают
+случайные события мира (формат - в модуле events); без "events"
+действуют встроенные события EVENTS. Загрузчик проверяет данные: ошибки (выход
+в несуществующую комнату, неизвестное направление, неверные типы полей)
+прерывают загрузку, а замечания (недостижимые комнаты, загадки без
+награды) возвращаются списком и прерывают её только в строгом режиме.
+
+Собранный шаблон мира сохраняется рядом с файлом (<файл>.cache)
+вместе с SHA-256 исходника; при следующих запусках, пока файл
+не изменился, шаблон читается из кэша без разбора и проверки.
+
+Запуск проверки: python -m labyrinth_game.loader check world.json
+Выгрузка встроенного мира: python -m labyrinth_game.loader export world.json
+"""
+
+import argparse
+import gc
+import hashlib
+import json
+import pickle
+import sys
+import tomllib
+from pathlib import Path
+
+from labyrinth_game.constants import DIRECTIONS, EVENTS, ROOMS, START_ROOM
+from labyrinth_game.events import EventDataError, normalize_events
+from labyrinth_game.world import WorldTemplate, intern_items
+
+CACHE_SUFFIX = ".cache"
+CACHE_VERSION = 3
+
+ROOM_FIELDS = (
+    "description", "exits", "items", "puzzle", "answers", "reward", "locked_by",
+    "tags",
+)
+
+
+class WorldDataError(ValueError):
+    """Ошибка в данных мира, из-за которой мир нельзя загрузить."""
+
+
+def parse_source(path, source):
+    """Разобрать содержимое файла мира по его расширению.
+
+    Args:
+        path (Path): Путь к файлу (.json или .toml).
+        source (bytes): Содержимое файла.
+
+    Returns:
+        dict: Разобранные данные.
+
+    Raises:
+        WorldDataError: Если формат не поддерживается или файл не разобрать.
+    """
+    try:
+        if path.suffix == ".json":
+            return json.loads(source)
+        if path.suffix == ".toml":
+            return tomllib.loads(source.decode("utf-8"))
+    except (ValueError, UnicodeDecodeError) as error:
+        raise WorldDataError(f"{path}: {error}") from error
+    raise WorldDataError(f"{path}: неизвестный формат (нужен .json или .toml)")
+
+
+def _strings(value):
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+def normalize_room(name, room):
+    """Проверить поля комнаты и привести её к виду ROOMS.
+
+    Args:
+        name (str): Имя комнаты.
+        room (dict): Данные комнаты из файла.
+
+    Returns:
+        dict: Комната с ключами description, exits, items, puzzle
+        и, если заданы, answers, reward, locked_by, tags.
+
+    Raises:
+        WorldDataError: Если поля отсутствуют или имеют неверный тип.
+    """
+    if not isinstance(room, dict):
+        raise WorldDataError(f"{name}: комната должна быть таблицей")
+    unknown = set(room) - set(ROOM_FIELDS)
+    if unknown:
+        raise WorldDataError(f"{name}: неизвестные поля {sorted(unknown)}")
+
+    description = room.get("description")
+    if not isinstance(description, str):
+        raise WorldDataError(f"{name}: нет описания")
+
+    exits = room.get("exits")
+    if not isinstance(exits, dict) or not all(
+        isinstance(target, str) for target in exits.values()
+    ):
+        raise WorldDataError(f"{name}: exits должен связывать направления с комнатами")
+    for direction in exits:
+        if direction not in DIRECTIONS:
+            raise WorldDataError(f"{name}: неизвестное направление {direction!r}")
+
+    items = room.get("items", [])
+    if not _strings(items):
+        raise WorldDataError(f"{name}: items должен быть списком строк")
+
+    puzzle = room.get("puzzle")
+    if puzzle is not None and not (_strings(puzzle) and len(puzzle) == 2):
+        raise WorldDataError(f"{name}: puzzle должен быть парой [вопрос, ответ]")
+
+    normalized = {
+        "description": description,
+        "exits": dict(exits),
+        "items": list(items),
+        "puzzle": tuple(puzzle) if puzzle is not None else None,
+    }
+
+    if "answers" in room:
+        if puzzle is None or not _strings(room["answers"]):
+            raise WorldDataError(f"{name}: answers - список строк при загадке")
+        normalized["answers"] = tuple(room["answers"])
+    for field in ("reward", "locked_by"):
+        if field in room:
+            if not isinstance(room[field], str):
+                raise WorldDataError(f"{name}: {field} должен быть строкой")
+            normalized[field] = room[field]
+    if "tags" in room:
+        if not _strings(room["tags"]):
+            raise WorldDataError(f"{name}: tags должен быть списком строк")
+        normalized["tags"] = tuple(room["tags"])
+    return normalized
+
+
+def normalize_world(data):
+    """Проверить данные мира и привести комнаты к виду ROOMS.
+
+    Args:
+        data (dict): Разобранный файл мира.
+
+    Returns:
+        tuple: (rooms, start, events) - комнаты, имя стартовой комнаты
+        и случайные события.
+
+    Raises:
+        WorldDataError: При ошибках в данных или ссылках между комнатами.
+    """
+    rooms_data = data.get("rooms") if isinstance(data, dict) else None
+    if not isinstance(rooms_data, dict) or not rooms_data:
+        raise WorldDataError("в мире нет комнат (таблица rooms)")
+
+    rooms = {name: normalize_room(name, room) for name, room in rooms_data.items()}
+
+    start = data.get("start", START_ROOM)
+    if start not in rooms:
+        raise WorldDataError(f"стартовой комнаты {start!r} нет среди комнат")
+    for name, room in rooms.items():
+        for direction, target in room["exits"].items():
+            if target not in rooms:
+                raise WorldDataError(
+                    f"{name}: выход {direction} ведёт в несуществующую "
+                    f"комнату {target!r}"
+                )
+
+    events = EVENTS
+    if "events" in data:
+        try:
+            events = normalize_events(data["events"], rooms)
+        except EventDataError as error:
+            raise WorldDataError(str(error)) from error
+    return rooms, start, events
+
+
+def find_problems(template):
+    """Найти замечания к миру, не мешающие игре.
+
+    - комнаты, недостижимые из стартовой (двери с ключом не учитываются);
+    - загадки без награды (кроме кодового замка сундука treasure_chest).
+
+    Args:
+        template (WorldTemplate): Собранный мир.
+
+    Returns:
+        list[str]: Замечания.
+    """
+    graph = template.graph
+    reached = {template.start_id}
+    frontier = [template.start_id]
+    while frontier:
+        room_id = frontier.pop()
+        for _, target in graph.neighbors(room_id):
+            if target not in reached:
+                reached.add(target)
+                frontier.append(target)
+
+    problems = [
+        f"{name}: недостижима из {template.names[template.start_id]}"
+        for room_id, name in enumerate(template.names)
+        if room_id not in reached
+    ]
+    problems.extend(
+        f"{name}: у загадки нет награды (reward)"
+        for name in template.answers
+        if name not in template.rewards
+        and "treasure_chest" not in template.items.get(name, ())
+    )
+    return problems
+
+
+def compile_world(data):
+    """Собрать шаблон мира из разобранных данных.
+
+    Args:
+        data (dict): Разобранный файл мира.
+
+    Returns:
+        tuple: (WorldTemplate, список замечаний).
+
+    Raises:
+        WorldDataError: При ошибках в данных.
+    """
+    rooms, start, events = normalize_world(data)
+    template = WorldTemplate(rooms, start, compact=True, events=events)
+    return template, find_problems(template)
+
+
+def cache_path(path):
+    """Вернуть путь к файлу кэша для файла мира."""
+    return path.with_name(path.name + CACHE_SUFFIX)
+
+
+def read_cache(path, digest):
+    """Прочитать шаблон из кэша, если он собран из того же исходника.
+
+    Сначала читается заголовок (версия кэша и хэш исходника), и шаблон
+    распаковывается, только если заголовок совпал. Любая ошибка
+    распаковки (например, класс из старого кэша переименован
+    или перенесён) - промах кэша: мир просто собирается заново.
+
+    Сборщик циклического мусора на время чтения отключается: при
+    создании сотен тысяч объектов он иначе запускается впустую
+    и удваивает время загрузки.
+
+    Returns:
+        tuple | None: (WorldTemplate, замечания) или None.
+    """
+    gc.disable()
+    try:
+        with cache_path(path).open("rb") as cache_file:
+            if pickle.load(cache_file) != (CACHE_VERSION, digest):
+                return None
+            template, problems = pickle.load(cache_file)
+    except Exception:
+        return None
+    finally:
+        gc.enable()
+    intern_items(template)
+    return template, problems
+
+
+def write_cache(path, digest, template, problems):
+    """Сохранить собранный шаблон рядом с файлом мира.
+
+    Side Effects:
+        - Записывает <файл>.cache; если записать нельзя, кэш пропускается
+    """
+    target = cache_path(path)
+    temporary = target.with_name(target.name + ".tmp")
+    try:
+        with temporary.open("wb") as cache_file:
+            for part in ((CACHE_VERSION, digest), (template, problems)):
+                pickle.dump(part, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        temporary.replace(target)
+    except OSError:
+        temporary.unlink(missing_ok=True)
+
+
+def load_world(path, use_cache=True, strict=False):
+    """Загрузить мир из файла JSON или TOML.
+
+    Args:
+        path (str | Path): Путь к файлу мира.
+        use_cache (bool): Читать и обновлять кэш <файл>.cache.
+        strict (bool): Считать замечания (недостижимые комнаты,
+            загадки без наград) ошибками.
+
+    Returns:
+        WorldTemplate: Шаблон мира для World(template).
+
+    Raises:
+        OSError: Если файл не прочитать.
+        WorldDataError: При ошибках в данных (и замечаниях в строгом режиме).
+    """
+    path = Path(path)
+    source = path.read_bytes()
+    digest = hashlib.sha256(source).hexdigest()
+
+    loaded = read_cache(path, digest) if use_cache else None
+    if loaded is None:
+        loaded = compile_world(parse_source(path, source))
+        if use_cache:
+            write_cache(path, digest, *loaded)
+
+    template, problems = loaded
+    if strict and problems:
+        raise WorldDataError("; ".join(problems))
+    return template
+
+
+def dump_rooms(rooms, start=START_ROOM, events=EVENTS):
+    """Представить комнаты в виде данных для файла мира.
+
+    Args:
+        rooms (dict): Комнаты в виде ROOMS.
+        start (str): Стартовая комната.
+        events (Iterable[dict]): Случайные события.
+
+    Returns:
+        dict: Данные для json.dump().
+    """
+    return {
+        "start": start,
+        "rooms": {
+            name: {
+                field: list(value) if isinstance(value, tuple) else value
+                for field, value in room.items()
+            }
+            for name, room in rooms.items()
+        },
+        "events": list(events),
+    }
+
+
+def main(argv=None):
+    """Проверить файл мира или выгрузить встроенный мир в JSON.
+
+    Args:
+        argv (list[str] | None): Аргументы командной строки.
+
+    Returns:
+        int: Код выхода: 0 - без ошибок и замечаний, 1 - есть замечания,
+        2 - мир не загружается.
+    """
+    parser = argparse.ArgumentParser(description="Файлы миров лабиринта")
+    parser.add_argument("action", choices=("check", "export"))
+    parser.add_argument("path", type=Path)
+    args = parser.parse_args(argv)
+
+    if args.action == "export":
+        with args.path.open("w", encoding="utf-8") as world_file:
+            json.dump(dump_rooms(ROOMS), world_file, ensure_ascii=False, indent=2)
+        return 0
+
+    try:
+        _, problems = compile_world(parse_source(args.path, args.path.read_bytes()))
+    except (OSError, WorldDataError) as error:
+        print(f"Ошибка: {error}", file=sys.stderr)
+        return 2
+    for problem in problems:
+        print(f"Замечание: {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
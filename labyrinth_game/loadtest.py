@@ -0,0 +1,160 @@
+# labyrinth_game/loadtest.py
+"""Нагрузочный клиент для сервера игры.
+
+Открывает заданное число одновременных подключений и в каждом
+прогоняет сценарий команд. Задержка команды - время от отправки
+строки до получения следующего приглашения. В итоге выводится число
+команд в секунду и перцентили задержки (p50, p99).
+
+Пример:
+    python -m labyrinth_game.loadtest --port 8023 --clients 1000
+    python -m labyrinth_game.loadtest --local --clients 2000
+"""
+
+import argparse
+import asyncio
+import math
+import time
+
+from labyrinth_game.constants import PROMPTS
+from labyrinth_game.server import ENCODING, start_server
+
+SCRIPT = (
+    "look",
+    "take torch",
+    "east",
+    "solve",
+    "шаг шаг шаг",
+    "west",
+    "north",
+    "south",
+    "inventory",
+    "help",
+)
+
+PROMPT_LINES = frozenset(prompt.lstrip("\n") for prompt in PROMPTS.values())
+
+
+async def read_response(reader):
+    """Прочитать ответ сервера до строки приглашения.
+
+    Args:
+        reader (asyncio.StreamReader): Поток чтения.
+
+    Returns:
+        bool: True если получено приглашение, False если сервер
+        закрыл соединение (игра окончена).
+    """
+    while True:
+        line = await reader.readline()
+        if not line:
+            return False
+        if line.decode(ENCODING).rstrip("\r\n") in PROMPT_LINES:
+            return True
+
+
+async def run_client(host, port, commands, latencies):
+    """Отправить серверу commands команд из сценария SCRIPT.
+
+    Если игра закончилась раньше, клиент переподключается и
+    продолжает сценарий в новой сессии.
+
+    Args:
+        host (str): Адрес сервера.
+        port (int): Порт сервера.
+        commands (int): Сколько команд отправить.
+        latencies (list[float]): Сюда добавляются задержки команд.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    await read_response(reader)
+
+    for index in range(commands):
+        command = SCRIPT[index % len(SCRIPT)]
+        started = time.perf_counter()
+        writer.write(f"{command}\n".encode(ENCODING))
+        alive = await read_response(reader)
+        latencies.append(time.perf_counter() - started)
+
+        if not alive:
+            writer.close()
+            await writer.wait_closed()
+            reader, writer = await asyncio.open_connection(host, port)
+            await read_response(reader)
+
+    writer.write(b"quit\n")
+    await reader.read()
+    writer.close()
+
+
+def percentile(sorted_values, fraction):
+    """Вернуть перцентиль отсортированного списка (метод ближайшего ранга)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(fraction * len(sorted_values)) - 1, 0)
+    return sorted_values[rank]
+
+
+async def run_load(host, port, clients, commands, local=False):
+    """Провести нагрузочный тест.
+
+    Args:
+        host (str): Адрес сервера.
+        port (int): Порт сервера.
+        clients (int): Число одновременных подключений.
+        commands (int): Команд на одно подключение.
+        local (bool): Поднять сервер в этом же процессе на свободном порту.
+
+    Returns:
+        dict: Итоги: commands, seconds, commands_per_second, p50_ms, p99_ms.
+    """
+    server = None
+    if local:
+        server = await start_server(host, 0)
+        port = server.sockets[0].getsockname()[1]
+
+    latencies = []
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(
+            *(run_client(host, port, commands, latencies) for _ in range(clients))
+        )
+    finally:
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "commands": len(latencies),
+        "seconds": elapsed,
+        "commands_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+def main(argv=None):
+    """Запустить нагрузочный тест из командной строки и вывести итоги."""
+    parser = argparse.ArgumentParser(description="Нагрузочный тест сервера")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8023)
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--commands", type=int, default=50)
+    parser.add_argument(
+        "--local", action="store_true", help="поднять сервер в этом же процессе"
+    )
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(
+        run_load(args.host, args.port, args.clients, args.commands, args.local)
+    )
+    print(f"Команд:          {result['commands']}")
+    print(f"Время:           {result['seconds']:.2f} с")
+    print(f"Команд в секунду: {result['commands_per_second']:.0f}")
+    print(f"p50:             {result['p50_ms']:.2f} мс")
+    print(f"p99:             {result['p99_ms']:.2f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,19 +6,239 @@
 для обработки пользовательских команд.
 """
 
-from labyrinth_game.player_actions import get_input
-from labyrinth_game.utils import describe_current_room
+import os
+import sys
+from types import SimpleNamespace
+
+from labyrinth_game.commands import COMMAND_TRIE, PROMPT_HANDLERS, dispatch
+from labyrinth_game.constants import PROMPTS
+from labyrinth_game.history import HISTORY_COMMANDS, History, begin_turn, end_turn
+from labyrinth_game.output import BufferedSink, make_renderer
+from labyrinth_game.player_actions import get_input, read_commands
+from labyrinth_game.rng import make_rng
+from labyrinth_game.state import GameState
+from labyrinth_game.utils import describe_current_room, emit
+from labyrinth_game.world import DEFAULT_TEMPLATE, World
+
+EXIT_CODES = {"win": 0, "death": 1, "quit": 3}
+
+SCRIPT_FLUSH_PARTS = 512
+
+OPTIONS = (
+    (
+        "--serve",
+        {
+            "metavar": "PORT",
+            "type": int,
+            "help": "запустить TCP-сервер на указанном порту вместо консольной игры",
+        },
+    ),
+    (
+        "--workers",
+        {
+            "metavar": "N",
+            "type": int,
+            "default": 1,
+            "help": "сервер: обслуживать клиентов N процессами с миром в общей "
+            "памяти (без журналов и метрик)",
+        },
+    ),
+    (
+        "--host",
+        {
+            "default": "127.0.0.1",
+            "help": "адрес сервера (по умолчанию 127.0.0.1)",
+        },
+    ),
+    (
+        "--seed",
+        {
+            "type": int,
+            "help": "зерно случайных событий (по умолчанию - прежний синус-хэш)",
+        },
+    ),
+    (
+        "--world",
+        {
+            "metavar": "PATH",
+            "help": "загрузить мир из файла JSON или TOML (см. labyrinth_game.loader)",
+        },
+    ),
+    (
+        "--generate",
+        {
+            "metavar": "SIZE",
+            "type": int,
+            "help": "играть в процедурном лабиринте SIZE x SIZE комнат "
+            "(карта строится из --seed, по умолчанию 0)",
+        },
+    ),
+    (
+        "--script",
+        {
+            "metavar": "FILE",
+            "help": "пакетный режим: читать команды из файла (- - из stdin) "
+            "без приглашений; код выхода - исход игры",
+        },
+    ),
+    (
+        "--interactive",
+        {
+            "action": "store_true",
+            "help": "выводить приглашения, даже если ввод не с терминала",
+        },
+    ),
+    (
+        "--metrics",
+        {
+            "metavar": "FILE",
+            "help": "собирать метрики и записывать их в FILE (формат Prometheus, "
+            ".json - JSON): консольная игра - при выходе, сервер - раз в 10 с",
+        },
+    ),
+    (
+        "--metrics-port",
+        {
+            "metavar": "PORT",
+            "type": int,
+            "help": "сервер: отдавать метрики по HTTP (/metrics, /metrics.json)",
+        },
+    ),
+    (
+        "--profile",
+        {
+            "metavar": "PATH",
+            "help": "вести cProfile сессии: консольная игра - в файл PATH, "
+            "сервер - в PATH/<сессия>.prof",
+        },
+    ),
+    (
+        "--journal",
+        {
+            "metavar": "DIR",
+            "help": "вести журналы игр в каталоге DIR: консольная игра продолжается "
+            "с места остановки, сервер выдаёт игрокам коды сессий "
+            "(см. labyrinth_game.journal)",
+        },
+    ),
+    (
+        "--session",
+        {
+            "default": "console",
+            "help": "имя сессии в каталоге журналов (по умолчанию console)",
+        },
+    ),
+    (
+        "--sync-interval",
+        {
+            "metavar": "SECONDS",
+            "type": float,
+            "default": 1.0,
+            "help": "как часто записывать журнал на диск (по умолчанию 1 с)",
+        },
+    ),
+    (
+        "--snapshot-every",
+        {
+            "metavar": "N",
+            "type": int,
+            "default": 100,
+            "help": "сохранять снимок состояния каждые N команд (по умолчанию 100)",
+        },
+    ),
+)
+
+
+def new_game_state(world=None, renderer=None, seed=None, history=True):
+    """Создать состояние новой игровой сессии.
+
+    Каждая сессия получает собственный мир поверх общих данных комнат,
+    поэтому в одном процессе можно вести сколько угодно игр.
+
+    Args:
+        world (World | None): Мир сессии. По умолчанию создаётся новый.
+        renderer (callable | None): Отрисовщик событий
+            renderer(game_state, event). None - события только
+            накапливаются в game_state.events (headless-режим).
+        seed (int | None): Зерно генератора случайных событий сессии.
+            None - прежний синус-хэш от числа шагов (см. rng.make_rng()).
+        history (bool): Запоминать ходы для undo/redo (см. history).
+
+    Returns:
+        GameState: Состояние игры.
+    """
+    game_state = GameState(
+        world if world is not None else World(), make_rng(seed), renderer
+    )
+    if history:
+        game_state.history = History()
+    return game_state
+
+
+def current_prompt(game_state):
+    """Вернуть приглашение для следующей строки ввода.
+
+    Если сессия ждёт ответа на вопрос (загадка, код от сундука),
+    возвращается приглашение этого вопроса, иначе обычное "> ".
+
+    Args:
+        game_state (GameState): Состояние игры.
+
+    Returns:
+        str: Строка приглашения.
+    """
+    return PROMPTS[game_state.pending_prompt or "command"]
+
+
+def show_welcome(game_state):
+    """Вывести приветствие и описание стартовой комнаты.
+
+    Args:
+        game_state (GameState): Состояние игры.
+
+    Side Effects:
+        - Порождает события "welcome" и "room"
+    """
+    emit(game_state, "welcome")
+    describe_current_room(game_state)
+
+
+def is_history_command(command):
+    """Является ли строка командой undo или redo.
+
+    Команда разрешается так же, как в commands.dispatch(): годится
+    и однозначное сокращение (un, red).
+
+    Args:
+        command (str): Строка, введённая пользователем.
+
+    Returns:
+        bool: True для undo и redo.
+    """
+    parts = command.split()
+    if len(parts) != 1:
+        return False
+    name, _ = COMMAND_TRIE.resolve(parts[0].lower())
+    return name in HISTORY_COMMANDS
 
 
 def process_command(game_state, command):
     """Обработать команду пользователя.
 
-    Парсит введённую команду и выполняет соответствующее действие.
-    Поддерживает как полные команды (go north), так и сокращённые
-    (north), а также комбинированные действия (solve в treasure_room).
+    Парсит введённую команду и выполняет соответствующее действие
+    (см. commands.dispatch()). Поддерживает как полные команды
+    (go north), так и сокращённые (north, n, ta torch), а также
+    комбинированные действия (solve в treasure_room).
+    Если сессия ждёт ответа на вопрос (см. current_prompt()), строка
+    передаётся обработчику этого вопроса, а не разбирается как команда.
+    Команды undo и redo (и их сокращения) работают и во время
+    вопроса. Если у сессии есть история, изменения команды
+    запоминаются для отмены, если есть проба (см. metrics) - команда
+    выполняется через неё.
+    События команды остаются в game_state.events до следующего вызова.
 
     Args:
-        game_state (dict): Словарь состояния игры.
+        game_state (GameState): Состояние игры.
         command (str): Команда, введённая пользователем.
 
     Returns:
@@ -32,98 +252,278 @@ def process_command(game_state, command):
         - take <item>: взять предмет
         - use <item>: использовать предмет
         - solve: решить загадку или открыть сундук
+        - undo/redo: отменить ход или вернуть отменённый
         - help: показать справку
         - quit/exit: выйти из игры
+        - любой однозначный префикс команды или аргумента
     """
-    from labyrinth_game.player_actions import (
-        move_player,
-        show_inventory,
-        take_item,
-        use_item,
-    )
-    from labyrinth_game.utils import (
-        attempt_open_treasure,
-        describe_current_room,
-        show_help,
-        solve_puzzle,
+    if game_state.probe is not None:
+        return game_state.probe(game_state, command)
+
+    game_state.events.clear()
+    game_state.commands_issued += 1
+
+    history = game_state.history
+    if history is not None:
+        begin_turn(game_state)
+
+    pending = game_state.pending_prompt
+    if pending is not None and not is_history_command(command):
+        game_state.pending_prompt = None
+        proceed = PROMPT_HANDLERS[pending](game_state, command) is not False
+    else:
+        proceed = dispatch(game_state, command)
+
+    if history is not None:
+        end_turn(game_state)
+    return proceed
+
+
+def parse_args(argv=None):
+    """Разобрать аргументы командной строки (см. OPTIONS).
+
+    Без аргументов разбор не нужен: значения по умолчанию берутся прямо
+    из OPTIONS, и обычный запуск игры не тратит время на импорт
+    argparse и построение разборщика.
+
+    Args:
+        argv (list[str] | None): Аргументы. По умолчанию sys.argv[1:].
+
+    Returns:
+        argparse.Namespace | types.SimpleNamespace: Разобранные аргументы.
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+    if not argv:
+        defaults = {}
+        for flag, options in OPTIONS:
+            default = False if options.get("action") == "store_true" else None
+            defaults[flag[2:].replace("-", "_")] = options.get("default", default)
+        return SimpleNamespace(**defaults)
+
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="project", description="Лабиринт сокровищ"
     )
+    for flag, options in OPTIONS:
+        parser.add_argument(flag, **options)
+    return parser.parse_args(argv)
 
-    parts = command.strip().split(maxsplit=1)
-    if not parts:
-        return True
 
-    cmd = parts[0].lower()
-    arg = parts[1].lower() if len(parts) > 1 else None
+def world_label(args):
+    """Описать мир из аргументов для заголовка журнала сессии."""
+    if args.world is not None:
+        return f"world:{args.world}"
+    if args.generate is not None:
+        return f"generate:{args.generate}:{args.seed or 0}"
+    return "builtin"
 
-    directions = ["north", "south", "east", "west"]
 
-    match cmd:
-        case "look":
-            describe_current_room(game_state)
-        case "inventory":
-            show_inventory(game_state)
-        case "go":
-            if not arg:
-                print("Укажите направление (north/south/east/west).")
-            else:
-                move_player(game_state, arg)
-        case "take":
-            if not arg:
-                print("Укажите предмет для поднятия.")
-            else:
-                take_item(game_state, arg)
-        case "use":
-            if not arg:
-                print("Укажите предмет для использования.")
-            else:
-                use_item(game_state, arg)
-        case "solve":
-            if game_state["current_room"] == "treasure_room":
-                if attempt_open_treasure(game_state):
-                    return False
-            else:
-                solve_puzzle(game_state)
-        case "help":
-            show_help()
-        case "quit" | "exit":
-            return False
-        case cmd if cmd in directions:
-            move_player(game_state, cmd)
-        case _:
-            print(f"Неизвестная команда: {cmd}. Введите 'help' для справки.")
+def load_template(args):
+    """Загрузить шаблон мира, заданный --world или --generate.
+
+    Args:
+        args (argparse.Namespace): Разобранные аргументы.
+
+    Returns:
+        WorldTemplate | ProceduralTemplate: Шаблон мира (по умолчанию
+        встроенный).
+
+    Side Effects:
+        - Если мир не загружается, выводит ошибку и завершает процесс
+          с кодом 2
+    """
+    if args.world is not None:
+        from labyrinth_game.loader import WorldDataError, load_world
+
+        try:
+            return load_world(args.world)
+        except (OSError, WorldDataError) as error:
+            print(f"Не удалось загрузить мир: {error}", file=sys.stderr)
+            sys.exit(2)
+    if args.generate is not None:
+        from labyrinth_game.procedural import ProceduralTemplate
+
+        return ProceduralTemplate(args.seed or 0, args.generate)
+    return DEFAULT_TEMPLATE
+
+
+def open_script(args):
+    """Открыть сценарий пакетного режима.
+
+    Пакетный режим включается флагом --script или вводом не с терминала
+    (канал, перенаправленный файл), если не задан --interactive.
+
+    Args:
+        args (argparse.Namespace): Разобранные аргументы.
 
-    return True
+    Returns:
+        TextIO | None: Поток команд или None для интерактивной игры.
+    """
+    if args.script is not None and args.script != "-":
+        return open(args.script, encoding="utf-8")
+    if args.script == "-" or not (args.interactive or sys.stdin.isatty()):
+        return sys.stdin
+    return None
+
+
+def exit_code(game_state):
+    """Вернуть код выхода пакетного режима по исходу игры.
+
+    Returns:
+        int: 0 - победа, 1 - смерть, 3 - выход (quit или конец сценария).
+    """
+    return EXIT_CODES.get(game_state.outcome, EXIT_CODES["quit"])
 
 
-def main():
+def main(argv=None):
     """Запустить игру и управлять основным игровым циклом.
 
     Инициализирует состояние игры, выводит приветствие, описание
     стартовой комнаты и запускает цикл обработки команд до конца игры.
+    С флагом --serve вместо этого запускает многопользовательский сервер.
+    В пакетном режиме (см. open_script()) команды читаются из сценария
+    без приглашений, вывод идёт в stdout потоком.
+
+    Args:
+        argv (list[str] | None): Аргументы командной строки.
+
+    Returns:
+        int | None: Код выхода пакетного режима (см. exit_code()),
+        None для интерактивной игры и сервера.
 
     Side Effects:
         - Выводит приветствие и описание в консоль
         - Интерактивно получает ввод пользователя в цикле
-        - Завершается при вводе quit/exit или наступлении game_over
+        - Завершается при вводе quit/exit, конце ввода или наступлении
+          game_over
     """
-    game_state = {
-        "player_inventory": [],
-        "current_room": "entrance",
-        "game_over": False,
-        "steps_taken": 0,
-    }
+    args = parse_args(argv)
+    if args.serve is not None:
+        from labyrinth_game.server import run_server
 
-    print("\n🎮 Добро пожаловать в Лабиринт сокровищ!")
-    print("Введите 'help' для справки.\n")
+        measured = args.metrics or args.metrics_port is not None or args.profile
+        if args.workers > 1 and (args.journal is not None or measured):
+            print("--workers не совместим с --journal, --metrics, --metrics-port "
+                  "и --profile", file=sys.stderr)
+            sys.exit(2)
 
-    describe_current_room(game_state)
+        journals = None
+        if args.journal is not None:
+            from labyrinth_game.journal import JournalStore
 
-    while not game_state["game_over"]:
-        command_line = get_input("\n> ")
-        result = process_command(game_state, command_line)
-        if result is False:
-            game_state["game_over"] = True
+            journals = JournalStore(
+                args.journal, args.snapshot_every, args.sync_interval
+            )
+        monitor = None
+        if measured:
+            from labyrinth_game.metrics import Monitor
+
+            monitor = Monitor(profile_dir=args.profile)
+        run_server(
+            args.host,
+            args.serve,
+            journals=journals,
+            monitor=monitor,
+            metrics_path=args.metrics,
+            metrics_port=args.metrics_port,
+            template=load_template(args),
+            label=world_label(args),
+            workers=args.workers,
+        )
+        return
+
+    try:
+        script = open_script(args)
+    except OSError as error:
+        print(f"Не удалось открыть сценарий: {error}", file=sys.stderr)
+        sys.exit(2)
+
+    world = World(load_template(args))
+
+    sink = BufferedSink(sys.stdout)
+    renderer = make_renderer(sink)
+    game_state = store = journal = None
+    if args.journal is not None:
+        from labyrinth_game.journal import JournalError, JournalStore
+
+        store = JournalStore(args.journal, args.snapshot_every, args.sync_interval)
+        if store.exists(args.session):
+            try:
+                game_state, journal = store.resume(
+                    args.session, world.template, world_label(args), renderer
+                )
+            except (OSError, JournalError) as error:
+                print(f"Не удалось восстановить игру: {error}", file=sys.stderr)
+                sys.exit(2)
+            if game_state.game_over:
+                emit(game_state, "resume_finished", args.session)
+            else:
+                emit(game_state, "resumed", journal.commands)
+                describe_current_room(game_state)
+        else:
+            journal = store.create(args.session, args.seed, world_label(args))
+
+    if game_state is None:
+        game_state = new_game_state(world=world, renderer=renderer, seed=args.seed)
+        show_welcome(game_state)
+
+    measured = args.metrics is not None or args.profile is not None
+    if measured:
+        from labyrinth_game import metrics
+
+        metrics.instrument()
+        metrics.attach(
+            game_state, profile=args.profile is not None, process=process_command
+        )
+
+    commands = read_commands(script) if script is not None else None
+    try:
+        sink.flush()
+        while not game_state.game_over:
+            if commands is None:
+                command_line = get_input(current_prompt(game_state))
+            else:
+                command_line = next(commands, None)
+            if command_line is None:
+                # Конец ввода (Ctrl+D, Ctrl+C, конец сценария) завершает
+                # сессию сам, а не командой quit: открытый вопрос принял бы
+                # её за ответ.
+                game_state.game_over = True
+                game_state.outcome = "quit"
+                break
+            result = process_command(game_state, command_line)
+            # В пакетном режиме вывод выгружается порциями, а не после
+            # каждой команды: приглашения нет, и ждать его некому.
+            if commands is None or len(sink.parts) >= SCRIPT_FLUSH_PARTS:
+                sink.flush()
+            if result is False:
+                game_state.game_over = True
+            # Выход (quit) в журнал не пишется: сессию можно будет
+            # продолжить.
+            if journal is not None and game_state.outcome != "quit":
+                store.record(journal, game_state, command_line)
+                store.maybe_flush()
+        sink.flush()
+    except BrokenPipeError:
+        # Читатель вывода закрыл канал (например, head): доигрывать
+        # незачем, а вывод при выходе из интерпретатора уйдёт в никуда.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        game_state.outcome = game_state.outcome or "quit"
+    finally:
+        if script is not None and script is not sys.stdin:
+            script.close()
+        if store is not None:
+            store.close()
+        if measured:
+            metrics.detach(game_state, args.profile)
+            if args.metrics is not None:
+                metrics.write_metrics(args.metrics)
+    if commands is not None:
+        return exit_code(game_state)
+    return None
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
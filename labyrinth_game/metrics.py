@@ -0,0 +1,493 @@
+# labyrinth_game/metrics.py
+"""Метрики игрового процесса: задержки, счётчики, сессии.
+
+- гистограммы задержек: команд по видам (go, look, take, use, solve,
+  answer - ответы на вопросы, ...) и функций, которые команды вызывают
+  (move_player, take_item, use_item, solve_puzzle,
+  attempt_open_treasure, random_event);
+- счётчики: ходы, сработавшие ловушки, потерянные предметы, решённые
+  и нерешённые загадки, победы, смерти, начатые сессии;
+- показатели сессий: сколько сессий сейчас идёт и сколько
+  из них профилируется.
+
+Команду сессии измеряет проба (Probe), которую сессия держит в
+GameState.probe. Без пробы process_command() платит за метрики одной
+проверкой. Функции команд оборачиваются таймерами только при включении
+метрик (instrument()), поэтому без них обёрток нет вовсе. Счётчики
+берутся из событий команды, а не из кода игры.
+
+Метрики выгружаются в текстовом формате Prometheus или в JSON: в файл
+(write_metrics()) или по HTTP (serve_metrics()). Проба может вести
+cProfile своей сессии (start_profile() / stop_profile()).
+"""
+
+import asyncio
+import contextlib
+import cProfile
+import functools
+import json
+import os
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+from labyrinth_game.commands import COMMAND_TRIE
+from labyrinth_game.constants import DIRECTIONS
+
+LATENCY_BUCKETS = (
+    1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 1e-2, 0.1, 1.0,
+)
+
+TIMED_FUNCTIONS = (
+    "move_player",
+    "take_item",
+    "use_item",
+    "solve_puzzle",
+    "attempt_open_treasure",
+    "random_event",
+)
+
+EVENT_COUNTERS = {
+    "trap_activated": "traps_triggered",
+    "item_lost": "items_lost",
+    "puzzle_solved": "puzzles_solved",
+    "wrong_answer": "puzzles_failed",
+    "wrong_code": "puzzles_failed",
+    "win": "wins",
+    "death": "deaths",
+}
+
+COUNTERS = {
+    "moves": "Перемещения игроков.",
+    "traps_triggered": "Сработавшие ловушки.",
+    "items_lost": "Предметы, потерянные в ловушках.",
+    "puzzles_solved": "Решённые загадки.",
+    "puzzles_failed": "Неверные ответы на загадки и коды.",
+    "wins": "Победы.",
+    "deaths": "Смерти.",
+    "sessions_started": "Начатые сессии.",
+}
+
+GAUGES = {
+    "sessions_active": "Идущие сессии.",
+    "sessions_profiled": "Сессии под cProfile.",
+}
+
+PREFIX = "labyrinth_"
+
+PROMETHEUS_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+EXPORT_INTERVAL = 10.0
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин.
+
+    Attributes:
+        bounds (tuple[float]): Верхние границы корзин по возрастанию.
+        counts (list[int]): Наблюдений в каждой корзине (последняя -
+            выше всех границ).
+        total (float): Сумма наблюдений.
+        count (int): Число наблюдений.
+    """
+
+    __slots__ = ("bounds", "counts", "total", "count")
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        """Учесть наблюдение."""
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def cumulative(self):
+        """Перебрать пары (граница, наблюдений не больше неё), как в Prometheus."""
+        seen = 0
+        for bound, count in zip((*self.bounds, float("inf")), self.counts):
+            seen += count
+            yield bound, seen
+
+
+class Metrics:
+    """Метрики процесса.
+
+    Attributes:
+        commands (dict): Вид команды -> Histogram задержек в секундах.
+        functions (dict): Имя функции -> Histogram задержек в секундах.
+        counters (dict): Имя счётчика (см. COUNTERS) -> значение.
+        gauges (dict): Имя показателя (см. GAUGES) -> значение.
+    """
+
+    __slots__ = ("commands", "functions", "counters", "gauges")
+
+    def __init__(self):
+        self.commands = {}
+        self.functions = {}
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.gauges = dict.fromkeys(GAUGES, 0)
+
+    def command(self, kind):
+        """Вернуть гистограмму вида команды, создав её при первом обращении."""
+        histogram = self.commands.get(kind)
+        if histogram is None:
+            histogram = self.commands[kind] = Histogram()
+        return histogram
+
+    def function(self, name):
+        """Вернуть гистограмму функции, создав её при первом обращении."""
+        histogram = self.functions.get(name)
+        if histogram is None:
+            histogram = self.functions[name] = Histogram()
+        return histogram
+
+
+METRICS = Metrics()
+
+
+def command_kind(game_state, line):
+    """Вернуть вид команды для метрик.
+
+    Args:
+        game_state (GameState): Состояние до команды.
+        line (str): Введённая строка.
+
+    Returns:
+        str: Имя команды ("go" для направлений), "answer" для ответа
+        на вопрос или "unknown".
+    """
+    if game_state.pending_prompt is not None:
+        return "answer"
+    parts = line.split(maxsplit=1)
+    name, _ = COMMAND_TRIE.resolve(parts[0].lower() if parts else "")
+    if name in DIRECTIONS:
+        return "go"
+    return name or "unknown"
+
+
+class Probe:
+    """Измеритель команд одной сессии (GameState.probe).
+
+    Args:
+        metrics (Metrics): Куда записывать измерения.
+        process (callable | None): process_command(), которым выполнять
+            команды. Игра, запущенная как python -m labyrinth_game.main,
+            передаёт свою функцию: импорт labyrinth_game.main создал бы
+            вторую копию модуля рядом с __main__. По умолчанию -
+            labyrinth_game.main.process_command.
+
+    Attributes:
+        metrics (Metrics): Куда записывать измерения.
+        process (callable): Функция, выполняющая команду.
+        profiler (cProfile.Profile | None): Профилировщик сессии.
+    """
+
+    __slots__ = ("metrics", "process", "profiler")
+
+    def __init__(self, metrics=METRICS, process=None):
+        if process is None:
+            from labyrinth_game.main import process_command as process
+        self.metrics = metrics
+        self.process = process
+        self.profiler = None
+
+    def __call__(self, game_state, command):
+        """Выполнить команду через process и измерить её.
+
+        На время команды проба снимает себя с сессии, чтобы
+        process_command() выполнил команду обычным путём.
+        """
+        metrics = self.metrics
+        process = self.process
+        kind = command_kind(game_state, command)
+        steps = game_state.steps_taken
+        profiler = self.profiler
+        game_state.probe = None
+        started = time.perf_counter()
+        try:
+            if profiler is None:
+                result = process(game_state, command)
+            else:
+                result = profiler.runcall(process, game_state, command)
+        finally:
+            elapsed = time.perf_counter() - started
+            game_state.probe = self
+        metrics.command(kind).observe(elapsed)
+
+        counters = metrics.counters
+        if game_state.steps_taken > steps:
+            counters["moves"] += game_state.steps_taken - steps
+        for event in game_state.events:
+            name = EVENT_COUNTERS.get(event[0])
+            if name is not None:
+                counters[name] += 1
+        return result
+
+
+def _timed(function, histogram):
+    clock = time.perf_counter
+
+    @functools.wraps(function)
+    def timed(*args, **kwargs):
+        started = clock()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            histogram.observe(clock() - started)
+
+    timed.original = function
+    return timed
+
+
+def instrument(metrics=METRICS):
+    """Обернуть функции TIMED_FUNCTIONS таймерами (один раз на процесс).
+
+    Обёртка подменяет функцию везде, где на неё ссылаются модули игры
+    и таблица команд, поэтому без instrument() функции вызываются
+    напрямую, без накладных расходов.
+    """
+    from labyrinth_game import commands, player_actions, utils
+
+    modules = (commands, player_actions, utils)
+    for name in TIMED_FUNCTIONS:
+        original = getattr(player_actions, name, None) or getattr(utils, name)
+        if hasattr(original, "original"):
+            continue
+        timed = _timed(original, metrics.function(name))
+        for module in modules:
+            for attribute, value in list(vars(module).items()):
+                if value is original:
+                    setattr(module, attribute, timed)
+        for command in commands.REGISTRY.values():
+            if command.handler is original:
+                command.handler = timed
+
+
+def attach(game_state, metrics=METRICS, profile=False, process=None):
+    """Начать измерять сессию.
+
+    Args:
+        game_state (GameState): Состояние игры.
+        metrics (Metrics): Метрики процесса.
+        profile (bool): Сразу включить cProfile сессии.
+        process (callable | None): process_command() для пробы
+            (см. Probe).
+
+    Side Effects:
+        - Устанавливает game_state.probe, обновляет показатели сессий
+    """
+    game_state.probe = Probe(metrics, process)
+    metrics.counters["sessions_started"] += 1
+    metrics.gauges["sessions_active"] += 1
+    if profile:
+        start_profile(game_state)
+
+
+def detach(game_state, profile_path=None):
+    """Закончить измерять сессию.
+
+    Args:
+        game_state (GameState): Состояние игры.
+        profile_path (str | Path | None): Куда сохранить профиль сессии,
+            если он вёлся.
+    """
+    probe = game_state.probe
+    if probe is None:
+        return
+    if probe.profiler is not None:
+        stop_profile(game_state, profile_path)
+    probe.metrics.gauges["sessions_active"] -= 1
+    game_state.probe = None
+
+
+def start_profile(game_state):
+    """Включить cProfile для команд сессии (с пробой, если её не было)."""
+    if game_state.probe is None:
+        game_state.probe = Probe()
+    probe = game_state.probe
+    if probe.profiler is None:
+        probe.profiler = cProfile.Profile()
+        probe.metrics.gauges["sessions_profiled"] += 1
+
+
+def stop_profile(game_state, path=None):
+    """Выключить cProfile сессии и сохранить статистику.
+
+    Args:
+        game_state (GameState): Состояние игры.
+        path (str | Path | None): Файл для pstats; None - не сохранять.
+
+    Returns:
+        cProfile.Profile | None: Профиль сессии.
+    """
+    probe = game_state.probe
+    if probe is None or probe.profiler is None:
+        return None
+    profiler = probe.profiler
+    probe.profiler = None
+    probe.metrics.gauges["sessions_profiled"] -= 1
+    if path is not None:
+        profiler.dump_stats(path)
+    return profiler
+
+
+class Monitor:
+    """Измерение сессий сервера.
+
+    Attributes:
+        metrics (Metrics): Метрики процесса.
+        profile_dir (Path | None): Каталог профилей сессий
+            (<сессия>.prof); None - сессии не профилируются.
+    """
+
+    __slots__ = ("metrics", "profile_dir")
+
+    def __init__(self, metrics=METRICS, profile_dir=None):
+        self.metrics = metrics
+        self.profile_dir = Path(profile_dir) if profile_dir is not None else None
+        instrument(metrics)
+        if self.profile_dir is not None:
+            self.profile_dir.mkdir(parents=True, exist_ok=True)
+
+    def attach(self, game_state):
+        """Начать измерять сессию (см. attach())."""
+        attach(game_state, self.metrics, profile=self.profile_dir is not None)
+
+    def detach(self, game_state, session_id):
+        """Закончить измерять сессию и сохранить её профиль."""
+        path = None
+        if self.profile_dir is not None:
+            path = self.profile_dir / f"{session_id}.prof"
+        detach(game_state, path)
+
+
+def _histogram_lines(name, label, histograms, help_text):
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for key, histogram in sorted(histograms.items()):
+        for bound, count in histogram.cumulative():
+            le = "+Inf" if bound == float("inf") else f"{bound:g}"
+            lines.append(f'{name}_bucket{{{label}="{key}",le="{le}"}} {count}')
+        lines.append(f'{name}_sum{{{label}="{key}"}} {histogram.total:.9f}')
+        lines.append(f'{name}_count{{{label}="{key}"}} {histogram.count}')
+    return lines
+
+
+def prometheus_text(metrics=METRICS):
+    """Вернуть метрики в текстовом формате Prometheus."""
+    lines = _histogram_lines(
+        f"{PREFIX}command_seconds", "command", metrics.commands,
+        "Время обработки команды по видам.",
+    )
+    lines += _histogram_lines(
+        f"{PREFIX}function_seconds", "function", metrics.functions,
+        "Время функций игровой логики.",
+    )
+    for counter, help_text in COUNTERS.items():
+        name = f"{PREFIX}{counter}_total"
+        lines += [
+            f"# HELP {name} {help_text}",
+            f"# TYPE {name} counter",
+            f"{name} {metrics.counters[counter]}",
+        ]
+    for gauge, help_text in GAUGES.items():
+        name = f"{PREFIX}{gauge}"
+        lines += [
+            f"# HELP {name} {help_text}",
+            f"# TYPE {name} gauge",
+            f"{name} {metrics.gauges[gauge]}",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def json_dump(metrics=METRICS):
+    """Вернуть метрики в виде данных для JSON."""
+
+    def histograms(group):
+        return {
+            key: {
+                "count": histogram.count,
+                "sum": histogram.total,
+                "buckets": {
+                    "+Inf" if bound == float("inf") else f"{bound:g}": count
+                    for bound, count in histogram.cumulative()
+                },
+            }
+            for key, histogram in sorted(group.items())
+        }
+
+    return {
+        "commands": histograms(metrics.commands),
+        "functions": histograms(metrics.functions),
+        "counters": dict(metrics.counters),
+        "gauges": dict(metrics.gauges),
+    }
+
+
+def write_metrics(path, metrics=METRICS):
+    """Записать метрики в файл: .json - JSON, иначе формат Prometheus.
+
+    Файл заменяется атомарно, поэтому сборщик (например, textfile
+    collector node_exporter) не прочитает его наполовину записанным.
+
+    Side Effects:
+        - Записывает файл path
+    """
+    path = Path(path)
+    if path.suffix == ".json":
+        text = json.dumps(json_dump(metrics), ensure_ascii=False, indent=2) + "\n"
+    else:
+        text = prometheus_text(metrics)
+    temporary = path.with_name(path.name + ".tmp")
+    temporary.write_text(text, encoding="utf-8")
+    os.replace(temporary, path)
+
+
+async def export_metrics(path, interval=EXPORT_INTERVAL, metrics=METRICS):
+    """Записывать метрики в файл раз в interval секунд."""
+    while True:
+        await asyncio.sleep(interval)
+        write_metrics(path, metrics)
+
+
+async def serve_metrics(host="127.0.0.1", port=0, metrics=METRICS):
+    """Запустить HTTP-точку метрик в текущем цикле событий.
+
+    GET /metrics отдаёт формат Prometheus, GET /metrics.json - JSON.
+
+    Returns:
+        asyncio.Server: Запущенный сервер.
+    """
+
+    async def respond(reader, writer):
+        try:
+            request = await reader.readline()
+            while (await reader.readline()).strip():
+                pass
+            parts = request.decode("latin-1").split()
+            path = parts[1] if len(parts) > 1 else ""
+            if path == "/metrics":
+                status, kind, body = "200 OK", PROMETHEUS_TYPE, prometheus_text(metrics)
+            elif path == "/metrics.json":
+                status, kind = "200 OK", "application/json; charset=utf-8"
+                body = json.dumps(json_dump(metrics), ensure_ascii=False)
+            else:
+                status, kind, body = "404 Not Found", "text/plain", "not found\n"
+            payload = body.encode("utf-8")
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {kind}\r\n"
+                f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n"
+                .encode("latin-1") + payload
+            )
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    return await asyncio.start_server(respond, host, port)
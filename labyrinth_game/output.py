@@ -0,0 +1,116 @@
+# labyrinth_game/output.py
+"""Приёмники вывода игровой сессии.
+
+Отрисовщик сессии (см. make_renderer()) не печатает тексты событий
+сразу, а складывает их в приёмник. Приёмник копит вывод одной команды
+и отдаёт его одной записью, когда цикл игры вызывает flush(): одна
+команда - одна запись в поток (и один системный вызов при выводе
+в канал или сокет) вместо print() на каждое событие.
+
+- BufferedSink - буфер команды, выгружаемый в поток или забираемый
+  строкой (take()) для отправки по сети;
+- CaptureSink - накапливает вывод всей сессии, по командам, для тестов
+  и сравнения вывода;
+- NullSink - headless-режим: события даже не превращаются в текст.
+"""
+
+from labyrinth_game.render import render_event
+
+
+class BufferedSink:
+    """Буфер вывода одной команды.
+
+    Поток не сбрасывается (flush()) при каждой выгрузке: это делает
+    input() перед чтением следующей строки, так что вывод команды
+    и приглашение уходят одной записью.
+
+    Attributes:
+        stream (TextIO | None): Поток для выгрузки буфера.
+        parts (list[str]): Накопленные фрагменты текста.
+    """
+
+    __slots__ = ("stream", "parts")
+
+    def __init__(self, stream=None):
+        self.stream = stream
+        self.parts = []
+
+    def write(self, text):
+        """Добавить текст в буфер."""
+        self.parts.append(text)
+
+    def take(self):
+        """Вернуть накопленный текст и очистить буфер."""
+        text = "".join(self.parts)
+        self.parts.clear()
+        return text
+
+    def flush(self):
+        """Выгрузить буфер в поток одной записью.
+
+        Side Effects:
+            - Пишет накопленный текст в stream
+        """
+        if self.parts:
+            self.stream.write(self.take())
+
+
+class CaptureSink(BufferedSink):
+    """Приёмник, сохраняющий вывод сессии по командам.
+
+    Attributes:
+        outputs (list[str]): Вывод каждой выгрузки (flush()) по порядку.
+    """
+
+    __slots__ = ("outputs",)
+
+    def __init__(self):
+        super().__init__()
+        self.outputs = []
+
+    def flush(self):
+        """Сохранить вывод текущей команды в outputs."""
+        self.outputs.append(self.take())
+
+    def getvalue(self):
+        """Вернуть весь вывод сессии, включая ещё не выгруженный."""
+        return "".join(self.outputs) + "".join(self.parts)
+
+
+class NullSink:
+    """Приёмник, отбрасывающий вывод (headless-режим)."""
+
+    __slots__ = ()
+
+    def write(self, text):
+        """Ничего не делать."""
+
+    def flush(self):
+        """Ничего не делать."""
+
+
+NULL_SINK = NullSink()
+
+
+def make_renderer(sink):
+    """Создать отрисовщик сессии, пишущий тексты событий в приёмник.
+
+    Args:
+        sink (BufferedSink | CaptureSink | NullSink): Приёмник вывода.
+
+    Returns:
+        callable | None: Отрисовщик renderer(game_state, event);
+        None для NullSink - тогда события не форматируются вовсе.
+    """
+    if isinstance(sink, NullSink):
+        return None
+
+    write = sink.write
+
+    def renderer(game_state, event):
+        text = render_event(game_state, event)
+        if text is not None:
+            write(text)
+            write("\n")
+
+    return renderer
@@ -5,6 +5,10 @@
 использования предметов и получения пользовательского ввода.
 """
 
+from labyrinth_game.constants import STACKABLE_ITEMS
+from labyrinth_game.graph import DIRECTION_IDS, NO_EXIT
+from labyrinth_game.utils import describe_current_room, emit, random_event
+
 
 def get_input(prompt="> "):
     """Получить ввод от пользователя с обработкой ошибок.
@@ -16,7 +20,8 @@ def get_input(prompt="> "):
         prompt (str): Строка приглашения для вывода. По умолчанию "> ".
 
     Returns:
-        str: Введённая строка или "quit" в случае прерывания.
+        str | None: Введённая строка или None в случае прерывания
+        и конца ввода.
 
     Side Effects:
         - Выводит приглашение в консоль
@@ -26,107 +31,148 @@ def get_input(prompt="> "):
         return input(prompt)
     except (KeyboardInterrupt, EOFError):
         print("\nВыход из игры.")
-        return "quit"
+        return None
+
+
+def read_commands(stream):
+    """Перебрать команды из потока без приглашений (пакетный режим).
+
+    Строки читаются из буферизованного потока по мере игры, поэтому
+    файл любого размера проходит в ограниченной памяти. Ответы
+    на вопросы (загадки, "да/нет" и код сундука) берутся из того же
+    потока следующими строками.
+
+    Args:
+        stream (TextIO): Файл или канал со сценарием, по команде в строке.
+
+    Yields:
+        str: Строка без перевода строки.
+    """
+    for line in stream:
+        yield line.rstrip("\n")
 
 
 def show_inventory(game_state):
     """Показать инвентарь игрока.
 
-    Выводит список предметов в инвентаре или сообщение о пустом инвентаре.
+    Отрисовщик выводит список предметов в инвентаре или сообщение
+    о пустом инвентаре.
 
     Args:
-        game_state (dict): Словарь состояния игры с ключом 'player_inventory'.
+        game_state (GameState): Состояние игры.
 
     Side Effects:
-        - Выводит инвентарь в консоль
+        - Порождает событие "inventory"
     """
-    inventory = game_state["player_inventory"]
-    if inventory:
-        items_list = ", ".join(inventory)
-        print(f"\nИнвентарь: {items_list}")
-    else:
-        print("\nИнвентарь пуст.")
+    emit(game_state, "inventory")
 
 
 def move_player(game_state, direction):
     """Переместить игрока в указанном направлении.
 
-    Проверяет наличие выхода в данном направлении и переводит игрока
-    в соседнюю комнату. Перед treasure_room проверяет наличие rusty_key.
-    После перемещения генерирует случайное событие.
+    Выход ищется в таблице переходов графа мира по номерам комнаты
+    и направления (см. graph.WorldGraph); имя комнаты нужно только
+    для проверки двери и событий. Переводит игрока в соседнюю комнату.
+    Перед запертой комнатой (ключ "locked_by", например treasure_room)
+    проверяет наличие нужного предмета. После перемещения генерирует
+    случайное событие.
 
     Args:
-        game_state (dict): Словарь состояния игры.
+        game_state (GameState): Состояние игры.
         direction (str): Направление (north, south, east, west).
 
     Side Effects:
-        - Выводит сообщения об ошибке или успехе
+        - Порождает события с сообщениями об ошибке или успехе
         - Обновляет текущую комнату и счётчик шагов
         - Вызывает describe_current_room()
         - Вызывает random_event()
     """
-    from labyrinth_game.constants import ROOMS
-    from labyrinth_game.utils import (
-        describe_current_room,
-        random_event,
-    )
-
-    current_room_name = game_state["current_room"]
-    room = ROOMS[current_room_name]
+    graph = game_state.world.template.graph
+    direction_id = DIRECTION_IDS.get(direction)
+    if direction_id is None:
+        target = NO_EXIT
+    else:
+        target = graph.neighbor(game_state.room_id, direction_id)
 
-    if direction not in room["exits"]:
-        print("Нельзя пойти в этом направлении.")
+    if target == NO_EXIT:
+        emit(game_state, "no_exit", direction)
         return
 
-    new_room_name = room["exits"][direction]
+    new_room_name = graph.names[target]
 
-    if new_room_name == "treasure_room":
-        if "rusty_key" not in game_state["player_inventory"]:
-            print("Дверь заперта. Нужен ключ, чтобы пройти дальше.")
+    key_item = game_state.world.lock(new_room_name)
+    if key_item is not None:
+        if not game_state.has_item(key_item):
+            emit(game_state, "door_locked")
             return
         else:
-            print(
-                "Вы используете найденный ключ, чтобы открыть путь в комнату сокровищ."
-            )
+            emit(game_state, "door_unlocked")
 
-    game_state["current_room"] = new_room_name
-    game_state["steps_taken"] += 1
+    game_state.room_id = target
+    game_state.steps_taken += 1
+    emit(game_state, "moved", new_room_name)
 
     describe_current_room(game_state)
     random_event(game_state)
 
 
-def take_item(game_state, item_name):
+def take_item(game_state, item_name, count=1):
     """Взять предмет из текущей комнаты.
 
     Добавляет предмет в инвентарь игрока и удаляет его из комнаты.
-    Не позволяет поднять слишком тяжелые предметы (treasure_chest).
+    Складываемые предметы (монеты) можно взять сразу несколько; если
+    в комнате их меньше, чем просили, берутся все. Не позволяет поднять
+    слишком тяжелые предметы (treasure_chest).
 
     Args:
-        game_state (dict): Словарь состояния игры.
+        game_state (GameState): Состояние игры.
         item_name (str): Название предмета.
+        count (int): Сколько экземпляров взять. По умолчанию 1.
 
     Side Effects:
-        - Выводит сообщение об успехе или ошибке
+        - Порождает событие с сообщением об успехе или ошибке
         - Может добавить предмет в инвентарь
         - Может удалить предмет из комнаты
     """
-    from labyrinth_game.constants import ROOMS
+    if item_name == "treasure_chest":
+        emit(game_state, "chest_too_heavy")
+        return
 
-    current_room_name = game_state["current_room"]
-    room = ROOMS[current_room_name]
+    if item_name not in STACKABLE_ITEMS:
+        count = 1
 
-    if item_name == "treasure_chest":
-        print("Вы не можете поднять сундук, он слишком тяжелый.")
+    taken = game_state.world.remove_item(game_state.current_room, item_name, count)
+    if not taken:
+        emit(game_state, "no_such_item", item_name)
         return
 
-    if item_name not in room["items"]:
-        print("Такого предмета здесь нет.")
+    game_state.add_item(item_name, taken)
+    emit(game_state, "taken", item_name, taken)
+
+
+def take_all(game_state):
+    """Взять из текущей комнаты все предметы, которые можно поднять.
+
+    Args:
+        game_state (GameState): Состояние игры.
+
+    Side Effects:
+        - Порождает событие "taken" на каждый поднятый предмет
+          или "nothing_to_take", если брать нечего
+        - Переносит предметы из комнаты в инвентарь
+    """
+    world = game_state.world
+    room_name = game_state.current_room
+    portable = [
+        item_name for item_name in world.items(room_name)
+        if item_name != "treasure_chest"
+    ]
+    if not portable:
+        emit(game_state, "nothing_to_take")
         return
 
-    game_state["player_inventory"].append(item_name)
-    room["items"].remove(item_name)
-    print(f"Вы подняли: {item_name}")
+    for item_name in portable:
+        take_item(game_state, item_name, world.item_count(room_name, item_name))
 
 
 def use_item(game_state, item_name):
@@ -135,31 +181,84 @@ def use_item(game_state, item_name):
     Выполняет уникальное действие для каждого предмета:
         - torch: озаряет комнату
         - sword: вселяет уверенность
-        - bronze_box: открывает шкатулку и выдаёт ключ
+        - bronze_box: открывает шкатулку и выдаёт ключ (один раз
+          за партию, если ключа у игрока нет)
         - other: выводит сообщение о неизвестном использовании
 
     Args:
-        game_state (dict): Словарь состояния игры.
+        game_state (GameState): Состояние игры.
         item_name (str): Название предмета.
 
     Side Effects:
-        - Выводит сообщение о результате
-        - Может добавить предмет в инвентарь (bronze_box)
+        - Порождает события с результатом
+        - Может добавить в инвентарь rusty_key из bronze_box
     """
-    if item_name not in game_state["player_inventory"]:
-        print("У вас нет такого предмета.")
+    if not game_state.has_item(item_name):
+        emit(game_state, "not_in_inventory", item_name)
         return
 
     if item_name == "torch":
-        print("Факел озаряет всё вокруг. Становится светлее!")
+        emit(game_state, "torch_used")
     elif item_name == "sword":
-        print("Вы берёте меч в руку. Чувствуете уверенность и силу!")
+        emit(game_state, "sword_used")
     elif item_name == "bronze_box":
-        print("Вы открываете бронзовую шкатулку...")
-        if "rusty_key" not in game_state["player_inventory"]:
-            game_state["player_inventory"].append("rusty_key")
-            print("Внутри вы находите ржавый ключ!")
+        emit(game_state, "box_opened")
+        if not game_state.has_item("rusty_key") and not game_state.is_spent(
+            "bronze_box"
+        ):
+            # Ключ в шкатулке один: шкатулка остаётся у игрока, но
+            # второй раз ключ не выдаёт.
+            game_state.spend_item("bronze_box")
+            game_state.add_item("rusty_key")
+            emit(game_state, "key_found", "rusty_key")
+        else:
+            emit(game_state, "box_empty")
+    else:
+        emit(game_state, "unknown_use", item_name)
+
+
+def show_hint(game_state, target=None):
+    """Подсказать следующий шаг к победе или дорогу к цели.
+
+    Дорога ищется решателем (см. solver) из текущего состояния сессии:
+    без цели - кратчайшая дорога к победе, показывается её первый шаг;
+    с целью (имя комнаты или предмета) - дорога до неё целиком.
+
+    Args:
+        game_state (GameState): Состояние игры.
+        target (str | None): Имя комнаты или предмета.
+
+    Side Effects:
+        - Порождает событие "hint", "hint_route" или сообщение о том,
+          что цель недостижима или неизвестна
+    """
+    # Решатель нужен только подсказкам: не загружаем его при запуске игры.
+    from labyrinth_game.solver import model_for, route_to, winning_route
+
+    template = game_state.world.template
+    if target is None:
+        model = model_for(template)
+        if model.win_id is None:
+            emit(game_state, "hint_no_treasure")
+            return
+        route = winning_route(model, model.key_of(game_state))
+        if route is None:
+            emit(game_state, "hint_none")
         else:
-            print("Шкатулка пуста.")
+            emit(game_state, "hint", route[0], sum(len(step) for step in route))
+        return
+
+    model = model_for(template, target)
+    try:
+        route = route_to(model, model.key_of(game_state), target)
+    except KeyError:
+        emit(game_state, "hint_unknown", target)
+        return
+    if route is None:
+        emit(game_state, "hint_unreachable", target)
+    elif not route:
+        emit(game_state, "hint_here", target)
     else:
-        print(f"Вы не знаете, как использовать {item_name}.")
+        emit(
+            game_state, "hint_route", target, route, sum(len(step) for step in route)
+        )
@@ -0,0 +1,413 @@
+# labyrinth_game/procedural.py
+"""Процедурный лабиринт произвольного размера.
+
+Карта - решётка width x height клеток-комнат, номер комнаты равен
+y * width + x, имя - "cell_x_y". Ничего из этого не хранится заранее:
+создание шаблона не зависит от размера карты.
+
+Стены лабиринта - чистые функции координат и зерна. Каждая клетка
+прорубает проход на север или на восток (лабиринт "двоичное дерево":
+из любой клетки есть путь в северо-восточный угол), а часть клеток -
+ещё один проход на север, чтобы в лабиринте были циклы. Проход между
+соседями поэтому одинаково виден с обеих сторон, с какого куска карты
+ни начни.
+
+Комнаты (описания, предметы, загадки, выходы) создаются кусками
+CHUNK_SIZE x CHUNK_SIZE клеток при первом обращении и хранятся в LRU:
+когда кусков больше, чем позволяет ограничение памяти, вытесняется
+тот, к которому дольше всего не обращались, то есть тот, где сейчас
+никто не ходит. Кусок строится детерминированно из зерна, поэтому
+вытесненный кусок при следующем обращении восстанавливается в точности.
+Изменения сессий (поднятые предметы, решённые загадки) хранятся
+в оверлее World и от вытеснения не зависят.
+
+ProceduralTemplate подставляется в World вместо WorldTemplate.
+"""
+
+from array import array
+from collections import OrderedDict
+
+from labyrinth_game.answers import compile_answers
+from labyrinth_game.constants import DIRECTIONS
+from labyrinth_game.events import DEFAULT_EVENTS
+from labyrinth_game.graph import DIRECTION_IDS, DIRECTIONS_COUNT, NO_EXIT
+from labyrinth_game.rng import GOLDEN_GAMMA, MASK64, splitmix64
+from labyrinth_game.world import count_items
+
+CHUNK_SIZE = 16
+
+CHUNK_BYTES = 256 * 1024
+
+LOOP_PERCENT = 15
+
+SALT_CARVE = 1
+SALT_LOOP = 2
+SALT_ROOM = 3
+
+NORTH = DIRECTION_IDS["north"]
+SOUTH = DIRECTION_IDS["south"]
+EAST = DIRECTION_IDS["east"]
+WEST = DIRECTION_IDS["west"]
+
+PLACES = (
+    "Узкий коридор",
+    "Сырая галерея",
+    "Круглый зал",
+    "Низкий грот",
+    "Заброшенная кладовая",
+    "Развилка туннелей",
+    "Сводчатая келья",
+    "Обвалившийся проход",
+)
+
+DETAILS = (
+    "Стены покрыты мхом.",
+    "С потолка капает вода.",
+    "Под ногами хрустит щебень.",
+    "В нише тлеет забытая свеча.",
+    "На камнях нацарапаны стрелки.",
+    "Эхо шагов долго не смолкает.",
+    "Пахнет сыростью и золой.",
+    "Пол выложен треснувшей плиткой.",
+)
+
+LOOT = (("coin",), ("coin", "coin"), ("torch",), ("coin", "coin", "coin"))
+
+RIDDLES = (
+    ("На стене выбито: \"Сколько будет трижды три?\"", "9"),
+    ("Голос из темноты: \"Что идёт, не двигаясь с места?\"", "время"),
+    ("На двери надпись: \"Чем больше из неё берёшь, тем больше она становится\"",
+     "яма"),
+)
+
+
+def cell_hash(seed, x, y, salt):
+    """Вернуть 64-битный хэш клетки (x, y) для заданной соли."""
+    value = seed + salt * GOLDEN_GAMMA + x * 0xD1B54A32D192ED03
+    return splitmix64((value + y * 0xABC98388FB8FAC03) & MASK64)
+
+
+class Chunk:
+    """Сгенерированный кусок карты CHUNK_SIZE x CHUNK_SIZE клеток.
+
+    Attributes:
+        exits (array): Таблица выходов куска array('q'), по
+            DIRECTIONS_COUNT ячеек на клетку, в номерах комнат всей карты
+            (64-битных: на больших картах номера не влезают в 'i').
+        rooms (dict): Имя комнаты -> данные в формате ROOMS.
+        items (dict): Имя комнаты -> исходные предметы {предмет: количество}.
+        answers (dict): Имя комнаты -> нормальные формы ответов на загадку.
+        rendered (dict): Имя комнаты -> готовое описание нетронутой комнаты.
+    """
+
+    __slots__ = ("exits", "rooms", "items", "answers", "rendered")
+
+    def __init__(self):
+        cells = CHUNK_SIZE * CHUNK_SIZE
+        self.exits = array("q", [NO_EXIT]) * (cells * DIRECTIONS_COUNT)
+        self.rooms = {}
+        self.items = {}
+        self.answers = {}
+        self.rendered = {}
+
+
+class ChunkField:
+    """Словарь "имя комнаты -> значение" поверх одного поля кусков.
+
+    Нужен, чтобы World и render читали процедурную карту так же,
+    как WorldTemplate: template.rooms[name], template.items[name],
+    template.answers.get(name), template.rendered[name] = text.
+    """
+
+    __slots__ = ("template", "field")
+
+    def __init__(self, template, field):
+        self.template = template
+        self.field = field
+
+    def _values(self, room_name):
+        chunk = self.template.chunk_of(self.template.ids[room_name])
+        return getattr(chunk, self.field)
+
+    def __getitem__(self, room_name):
+        return self._values(room_name)[room_name]
+
+    def __setitem__(self, room_name, value):
+        self._values(room_name)[room_name] = value
+
+    def get(self, room_name, default=None):
+        """Вернуть значение по имени комнаты, как dict.get()."""
+        return self._values(room_name).get(room_name, default)
+
+
+class RoomNames:
+    """Имена комнат по номерам: names[room_id] -> "cell_x_y"."""
+
+    __slots__ = ("width", "size")
+
+    def __init__(self, width, height):
+        self.width = width
+        self.size = width * height
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, room_id):
+        if not 0 <= room_id < self.size:
+            raise IndexError(room_id)
+        y, x = divmod(room_id, self.width)
+        return f"cell_{x}_{y}"
+
+
+class RoomIds:
+    """Номера комнат по именам: ids["cell_x_y"] -> room_id."""
+
+    __slots__ = ("width", "height")
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+
+    def get(self, room_name, default=None):
+        """Вернуть номер комнаты или default, если такой комнаты нет."""
+        prefix, _, coordinates = room_name.partition("_")
+        x, _, y = coordinates.partition("_")
+        if prefix != "cell" or not x.isdigit() or not y.isdigit():
+            return default
+        x, y = int(x), int(y)
+        if x >= self.width or y >= self.height:
+            return default
+        return y * self.width + x
+
+    def __getitem__(self, room_name):
+        room_id = self.get(room_name)
+        if room_id is None:
+            raise KeyError(room_name)
+        return room_id
+
+    def __contains__(self, room_name):
+        return self.get(room_name) is not None
+
+
+class ProceduralGraph:
+    """Граф переходов процедурной карты (интерфейс graph.WorldGraph)."""
+
+    __slots__ = ("template", "names", "ids")
+
+    def __init__(self, template):
+        self.template = template
+        self.names = template.names
+        self.ids = template.ids
+
+    def __len__(self):
+        return len(self.names)
+
+    def neighbor(self, room_id, direction_id):
+        """Вернуть номер соседней комнаты или NO_EXIT."""
+        template = self.template
+        chunk = template.chunk_of(room_id)
+        y, x = divmod(room_id, template.width)
+        local = (y % CHUNK_SIZE) * CHUNK_SIZE + x % CHUNK_SIZE
+        return chunk.exits[local * DIRECTIONS_COUNT + direction_id]
+
+    def neighbors(self, room_id):
+        """Вернуть список пар (номер направления, номер комнаты)."""
+        return [
+            (direction_id, target)
+            for direction_id in range(DIRECTIONS_COUNT)
+            if (target := self.neighbor(room_id, direction_id)) != NO_EXIT
+        ]
+
+
+class ChunkStats:
+    """Счётчики работы LRU кусков.
+
+    Attributes:
+        hits (int): Обращения к уже построенному куску.
+        generated (int): Построенные куски (включая повторно).
+        evicted (int): Вытесненные куски.
+    """
+
+    __slots__ = ("hits", "generated", "evicted")
+
+    def __init__(self):
+        self.hits = 0
+        self.generated = 0
+        self.evicted = 0
+
+    def __repr__(self):
+        return (
+            f"ChunkStats(hits={self.hits}, generated={self.generated}, "
+            f"evicted={self.evicted})"
+        )
+
+
+class ProceduralTemplate:
+    """Шаблон мира для процедурного лабиринта (интерфейс WorldTemplate).
+
+    Args:
+        seed (int): Зерно карты.
+        width (int): Ширина карты в клетках.
+        height (int): Высота карты в клетках.
+        memory_limit (int): Ограничение памяти под построенные куски
+            в байтах (оценка: CHUNK_BYTES на кусок).
+
+    Attributes:
+        seed (int): Зерно карты.
+        width (int): Ширина карты.
+        height (int): Высота карты.
+        max_chunks (int): Сколько кусков держать в памяти.
+        chunks (OrderedDict): (cx, cy) -> Chunk в порядке обращений.
+        stats (ChunkStats): Счётчики LRU.
+        rooms, items, answers, rendered (ChunkField): Данные комнат.
+        rewards, locks (dict): Пустые: в процедурной карте загадки без
+            наград и запертых комнат нет.
+        graph (ProceduralGraph): Граф переходов.
+        names (RoomNames): Имена комнат по номерам.
+        ids (RoomIds): Номера комнат по именам.
+        start_id (int): Номер стартовой комнаты (центр карты).
+        event_table (EventTable): Встроенная таблица событий.
+    """
+
+    __slots__ = (
+        "seed", "width", "height", "max_chunks", "chunks", "stats",
+        "rooms", "items", "answers", "rendered", "rewards", "locks",
+        "graph", "names", "ids", "start_id", "event_table",
+    )
+
+    def __init__(self, seed, width, height=None, memory_limit=64 * 1024 * 1024):
+        if height is None:
+            height = width
+        if width < 1 or height < 1:
+            raise ValueError("размер карты должен быть положительным")
+        self.seed = seed & MASK64
+        self.width = width
+        self.height = height
+        self.max_chunks = max(1, memory_limit // CHUNK_BYTES)
+        self.chunks = OrderedDict()
+        self.stats = ChunkStats()
+        self.rooms = ChunkField(self, "rooms")
+        self.items = ChunkField(self, "items")
+        self.answers = ChunkField(self, "answers")
+        self.rendered = ChunkField(self, "rendered")
+        self.rewards = {}
+        self.locks = {}
+        self.names = RoomNames(width, height)
+        self.ids = RoomIds(width, height)
+        self.graph = ProceduralGraph(self)
+        self.start_id = (height // 2) * width + width // 2
+        self.event_table = DEFAULT_EVENTS
+        self.event_table.compile()
+
+    def chunk_of(self, room_id):
+        """Вернуть кусок с комнатой, построив его при необходимости.
+
+        Args:
+            room_id (int): Номер комнаты.
+
+        Returns:
+            Chunk: Кусок карты.
+
+        Side Effects:
+            - Может вытеснить кусок, к которому дольше всего не обращались
+        """
+        y, x = divmod(room_id, self.width)
+        key = (x // CHUNK_SIZE, y // CHUNK_SIZE)
+        chunks = self.chunks
+        chunk = chunks.get(key)
+        if chunk is not None:
+            chunks.move_to_end(key)
+            self.stats.hits += 1
+            return chunk
+
+        chunk = self.build_chunk(*key)
+        chunks[key] = chunk
+        self.stats.generated += 1
+        if len(chunks) > self.max_chunks:
+            chunks.popitem(last=False)
+            self.stats.evicted += 1
+        return chunk
+
+    def carves_north(self, x, y):
+        """Прорублен ли основной проход клетки на север (иначе - на восток)."""
+        if y == 0:
+            return False
+        if x == self.width - 1:
+            return True
+        return cell_hash(self.seed, x, y, SALT_CARVE) & 1 == 1
+
+    def has_north(self, x, y):
+        """Есть ли проход из клетки (x, y) на север."""
+        if y == 0:
+            return False
+        if self.carves_north(x, y):
+            return True
+        return cell_hash(self.seed, x, y, SALT_LOOP) % 100 < LOOP_PERCENT
+
+    def has_east(self, x, y):
+        """Есть ли проход из клетки (x, y) на восток."""
+        return x < self.width - 1 and not self.carves_north(x, y)
+
+    def build_chunk(self, cx, cy):
+        """Построить кусок карты (cx, cy) из зерна.
+
+        Args:
+            cx (int): Номер куска по горизонтали.
+            cy (int): Номер куска по вертикали.
+
+        Returns:
+            Chunk: Новый кусок; клетки за краем карты пропускаются.
+        """
+        chunk = Chunk()
+        width, height = self.width, self.height
+        for local_y in range(CHUNK_SIZE):
+            y = cy * CHUNK_SIZE + local_y
+            if y >= height:
+                break
+            for local_x in range(CHUNK_SIZE):
+                x = cx * CHUNK_SIZE + local_x
+                if x >= width:
+                    break
+                room_id = y * width + x
+                base = (local_y * CHUNK_SIZE + local_x) * DIRECTIONS_COUNT
+                targets = [NO_EXIT] * DIRECTIONS_COUNT
+                if self.has_north(x, y):
+                    targets[NORTH] = room_id - width
+                if y < height - 1 and self.has_north(x, y + 1):
+                    targets[SOUTH] = room_id + width
+                if self.has_east(x, y):
+                    targets[EAST] = room_id + 1
+                if x > 0 and self.has_east(x - 1, y):
+                    targets[WEST] = room_id - 1
+                chunk.exits[base:base + DIRECTIONS_COUNT] = array("q", targets)
+                self._build_room(chunk, x, y, targets)
+        return chunk
+
+    def _build_room(self, chunk, x, y, targets):
+        name = f"cell_{x}_{y}"
+        names = self.names
+        exits = {
+            DIRECTIONS[direction_id]: names[target]
+            for direction_id, target in enumerate(targets)
+            if target != NO_EXIT
+        }
+        bits = cell_hash(self.seed, x, y, SALT_ROOM)
+        description = (
+            f"{PLACES[bits % len(PLACES)]}. "
+            f"{DETAILS[(bits >> 8) % len(DETAILS)]}"
+        )
+        items = []
+        if (bits >> 16) % 8 == 0:
+            items.extend(LOOT[(bits >> 24) % len(LOOT)])
+        puzzle = None
+        if (bits >> 32) % 24 == 0:
+            puzzle = RIDDLES[(bits >> 40) % len(RIDDLES)]
+            chunk.answers[name] = compile_answers((puzzle[1],))
+
+        chunk.rooms[name] = {
+            "description": description,
+            "exits": exits,
+            "items": items,
+            "puzzle": puzzle,
+        }
+        chunk.items[name] = count_items(items)
@@ -0,0 +1,175 @@
+# labyrinth_game/render.py
+"""Отрисовка игровых событий в текст.
+
+Игровая логика только порождает события (см. utils.emit()), а этот
+модуль превращает их в строки для игрока. Консольная игра и сервер
+пишут эти строки в приёмник вывода (см. output.make_renderer());
+headless-режимы (симуляция, LabyrinthEnv) работают без отрисовщика
+и не тратят время на форматирование.
+"""
+
+from labyrinth_game.constants import COMMANDS, MESSAGES
+
+HINT_STEPS = 8
+
+HELP_TEXT = "\n".join([
+    "\nДоступные команды:",
+    *(f"  {command:<16} - {description}" for command, description in COMMANDS.items()),
+])
+
+
+def format_stack(item_name, count):
+    """Сформировать подпись предмета с количеством: "coin ×37"."""
+    if count == 1:
+        return item_name
+    return f"{item_name} ×{count}"
+
+
+def format_stacks(stacks):
+    """Сформировать список предметов из пар (предмет, количество)."""
+    return ", ".join(format_stack(item_name, count) for item_name, count in stacks)
+
+
+def format_step(step):
+    """Записать шаг подсказки одной строкой: "solve → да → 10"."""
+    return " → ".join(step)
+
+
+def format_route(steps, limit=HINT_STEPS):
+    """Записать дорогу из шагов, показывая не больше limit шагов."""
+    shown = ", ".join(format_step(step) for step in steps[:limit])
+    if len(steps) > limit:
+        shown += ", …"
+    return shown
+
+
+class CacheStats:
+    """Счётчики попаданий и промахов кэша.
+
+    Attributes:
+        hits (int): Число попаданий.
+        misses (int): Число промахов.
+    """
+
+    __slots__ = ("hits", "misses")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def hit_rate(self):
+        """Вернуть долю попаданий (0.0, если обращений не было)."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __repr__(self):
+        return f"CacheStats(hits={self.hits}, misses={self.misses})"
+
+
+ROOM_CACHE_STATS = CacheStats()
+
+
+def render_room(game_state, room_name):
+    """Сформировать описание комнаты, используя кэш.
+
+    Описание нетронутой комнаты одинаково для всех сессий и хранится
+    в шаблоне мира; описание изменённой - в мире сессии вместе с версией
+    комнаты. Любое изменение предметов или загадки повышает версию
+    (см. World._edit()), и следующий вызов пересобирает описание.
+
+    Args:
+        game_state (GameState): Состояние игры.
+        room_name (str): Имя комнаты.
+
+    Returns:
+        str: Название, описание, предметы, выходы и наличие загадки.
+    """
+    world = game_state.world
+    version = world.version(room_name)
+    if version:
+        cached = world.rendered.get(room_name)
+        if cached is not None and cached[0] == version:
+            ROOM_CACHE_STATS.hits += 1
+            return cached[1]
+    else:
+        text = world.template.rendered.get(room_name)
+        if text is not None:
+            ROOM_CACHE_STATS.hits += 1
+            return text
+
+    ROOM_CACHE_STATS.misses += 1
+    text = build_room_text(world, room_name)
+    if version:
+        world.rendered[room_name] = (version, text)
+    else:
+        world.template.rendered[room_name] = text
+    return text
+
+
+def build_room_text(world, room_name):
+    """Собрать описание комнаты заново, без кэша.
+
+    Args:
+        world (World): Мир сессии.
+        room_name (str): Имя комнаты.
+
+    Returns:
+        str: Название, описание, предметы, выходы и наличие загадки.
+    """
+    lines = [f"\n== {room_name.upper()} ==", world.description(room_name)]
+
+    items = world.items(room_name)
+    if items:
+        lines.append(f"\nЗаметные предметы: {format_stacks(items.items())}")
+
+    lines.append(f"Выходы: {', '.join(world.exits(room_name))}")
+
+    if world.puzzle(room_name):
+        lines.append("Кажется, здесь есть загадка (используйте команду solve).")
+    return "\n".join(lines)
+
+
+def render_inventory(game_state):
+    """Сформировать строку инвентаря игрока."""
+    if game_state.inventory_mask:
+        return f"\nИнвентарь: {format_stacks(game_state.inventory_stacks())}"
+    return "\nИнвентарь пуст."
+
+
+def render_help():
+    """Вернуть справку по командам (HELP_TEXT)."""
+    return HELP_TEXT
+
+
+def render_event(game_state, event):
+    """Превратить событие в текст.
+
+    Args:
+        game_state (GameState): Состояние игры.
+        event (tuple): Событие (kind, *args).
+
+    Returns:
+        str | None: Текст события или None, если событие не видно игроку.
+    """
+    kind = event[0]
+    match kind:
+        case "room":
+            return render_room(game_state, event[1])
+        case "inventory":
+            return render_inventory(game_state)
+        case "help":
+            return render_help()
+        case "taken":
+            return MESSAGES["taken"].format(format_stack(event[1], event[2]))
+        case "hint":
+            return MESSAGES["hint"].format(format_step(event[1]), event[2])
+        case "hint_route":
+            return MESSAGES["hint_route"].format(
+                event[1], format_route(event[2]), event[3]
+            )
+
+    template = MESSAGES.get(kind)
+    if template is None:
+        return None
+    return template.format(*event[1:])
+
@@ -0,0 +1,221 @@
+# labyrinth_game/replay.py
+"""Проверка режима совместимости: повтор сессий прежней версии игры.
+
+Без --seed игра использует rng.SinHashRNG и должна вести себя так же,
+как прежняя версия (словарь состояния и список player_inventory):
+те же случайные события, ловушка отнимает тот же предмет, инвентарь
+выводится в том же порядке. Проверка прогоняет SEQUENCES случайных
+последовательностей из команд прежней игры (VOCABULARY) через
+main --interactive и сравнивает вывод с эталоном прежней версии
+(REFERENCE).
+
+Перед сравнением вывод приводится к общему виду: списки предметов
+(инвентарь и "Заметные предметы") сворачиваются в стопки "coin ×3"
+в порядке первого появления, как их показывает текущая версия.
+Вывод после приглашения, на которое пришёл конец ввода, не
+сравнивается: прежняя версия передавала конец ввода в игру командой
+quit, и открытый вопрос принимал её за ответ.
+
+Эталон хранит для каждой последовательности число повторяемых команд
+и хэш приведённого вывода. Запись обрезает последовательность перед
+повторным открытием шкатулки: прежняя версия снова выдавала ключ,
+если прежний отняла ловушка, текущая выдаёт его один раз за партию.
+
+Запись эталона из дерева прежней версии (например, git worktree):
+    python -m labyrinth_game.replay --record /tmp/old-labyrinth
+Проверка:
+    python -m labyrinth_game.replay
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import random
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+from labyrinth_game import main as game
+from labyrinth_game.constants import MESSAGES, PROMPTS
+from labyrinth_game.render import format_stacks
+
+REFERENCE = Path(__file__).resolve().parent / "replay_reference.json"
+
+REFERENCE_VERSION = 2
+
+SEQUENCES = 500
+LENGTH = 200
+
+ITEMS = (
+    "torch", "rusty_key", "ancient_book", "sword", "bronze_box", "treasure_chest",
+    "crystal_amulet", "ancient_artifact", "treasure_key", "ancient_scroll", "coin",
+)
+DIRECTION_WORDS = ("north", "south", "east", "west")
+
+VOCABULARY = (
+    "look", "inventory", "solve", "solve", "solve",
+    *DIRECTION_WORDS * 4,
+    *(f"go {direction}" for direction in DIRECTION_WORDS),
+    *(f"take {item_name}" for item_name in ITEMS * 2),
+    *(f"use {item_name}" for item_name in ITEMS),
+    "10", "десять", "шаг шаг шаг", "резонанс", "луна", "молчание",
+    "да", "нет", "wrong", "5",
+)
+
+ITEM_LINE = re.compile(r"^(Инвентарь|Заметные предметы): (.+)$", re.MULTILINE)
+STACK = re.compile(r"^(.+) ×(\d+)$")
+PROMPT = re.compile("|".join(map(re.escape, PROMPTS.values())))
+
+
+def sequence(seed):
+    """Вернуть последовательность команд проверки с номером seed."""
+    rng = random.Random(seed)
+    return [rng.choice(VOCABULARY) for _ in range(LENGTH)]
+
+
+def _stacked(match):
+    counts = {}
+    for label in match.group(2).split(", "):
+        stack = STACK.match(label)
+        item_name, count = (stack[1], int(stack[2])) if stack else (label, 1)
+        counts[item_name] = counts.get(item_name, 0) + count
+    return f"{match.group(1)}: {format_stacks(counts.items())}"
+
+
+def normalize(output, count):
+    """Привести вывод партии из count команд к общему виду.
+
+    Списки предметов сворачиваются в стопки, вывод после приглашения,
+    на которое пришёл конец ввода, отбрасывается.
+    """
+    for number, prompt in enumerate(PROMPT.finditer(output)):
+        if number == count:
+            output = output[:prompt.end()]
+            break
+    return ITEM_LINE.sub(_stacked, output)
+
+
+def digest(output, count):
+    """Вернуть хэш приведённого вывода партии из count команд."""
+    return hashlib.sha256(normalize(output, count).encode("utf-8")).hexdigest()[:16]
+
+
+def run_current(commands):
+    """Сыграть команды текущей версией и вернуть вывод.
+
+    Side Effects:
+        - Временно подменяет sys.stdin
+    """
+    stdin = sys.stdin
+    sys.stdin = io.StringIO("".join(f"{command}\n" for command in commands))
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            game.main(["--interactive"])
+    finally:
+        sys.stdin = stdin
+    return output.getvalue()
+
+
+def run_old(tree, commands):
+    """Сыграть команды прежней версией из каталога tree и вернуть вывод.
+
+    Прежняя версия меняет ROOMS на месте, поэтому каждая партия
+    запускается в отдельном процессе.
+    """
+    result = subprocess.run(
+        [sys.executable, "-m", "labyrinth_game.main"],
+        cwd=tree,
+        input="".join(f"{command}\n" for command in commands),
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        check=True,
+    )
+    return result.stdout
+
+
+def reissue_cut(output):
+    """Вернуть число команд до повторной выдачи ключа из шкатулки или None.
+
+    Каждая прочитанная команда начинается с приглашения, поэтому номер
+    команды - число приглашений перед повторным сообщением key_found.
+    """
+    found = MESSAGES["key_found"]
+    first = output.find(found)
+    second = output.find(found, first + len(found)) if first >= 0 else -1
+    if second < 0:
+        return None
+    head = output[:second]
+    return sum(head.count(prompt) for prompt in PROMPTS.values()) - 1
+
+
+def record(tree, path=REFERENCE):
+    """Записать эталон вывода прежней версии из каталога tree."""
+    entries = []
+    for seed in range(SEQUENCES):
+        commands = sequence(seed)
+        output = run_old(tree, commands)
+        cut = reissue_cut(output)
+        if cut is not None:
+            commands = commands[:cut]
+            output = run_old(tree, commands)
+        entries.append((len(commands), digest(output, len(commands))))
+    path.write_text(
+        json.dumps(
+            {"version": REFERENCE_VERSION, "length": LENGTH, "sequences": entries}
+        ),
+        encoding="utf-8",
+    )
+    return entries
+
+
+def check(path=REFERENCE):
+    """Сравнить вывод текущей версии с эталоном.
+
+    Returns:
+        list[int]: Номера последовательностей, вывод которых разошёлся.
+    """
+    reference = json.loads(path.read_text(encoding="utf-8"))
+    if reference["version"] != REFERENCE_VERSION or reference["length"] != LENGTH:
+        raise ValueError(f"{path}: эталон другой версии, запишите его заново")
+    return [
+        seed
+        for seed, (kept, expected) in enumerate(reference["sequences"])
+        if digest(run_current(sequence(seed)[:kept]), kept) != expected
+    ]
+
+
+def main(argv=None):
+    """Запустить проверку из командной строки.
+
+    Returns:
+        int: Код выхода: 0 - вывод совпал с эталоном, 1 - есть расхождения.
+    """
+    parser = argparse.ArgumentParser(
+        description="Проверка повтора сессий прежней версии"
+    )
+    parser.add_argument(
+        "--record", metavar="DIR", type=Path,
+        help="записать эталон, запуская прежнюю версию игры из каталога DIR",
+    )
+    args = parser.parse_args(argv)
+
+    if args.record is not None:
+        entries = record(args.record)
+        cut = sum(kept < LENGTH for kept, _ in entries)
+        print(f"Эталон записан: {len(entries)} последовательностей, "
+              f"обрезано по шкатулке: {cut}")
+        return 0
+    diverged = check()
+    print(f"Расхождений: {len(diverged)} из {SEQUENCES}")
+    if diverged:
+        print("Последовательности (см. sequence()): " + ", ".join(map(str, diverged)))
+    return 1 if diverged else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
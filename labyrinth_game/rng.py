@@ -0,0 +1,131 @@
+# labyrinth_game/rng.py
+"""Генераторы случайных чисел игровых сессий.
+
+Оба генератора - счётные (counter-based): значение зависит только от
+ключа сессии, номера потока и счётчика (номера шага), а не от
+внутреннего состояния. Поэтому любое значение можно получить
+повторно, партию - воспроизвести, а ряд значений - посчитать пакетом.
+
+CounterRNG - SplitMix64 с ключом от зерна сессии и независимыми потоками
+для событий, ловушек и добычи. SinHashRNG - режим совместимости: бит в
+бит повторяет прежний синус-хэш pseudo_random(steps_taken), чтобы старые
+сессии воспроизводились так же, как раньше (вместе с порядком инвентаря,
+см. state.GameState.inventory_order; проверка - labyrinth_game.replay).
+"""
+
+from labyrinth_game.schedule import SCHEDULE
+
+STREAM_EVENTS = 0
+STREAM_TRAPS = 1
+STREAM_LOOT = 2
+STREAMS_COUNT = 3
+
+LANES = 4
+
+MASK64 = (1 << 64) - 1
+GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+
+
+def splitmix64(value):
+    """Перемешать 64-битное число финализатором SplitMix64."""
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK64
+    return value ^ (value >> 31)
+
+
+class CounterRNG:
+    """Счётный генератор SplitMix64 с ключом от зерна сессии.
+
+    Значение для (stream, counter, lane) - это SplitMix64 от
+    key[stream] + (counter * LANES + lane) * GOLDEN_GAMMA, то есть
+    элемент номер counter * LANES + lane последовательности SplitMix64
+    с начальным состоянием key[stream].
+
+    Attributes:
+        seed (int): Зерно сессии.
+    """
+
+    __slots__ = ("seed", "_keys")
+
+    def __init__(self, seed):
+        self.seed = seed
+        base = seed & MASK64
+        self._keys = tuple(
+            splitmix64((base + (stream + 1) * GOLDEN_GAMMA) & MASK64)
+            for stream in range(STREAMS_COUNT)
+        )
+
+    def bits(self, stream, counter, lane=0):
+        """Вернуть 64 случайных бита для (stream, counter, lane)."""
+        index = counter * LANES + lane
+        return splitmix64((self._keys[stream] + index * GOLDEN_GAMMA) & MASK64)
+
+    def randbelow(self, stream, counter, modulo, lane=0):
+        """Вернуть случайное целое в диапазоне [0, modulo).
+
+        Args:
+            stream (int): Поток (STREAM_EVENTS, STREAM_TRAPS, STREAM_LOOT).
+            counter (int): Счётчик, обычно номер шага.
+            modulo (int): Верхний предел диапазона.
+            lane (int): Номер значения в пределах одного шага (0..LANES-1).
+
+        Returns:
+            int: Целое число в диапазоне [0, modulo).
+        """
+        return (self.bits(stream, counter, lane) * modulo) >> 64
+
+    def draw(self, stream, start, n, modulo, lane=0):
+        """Вернуть n значений randbelow() для счётчиков start..start+n-1."""
+        key = self._keys[stream]
+        step = LANES * GOLDEN_GAMMA
+        value = key + (start * LANES + lane) * GOLDEN_GAMMA
+        result = []
+        for _ in range(n):
+            result.append((splitmix64(value & MASK64) * modulo) >> 64)
+            value += step
+        return result
+
+    def __repr__(self):
+        return f"CounterRNG({self.seed})"
+
+
+class SinHashRNG:
+    """Режим совместимости с прежним pseudo_random(steps_taken).
+
+    Поток не учитывается, а номер значения внутри шага (lane)
+    прибавляется к счётчику: так random_event() брал тип события
+    по шагу + 1. Значения берутся из таблицы SCHEDULE.
+    """
+
+    __slots__ = ()
+
+    seed = None
+
+    def randbelow(self, stream, counter, modulo, lane=0):
+        """Вернуть pseudo_random(counter + lane, modulo)."""
+        return SCHEDULE.value(counter + lane, modulo)
+
+    def draw(self, stream, start, n, modulo, lane=0):
+        """Вернуть n значений randbelow() для счётчиков start..start+n-1."""
+        return list(SCHEDULE.values(start, start + n, modulo, offset=lane))
+
+    def __repr__(self):
+        return "SinHashRNG()"
+
+
+LEGACY_RNG = SinHashRNG()
+
+
+def make_rng(seed=None):
+    """Создать генератор для новой сессии.
+
+    Args:
+        seed (int | None): Зерно сессии. None - режим совместимости
+            с прежним синус-хэшем (одинаковые события у всех игроков).
+
+    Returns:
+        CounterRNG | SinHashRNG: Генератор сессии.
+    """
+    if seed is None:
+        return LEGACY_RNG
+    return CounterRNG(seed)
@@ -0,0 +1,134 @@
+# labyrinth_game/schedule.py
+"""Предрасчитанное расписание случайных событий.
+
+pseudo_random() - детерминированная функция номера шага, поэтому её
+значения можно посчитать один раз для целого диапазона шагов и дальше
+брать из таблицы. Таблица хранит дробную часть синус-хэша каждого шага
+(array('d')), из которой результат для любого modulo получается теми же
+операциями, что и в pseudo_random(), то есть бит в бит.
+
+Поверх таблицы строятся пакетные выборки для анализа: на каких шагах
+происходит событие, какого оно типа (номер во встроенной таблице
+событий EVENTS, где у всех событий вес 1) и когда ловушка смертельна.
+"""
+
+import math
+from array import array
+
+from labyrinth_game.constants import (
+    EVENT_PROBABILITY,
+    EVENT_TYPES_COUNT,
+    TRAP_DAMAGE_RANGE,
+    TRAP_DAMAGE_THRESHOLD,
+)
+
+CHUNK_SIZE = 4096
+
+TRAP_EVENT = 2
+
+
+def sin_fraction(seed):
+    """Вернуть дробную часть синус-хэша шага.
+
+    Args:
+        seed (int): Номер шага.
+
+    Returns:
+        float: Число в диапазоне [0, 1).
+    """
+    stretched = math.sin(seed * 12.9898) * 43758.5453
+    return stretched - math.floor(stretched)
+
+
+class EventSchedule:
+    """Таблица значений синус-хэша для шагов 0..size-1.
+
+    Таблица растёт кусками по CHUNK_SIZE по мере обращения к новым
+    шагам, поэтому её размер ограничен самым дальним запрошенным шагом.
+
+    Attributes:
+        fractions (array): Дробные части синус-хэша по номерам шагов.
+    """
+
+    __slots__ = ("fractions",)
+
+    def __init__(self, size=0):
+        self.fractions = array("d")
+        self.extend(size)
+
+    def extend(self, size):
+        """Досчитать таблицу до size шагов (если она короче)."""
+        start = len(self.fractions)
+        if size <= start:
+            return
+        sin, floor = math.sin, math.floor
+        stretched = [sin(seed * 12.9898) * 43758.5453 for seed in range(start, size)]
+        self.fractions.extend([value - floor(value) for value in stretched])
+
+    def value(self, seed, modulo):
+        """Вернуть pseudo_random(seed, modulo) из таблицы.
+
+        Args:
+            seed (int): Номер шага (неотрицательный).
+            modulo (int): Верхний предел диапазона результата [0, modulo).
+
+        Returns:
+            int: Целое число в диапазоне [0, modulo).
+        """
+        fractions = self.fractions
+        if seed >= len(fractions):
+            self.extend((seed // CHUNK_SIZE + 1) * CHUNK_SIZE)
+        return int(fractions[seed] * modulo)
+
+    def values(self, start, stop, modulo, offset=0):
+        """Вернуть pseudo_random(seed + offset, modulo) для диапазона шагов.
+
+        Args:
+            start (int): Первый шаг.
+            stop (int): Шаг после последнего.
+            modulo (int): Верхний предел диапазона результата.
+            offset (int): Сдвиг зерна (random_event берёт тип по шагу + 1).
+
+        Returns:
+            bytes | list[int]: Значения по шагам; bytes, если modulo <= 256.
+        """
+        self.extend(stop + offset)
+        window = self.fractions[start + offset:stop + offset]
+        result = [int(fraction * modulo) for fraction in window]
+        return bytes(result) if modulo <= 256 else result
+
+    def event_flags(self, start, stop):
+        """Вернуть флаги "на шаге происходит событие" (1/0) для диапазона."""
+        chances = self.values(start, stop, EVENT_PROBABILITY)
+        return bytes(chance == 0 for chance in chances)
+
+    def event_types(self, start, stop):
+        """Вернуть тип события (0..EVENT_TYPES_COUNT-1) для диапазона шагов."""
+        return self.values(start, stop, EVENT_TYPES_COUNT, offset=1)
+
+    def lethal_trap_steps(self, start, stop):
+        """Найти шаги, на которых вход в ловушку без факела смертелен.
+
+        Ловушка убивает, если на шаге происходит событие-ловушка,
+        а инвентарь пуст и урон ниже порога.
+
+        Args:
+            start (int): Первый шаг.
+            stop (int): Шаг после последнего.
+
+        Returns:
+            list[int]: Номера смертельных шагов.
+        """
+        flags = self.event_flags(start, stop)
+        types = self.event_types(start, stop)
+        damage = self.values(start, stop, TRAP_DAMAGE_RANGE)
+        return [
+            start + index
+            for index in range(stop - start)
+            if flags[index]
+            and types[index] == TRAP_EVENT
+            and damage[index] < TRAP_DAMAGE_THRESHOLD
+        ]
+
+
+SCHEDULE = EventSchedule()
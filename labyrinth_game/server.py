@@ -0,0 +1,386 @@
+# labyrinth_game/server.py
+"""Асинхронный многопользовательский сервер игры.
+
+Простой построчный протокол поверх TCP: клиент отправляет одну команду
+на строку (UTF-8), сервер отвечает выводом команды, за которым следует
+строка приглашения (см. PROMPTS) с переводом строки в конце. Ответы на
+вопросы (загадки, код от сундука) приходят так же, отдельной строкой.
+
+Каждое подключение получает собственное состояние игры и собственное
+зерно случайных событий. Ожидание ввода -
+это await на сокете, поэтому один цикл событий обслуживает тысячи
+простаивающих или медленных игроков без потока на каждого.
+
+С журналами (см. journal.JournalStore) сервер сообщает новому игроку
+код сессии; после разрыва связи игрок продолжает игру, отправив первой
+строкой "resume <код>". Журналы записываются на диск пакетами раз
+в sync_interval секунд в отдельном потоке, не задерживая цикл событий.
+"""
+
+import asyncio
+import contextlib
+import gc
+import os
+import random
+import re
+import secrets
+import signal
+import socket
+import sys
+import traceback
+
+from labyrinth_game.journal import JournalError
+from labyrinth_game.main import (
+    current_prompt,
+    new_game_state,
+    process_command,
+    show_welcome,
+)
+from labyrinth_game.output import BufferedSink, make_renderer
+from labyrinth_game.utils import describe_current_room, emit
+from labyrinth_game.world import DEFAULT_TEMPLATE, World
+
+ENCODING = "utf-8"
+
+WORLD_LABEL = "builtin"
+
+SESSION_BYTES = 8
+SESSION_ID = re.compile(f"[0-9a-f]{{{SESSION_BYTES * 2}}}")
+RESUME_PREFIX = "resume "
+
+
+def resume_session(
+    journals, game_state, journal, session_id, template=DEFAULT_TEMPLATE,
+    label=WORLD_LABEL,
+):
+    """Продолжить сохранённую сессию вместо только что начатой.
+
+    Args:
+        journals (JournalStore): Журналы сервера.
+        game_state (GameState): Состояние новой сессии.
+        journal (SessionJournal): Журнал новой сессии.
+        session_id (str): Код сохранённой сессии.
+        template (WorldTemplate): Мир сервера.
+        label (str): Описание мира для заголовка журнала.
+
+    Returns:
+        tuple: (GameState, SessionJournal) - восстановленная сессия
+        или прежняя, если восстановить не удалось.
+
+    Side Effects:
+        - Порождает событие "resumed", "resume_finished" или "resume_failed"
+    """
+    if (
+        not SESSION_ID.fullmatch(session_id)
+        or session_id in journals.active
+        or not journals.exists(session_id)
+    ):
+        emit(game_state, "resume_failed", session_id)
+        return game_state, journal
+    try:
+        resumed, resumed_journal = journals.resume(
+            session_id, template, label, game_state.renderer
+        )
+    except (OSError, JournalError):
+        emit(game_state, "resume_failed", session_id)
+        return game_state, journal
+
+    journals.release(journal)
+    if resumed.game_over:
+        emit(resumed, "resume_finished", session_id)
+    else:
+        emit(resumed, "resumed", resumed_journal.commands)
+        describe_current_room(resumed)
+    return resumed, resumed_journal
+
+
+async def handle_session(
+    reader, writer, idle_timeout=None, journals=None, monitor=None,
+    template=DEFAULT_TEMPLATE, label=WORLD_LABEL,
+):
+    """Провести одну игровую сессию для подключившегося клиента.
+
+    Args:
+        reader (asyncio.StreamReader): Поток чтения клиента.
+        writer (asyncio.StreamWriter): Поток записи клиента.
+        idle_timeout (float | None): Через сколько секунд без ввода
+            отключать клиента. None - не отключать.
+        journals (JournalStore | None): Журналы сессий. None - игры
+            не сохраняются.
+        monitor (metrics.Monitor | None): Измерение сессий. None - без
+            метрик.
+        template (WorldTemplate): Мир сервера, общий для всех сессий.
+        label (str): Описание мира для заголовков журналов.
+
+    Side Effects:
+        - Пишет вывод игры в сокет клиента
+        - Закрывает соединение по окончании игры, quit или таймауту
+    """
+    sink = BufferedSink()
+    seed = random.getrandbits(64)
+    game_state = new_game_state(
+        World(template), renderer=make_renderer(sink), seed=seed
+    )
+    show_welcome(game_state)
+    journal = None
+    if journals is not None:
+        journal = journals.create(secrets.token_hex(SESSION_BYTES), seed, label)
+        emit(game_state, "session_code", journal.session_id)
+    if monitor is not None:
+        monitor.attach(game_state)
+    output = sink.take()
+
+    try:
+        while not game_state.game_over:
+            writer.write(f"{output}{current_prompt(game_state)}\n".encode(ENCODING))
+            await writer.drain()
+
+            try:
+                line = await asyncio.wait_for(reader.readline(), idle_timeout)
+            except TimeoutError:
+                break
+            if not line:
+                break
+
+            command = line.decode(ENCODING, errors="replace").rstrip("\r\n")
+            if (
+                journal is not None
+                and not journal.commands
+                and command.startswith(RESUME_PREFIX)
+            ):
+                probe = game_state.probe
+                game_state, journal = resume_session(
+                    journals,
+                    game_state,
+                    journal,
+                    command[len(RESUME_PREFIX):].strip(),
+                    template,
+                    label,
+                )
+                game_state.probe = probe
+                output = sink.take()
+                continue
+
+            result = process_command(game_state, command)
+            output = sink.take()
+            if result is False:
+                game_state.game_over = True
+            if journal is not None and game_state.outcome != "quit":
+                journals.record(journal, game_state, command)
+
+        if game_state.game_over:
+            writer.write(output.encode(ENCODING))
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        if journal is not None:
+            journals.release(journal)
+        if monitor is not None:
+            session_id = journal.session_id if journal is not None else f"{seed:016x}"
+            monitor.detach(game_state, session_id)
+        writer.close()
+        with contextlib.suppress(ConnectionError):
+            await writer.wait_closed()
+
+
+async def start_server(
+    host="127.0.0.1", port=0, idle_timeout=None, journals=None, monitor=None,
+    template=DEFAULT_TEMPLATE, label=WORLD_LABEL, sock=None,
+):
+    """Запустить сервер в текущем цикле событий.
+
+    Args:
+        host (str): Адрес для прослушивания.
+        port (int): Порт. 0 - выбрать свободный порт.
+        idle_timeout (float | None): Таймаут простоя клиента в секундах.
+        journals (JournalStore | None): Журналы сессий.
+        monitor (metrics.Monitor | None): Измерение сессий.
+        template (WorldTemplate): Мир сервера.
+        label (str): Описание мира для заголовков журналов.
+        sock (socket.socket | None): Готовый слушающий сокет вместо
+            host и port (общий для процессов-обработчиков).
+
+    Returns:
+        asyncio.Server: Запущенный сервер.
+    """
+
+    async def on_connect(reader, writer):
+        await handle_session(
+            reader, writer, idle_timeout, journals, monitor, template, label
+        )
+
+    if sock is not None:
+        return await asyncio.start_server(on_connect, sock=sock)
+    return await asyncio.start_server(on_connect, host, port, backlog=4096)
+
+
+async def flush_journals(journals):
+    """Записывать журналы на диск раз в journals.sync_interval секунд.
+
+    Пакет забирается в цикле событий, а пишется в потоке исполнителя,
+    так что fsync не останавливает обслуживание игроков. Пакеты пишутся
+    по очереди, поэтому порядок записей в журнале сохраняется.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(journals.sync_interval)
+        batch = journals.take_batch()
+        if batch:
+            await loop.run_in_executor(None, journals.write_batch, batch)
+
+
+def run_server(
+    host,
+    port,
+    idle_timeout=None,
+    journals=None,
+    monitor=None,
+    metrics_path=None,
+    metrics_port=None,
+    template=DEFAULT_TEMPLATE,
+    label=WORLD_LABEL,
+    workers=1,
+):
+    """Запустить сервер и обслуживать клиентов до прерывания (Ctrl+C).
+
+    С workers > 1 клиентов обслуживают процессы-обработчики
+    (см. serve_workers()); журналы и метрики в этом режиме не ведутся.
+
+    Args:
+        host (str): Адрес для прослушивания.
+        port (int): Порт.
+        idle_timeout (float | None): Таймаут простоя клиента в секундах.
+        journals (JournalStore | None): Журналы сессий.
+        monitor (metrics.Monitor | None): Измерение сессий.
+        metrics_path (str | None): Файл, куда периодически записывать
+            метрики (см. metrics.write_metrics()).
+        metrics_port (int | None): Порт HTTP-точки метрик на том же адресе.
+        template (WorldTemplate): Мир сервера.
+        label (str): Описание мира для заголовков журналов.
+        workers (int): Число процессов-обработчиков.
+
+    Side Effects:
+        - Выводит адрес сервера в stderr
+        - При остановке записывает несохранённые журналы и метрики
+    """
+    if workers > 1:
+        serve_workers(host, port, workers, idle_timeout, template, label)
+        return
+
+    tasks = []
+
+    async def serve():
+        server = await start_server(
+            host, port, idle_timeout, journals, monitor, template, label
+        )
+        address = server.sockets[0].getsockname()
+        print(f"Сервер запущен на {address[0]}:{address[1]}", file=sys.stderr)
+        if journals is not None:
+            tasks.append(asyncio.create_task(flush_journals(journals)))
+        if metrics_path is not None:
+            from labyrinth_game.metrics import export_metrics
+
+            tasks.append(asyncio.create_task(export_metrics(metrics_path)))
+        if metrics_port is not None:
+            from labyrinth_game.metrics import serve_metrics
+
+            endpoint = await serve_metrics(host, metrics_port)
+            address = endpoint.sockets[0].getsockname()
+            print(f"Метрики: http://{address[0]}:{address[1]}/metrics",
+                  file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+        for task in tasks:
+            task.cancel()
+
+    try:
+        with contextlib.suppress(KeyboardInterrupt):
+            asyncio.run(serve())
+    finally:
+        if journals is not None:
+            journals.close()
+        if metrics_path is not None:
+            from labyrinth_game.metrics import write_metrics
+
+            write_metrics(metrics_path)
+
+
+def serve_workers(
+    host, port, workers, idle_timeout=None, template=DEFAULT_TEMPLATE,
+    label=WORLD_LABEL,
+):
+    """Обслуживать клиентов несколькими процессами до прерывания (Ctrl+C).
+
+    Мир упаковывается в общую память (см. shared) один раз, до запуска
+    обработчиков. Обработчики - копии процесса (fork) со своим циклом
+    событий, принимающие подключения с общего слушающего сокета; в их
+    памяти только сессии. Объекты, созданные до fork, замораживаются
+    (gc.freeze()), чтобы сборщик мусора обработчиков не копировал
+    общие страницы памяти.
+
+    Args:
+        host (str): Адрес для прослушивания.
+        port (int): Порт.
+        workers (int): Число процессов-обработчиков.
+        idle_timeout (float | None): Таймаут простоя клиента в секундах.
+        template (WorldTemplate): Мир сервера.
+        label (str): Описание мира для заголовков журналов.
+
+    Side Effects:
+        - Выводит адрес сервера в stderr
+        - Создаёт и при остановке удаляет блок общей памяти с миром
+    """
+    from labyrinth_game.shared import share_world
+
+    world = share_world(template)
+    listener = socket.create_server((host, port), backlog=4096)
+    address = listener.getsockname()
+    print(
+        f"Сервер запущен на {address[0]}:{address[1]} (обработчиков: "
+        f"{workers}, мир в общей памяти: {world.memory.size // 1024} КБ)",
+        file=sys.stderr,
+    )
+    # SIGTERM останавливает и родителя, и обработчики, как Ctrl+C.
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    gc.freeze()
+    children = []
+    try:
+        for _ in range(workers):
+            pid = os.fork()
+            if pid == 0:
+                _run_worker(listener, idle_timeout, world.template, label)
+            children.append(pid)
+        with contextlib.suppress(KeyboardInterrupt):
+            for pid in children:
+                os.waitpid(pid, 0)
+    finally:
+        for pid in children:
+            with contextlib.suppress(ProcessLookupError):
+                os.kill(pid, signal.SIGTERM)
+        for pid in children:
+            with contextlib.suppress(ChildProcessError):
+                os.waitpid(pid, 0)
+        listener.close()
+        world.close()
+        world.unlink()
+
+
+def _run_worker(listener, idle_timeout, template, label):
+    async def serve():
+        server = await start_server(
+            idle_timeout=idle_timeout, template=template, label=label, sock=listener
+        )
+        async with server:
+            await server.serve_forever()
+
+    code = 0
+    try:
+        with contextlib.suppress(KeyboardInterrupt):
+            asyncio.run(serve())
+    except Exception:
+        traceback.print_exc()
+        code = 1
+    finally:
+        # Обработчик не выполняет завершение родителя (finally, atexit).
+        os._exit(code)
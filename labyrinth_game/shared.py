@@ -0,0 +1,592 @@
+# labyrinth_game/shared.py
+"""Шаблон мира в общей памяти для нескольких процессов.
+
+Данные мира (выходы, описания, предметы, загадки, награды, замки)
+упаковываются в один плоский буфер: таблицы целых чисел по номерам
+комнат и таблица строк, где каждая строка хранится один раз.
+SharedTemplate читает буфер на месте, через memoryview, и подставляется
+в World вместо WorldTemplate: словари комнат, предметов и ответов
+собираются при обращении и сразу освобождаются.
+
+Буфер лежит в multiprocessing.shared_memory (share_world()), поэтому
+процессы-обработчики сервера видят одну копию мира. В буфере нет
+объектов Python со счётчиками ссылок, и чтение мира не превращает
+общие страницы памяти в копии процесса, как это делают словари,
+унаследованные через fork. В памяти процесса остаются только сессии
+и небольшой кэш описаний комнат.
+
+Формат буфера:
+
+- MAGIC и заголовок array('q'): версия формата, число комнат,
+  стартовая комната и (смещение, длина) каждой секции SECTIONS;
+- секции выравниваются по 8 байт; строки - UTF-8 подряд, с таблицей
+  смещений; номера строк -1 (NO_STRING) - "нет значения";
+- имя комнаты ищется по хэш-таблице с открытой адресацией (CRC-32
+  имени), чтобы не строить словарь имён в каждом процессе;
+- таблица случайных событий - описание в JSON (события и метки
+  комнат); каждый процесс компилирует её сам.
+"""
+
+import json
+import zlib
+from abc import abstractmethod
+from array import array
+from collections.abc import Mapping
+from multiprocessing import resource_tracker, shared_memory
+
+from labyrinth_game.answers import compile_answers
+from labyrinth_game.constants import DIRECTIONS
+from labyrinth_game.events import EventTable
+from labyrinth_game.graph import DIRECTIONS_COUNT, WorldGraph
+from labyrinth_game.state import intern_item
+from labyrinth_game.world import NO_DIRECTION, NO_ITEMS
+
+MAGIC = b"LABWORLD"
+
+LAYOUT_VERSION = 2
+
+NO_STRING = -1
+
+NO_ROOM = -1
+
+RENDERED_LIMIT = 4096
+
+SECTIONS = (
+    ("exits", "i"),
+    ("exit_order", "B"),
+    ("name", "i"),
+    ("name_slots", "i"),
+    ("description", "i"),
+    ("question", "i"),
+    ("solution", "i"),
+    ("reward", "i"),
+    ("lock", "i"),
+    ("answer_offsets", "i"),
+    ("answer_strings", "i"),
+    ("item_offsets", "i"),
+    ("item_pairs", "i"),
+    ("item_names", "i"),
+    ("string_offsets", "q"),
+    ("strings", "B"),
+    ("events", "B"),
+)
+
+HEADER_BYTES = len(MAGIC) + 8 * (3 + 2 * len(SECTIONS))
+
+
+def name_hash(encoded):
+    """Вернуть хэш имени комнаты, одинаковый во всех процессах."""
+    return zlib.crc32(encoded)
+
+
+def pack_world(template):
+    """Упаковать шаблон мира в секции буфера.
+
+    Args:
+        template (WorldTemplate | ProceduralTemplate): Шаблон мира.
+            Процедурная карта строится целиком.
+
+    Returns:
+        tuple: (число комнат, стартовая комната, секции по порядку
+        SECTIONS - array или bytearray).
+    """
+    strings = {}
+
+    def string_id(text):
+        if text is None:
+            return NO_STRING
+        found = strings.get(text)
+        if found is None:
+            found = strings[text] = len(strings)
+        return found
+
+    names = template.names
+    graph = template.graph
+    count = len(names)
+    columns = {name: array(code) for name, code in SECTIONS}
+    exits = columns["exits"]
+    exit_order = bytearray([NO_DIRECTION]) * (count * DIRECTIONS_COUNT)
+    answer_strings = columns["answer_strings"]
+    item_pairs = columns["item_pairs"]
+    columns["answer_offsets"].append(0)
+    columns["item_offsets"].append(0)
+    # Порядок первого появления предметов - порядок world.intern_items().
+    item_names = {}
+
+    for room_id in range(count):
+        name = names[room_id]
+        room = template.rooms[name]
+        exits.extend(
+            graph.neighbor(room_id, direction_id)
+            for direction_id in range(DIRECTIONS_COUNT)
+        )
+        base = room_id * DIRECTIONS_COUNT
+        for offset, direction in enumerate(room["exits"]):
+            exit_order[base + offset] = DIRECTIONS.index(direction)
+        columns["name"].append(string_id(name))
+        columns["description"].append(string_id(room["description"]))
+        puzzle = room["puzzle"]
+        columns["question"].append(string_id(puzzle[0]) if puzzle else NO_STRING)
+        columns["solution"].append(string_id(puzzle[1]) if puzzle else NO_STRING)
+        columns["reward"].append(string_id(room.get("reward")))
+        columns["lock"].append(string_id(room.get("locked_by")))
+        answer_strings.extend(map(string_id, room.get("answers", ())))
+        columns["answer_offsets"].append(len(answer_strings))
+        for item_name, item_count in template.items.get(name, NO_ITEMS).items():
+            item_pairs.extend((string_id(item_name), item_count))
+            item_names.setdefault(item_name)
+        columns["item_offsets"].append(len(item_pairs) // 2)
+    for reward in template.rewards.values():
+        item_names.setdefault(reward)
+    columns["item_names"].extend(map(string_id, item_names))
+
+    size = 1 << max(1, (2 * count - 1).bit_length())
+    slots = array("i", [NO_ROOM]) * size
+    for room_id in range(count):
+        slot = name_hash(names[room_id].encode()) & (size - 1)
+        while slots[slot] != NO_ROOM:
+            slot = (slot + 1) & (size - 1)
+        slots[slot] = room_id
+    columns["name_slots"] = slots
+    columns["exit_order"] = exit_order
+
+    blob = bytearray()
+    string_offsets = columns["string_offsets"]
+    string_offsets.append(0)
+    for text in strings:
+        blob += text.encode()
+        string_offsets.append(len(blob))
+    columns["strings"] = blob
+    event_table = template.event_table
+    columns["events"] = json.dumps(
+        {"events": event_table.events, "tags": event_table.room_tags},
+        ensure_ascii=False,
+    ).encode()
+    return count, template.start_id, [columns[name] for name, _ in SECTIONS]
+
+
+def _layout(sections):
+    offset = HEADER_BYTES
+    placed = []
+    for values in sections:
+        placed.append((offset, len(values)))
+        offset += -(-memoryview(values).nbytes // 8) * 8
+    return offset, placed
+
+
+def packed_size(sections):
+    """Вернуть размер буфера для секций pack_world() в байтах."""
+    return _layout(sections)[0]
+
+
+def write_world(buffer, count, start_id, sections):
+    """Записать упакованный мир в буфер (размером не меньше packed_size()).
+
+    Args:
+        buffer (memoryview | bytearray | mmap): Буфер.
+        count (int): Число комнат.
+        start_id (int): Номер стартовой комнаты.
+        sections (list): Секции pack_world().
+    """
+    _, placed = _layout(sections)
+    header = array("q", [LAYOUT_VERSION, count, start_id])
+    for offset, length in placed:
+        header.extend((offset, length))
+    buffer[:len(MAGIC)] = MAGIC
+    buffer[len(MAGIC):HEADER_BYTES] = header.tobytes()
+    for (offset, _), values in zip(placed, sections, strict=True):
+        data = memoryview(values).cast("B")
+        buffer[offset:offset + len(data)] = data
+
+
+class WorldBuffer:
+    """Секции упакованного мира поверх буфера, без копирования.
+
+    Атрибуты с именами из SECTIONS - memoryview соответствующих секций.
+
+    Args:
+        buffer: Буфер с упакованным миром (см. write_world()).
+
+    Attributes:
+        room_count (int): Число комнат.
+        start_id (int): Номер стартовой комнаты.
+        slot_mask (int): Маска номера ячейки хэш-таблицы имён.
+
+    Raises:
+        ValueError: Если в буфере не упакованный мир этой версии формата.
+    """
+
+    __slots__ = ("room_count", "start_id", "slot_mask", *(name for name, _ in SECTIONS))
+
+    def __init__(self, buffer):
+        buffer = memoryview(buffer).cast("B")
+        if bytes(buffer[:len(MAGIC)]) != MAGIC:
+            raise ValueError("в буфере нет упакованного мира")
+        header = array("q", bytes(buffer[len(MAGIC):HEADER_BYTES]))
+        if header[0] != LAYOUT_VERSION:
+            raise ValueError(f"формат мира версии {header[0]}, нужна {LAYOUT_VERSION}")
+        self.room_count = header[1]
+        self.start_id = header[2]
+        for index, (name, code) in enumerate(SECTIONS):
+            offset, length = header[3 + 2 * index], header[4 + 2 * index]
+            size = length * array(code).itemsize
+            setattr(self, name, buffer[offset:offset + size].cast(code))
+        self.slot_mask = len(self.name_slots) - 1
+
+    def string(self, string_id):
+        """Вернуть строку по номеру."""
+        offsets = self.string_offsets
+        return str(self.strings[offsets[string_id]:offsets[string_id + 1]], "utf-8")
+
+    def room_name(self, room_id):
+        """Вернуть имя комнаты по номеру."""
+        return self.string(self.name[room_id])
+
+    def room_id(self, room_name):
+        """Вернуть номер комнаты по имени или None, если такой нет."""
+        encoded = room_name.encode("utf-8", "surrogatepass")
+        slots, mask = self.name_slots, self.slot_mask
+        names, offsets, strings = self.name, self.string_offsets, self.strings
+        slot = name_hash(encoded) & mask
+        while True:
+            room_id = slots[slot]
+            if room_id == NO_ROOM:
+                return None
+            string_id = names[room_id]
+            if strings[offsets[string_id]:offsets[string_id + 1]] == encoded:
+                return room_id
+            slot = (slot + 1) & mask
+
+    def release(self):
+        """Отпустить буфер (после этого чтение мира невозможно)."""
+        for name, _ in SECTIONS:
+            getattr(self, name).release()
+
+
+class SharedNames:
+    """Имена комнат по номерам: names[room_id] -> имя."""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        self.data = data
+
+    def __len__(self):
+        return self.data.room_count
+
+    def __getitem__(self, room_id):
+        if not 0 <= room_id < self.data.room_count:
+            raise IndexError(room_id)
+        return self.data.room_name(room_id)
+
+    def __iter__(self):
+        return map(self.data.room_name, range(self.data.room_count))
+
+
+class SharedIds:
+    """Номера комнат по именам: ids[имя] -> room_id."""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        self.data = data
+
+    def get(self, room_name, default=None):
+        """Вернуть номер комнаты или default, если такой комнаты нет."""
+        room_id = self.data.room_id(room_name)
+        return default if room_id is None else room_id
+
+    def __getitem__(self, room_name):
+        room_id = self.data.room_id(room_name)
+        if room_id is None:
+            raise KeyError(room_name)
+        return room_id
+
+    def __contains__(self, room_name):
+        return self.data.room_id(room_name) is not None
+
+
+class SharedField(Mapping):
+    """Словарь "имя комнаты -> значение" поверх секций буфера.
+
+    Значение собирается при каждом обращении; комнаты, у которых
+    значения нет (_value() вернул None), в словаре отсутствуют.
+    Подклассы задают _value(); Mapping - абстрактный класс, поэтому
+    без него подкласс нельзя создать.
+    """
+
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        self.data = data
+
+    @abstractmethod
+    def _value(self, room_id):
+        """Вернуть значение комнаты с номером room_id или None."""
+
+    def _present(self, room_id):
+        return self._value(room_id) is not None
+
+    def get(self, room_name, default=None):
+        """Вернуть значение по имени комнаты, как dict.get()."""
+        room_id = self.data.room_id(room_name)
+        if room_id is None:
+            return default
+        value = self._value(room_id)
+        return default if value is None else value
+
+    def __getitem__(self, room_name):
+        value = self.get(room_name)
+        if value is None:
+            raise KeyError(room_name)
+        return value
+
+    def __contains__(self, room_name):
+        return self.get(room_name) is not None
+
+    def __iter__(self):
+        data = self.data
+        for room_id in range(data.room_count):
+            if self._present(room_id):
+                yield data.room_name(room_id)
+
+    def __len__(self):
+        return sum(map(self._present, range(self.data.room_count)))
+
+
+class SharedRooms(SharedField):
+    """Комнаты в формате ROOMS (см. world.RoomTable)."""
+
+    __slots__ = ()
+
+    def _value(self, room_id):
+        data = self.data
+        string = data.string
+        base = room_id * DIRECTIONS_COUNT
+        exits = {}
+        for direction_id in data.exit_order[base:base + DIRECTIONS_COUNT]:
+            if direction_id == NO_DIRECTION:
+                break
+            exits[DIRECTIONS[direction_id]] = data.room_name(
+                data.exits[base + direction_id]
+            )
+        question = data.question[room_id]
+        room = {
+            "description": string(data.description[room_id]),
+            "exits": exits,
+            "items": [
+                string(data.item_pairs[2 * index])
+                for index in range(
+                    data.item_offsets[room_id], data.item_offsets[room_id + 1]
+                )
+                for _ in range(data.item_pairs[2 * index + 1])
+            ],
+            "puzzle": None if question == NO_STRING else (
+                string(question), string(data.solution[room_id])
+            ),
+        }
+        start, end = data.answer_offsets[room_id], data.answer_offsets[room_id + 1]
+        if start != end:
+            room["answers"] = tuple(map(string, data.answer_strings[start:end]))
+        if data.reward[room_id] != NO_STRING:
+            room["reward"] = string(data.reward[room_id])
+        if data.lock[room_id] != NO_STRING:
+            room["locked_by"] = string(data.lock[room_id])
+        return room
+
+    def _present(self, room_id):
+        return True
+
+    def __len__(self):
+        return self.data.room_count
+
+
+class SharedItems(SharedField):
+    """Исходные предметы комнат {предмет: количество} (см. WorldTemplate.items)."""
+
+    __slots__ = ()
+
+    def _value(self, room_id):
+        data = self.data
+        start, end = data.item_offsets[room_id], data.item_offsets[room_id + 1]
+        if start == end:
+            return None
+        pairs = data.item_pairs
+        return {
+            data.string(pairs[2 * index]): pairs[2 * index + 1]
+            for index in range(start, end)
+        }
+
+    def _present(self, room_id):
+        offsets = self.data.item_offsets
+        return offsets[room_id] != offsets[room_id + 1]
+
+
+class SharedAnswers(SharedField):
+    """Нормальные формы ответов на загадки (см. WorldTemplate.answers)."""
+
+    __slots__ = ()
+
+    def _value(self, room_id):
+        data = self.data
+        if data.question[room_id] == NO_STRING:
+            return None
+        start, end = data.answer_offsets[room_id], data.answer_offsets[room_id + 1]
+        answers = data.answer_strings[start:end] if start != end else (
+            data.solution[room_id],
+        )
+        return compile_answers(map(data.string, answers))
+
+    def _present(self, room_id):
+        return self.data.question[room_id] != NO_STRING
+
+
+class SharedColumn(SharedField):
+    """Строковое поле комнат: награды или замки (см. WorldTemplate.rewards)."""
+
+    __slots__ = ("column",)
+
+    def __init__(self, data, column):
+        super().__init__(data)
+        self.column = column
+
+    def _value(self, room_id):
+        string_id = self.column[room_id]
+        return None if string_id == NO_STRING else self.data.string(string_id)
+
+    def _present(self, room_id):
+        return self.column[room_id] != NO_STRING
+
+
+class SharedGraph(WorldGraph):
+    """Граф переходов с таблицей выходов в буфере (интерфейс WorldGraph)."""
+
+    __slots__ = ()
+
+    def __init__(self, names, ids, exits):
+        self.names = names
+        self.ids = ids
+        self.exits = exits
+
+
+class RenderCache(dict):
+    """Кэш описаний нетронутых комнат не больше limit записей.
+
+    Описания в буфер не попадают: каждый процесс собирает их сам,
+    поэтому кэш ограничен, чтобы память процесса не росла с картой.
+    """
+
+    __slots__ = ("limit",)
+
+    def __init__(self, limit=RENDERED_LIMIT):
+        super().__init__()
+        self.limit = limit
+
+    def __setitem__(self, room_name, text):
+        if len(self) >= self.limit:
+            del self[next(iter(self))]
+        super().__setitem__(room_name, text)
+
+
+class SharedTemplate:
+    """Шаблон мира поверх упакованного буфера (интерфейс WorldTemplate).
+
+    Args:
+        buffer: Буфер с упакованным миром (SharedMemory.buf, mmap, bytes).
+
+    Attributes:
+        data (WorldBuffer): Секции буфера.
+        rooms (SharedRooms): Данные комнат в формате ROOMS.
+        items (SharedItems): Исходные предметы комнат.
+        answers (SharedAnswers): Нормальные формы ответов на загадки.
+        rewards, locks (SharedColumn): Награды за загадки и замки комнат.
+        graph (SharedGraph): Граф переходов.
+        names (SharedNames): Имена комнат по номерам.
+        ids (SharedIds): Номера комнат по именам.
+        start_id (int): Номер стартовой комнаты.
+        rendered (RenderCache): Описания нетронутых комнат этого процесса.
+        event_table (EventTable): Случайные события мира.
+    """
+
+    __slots__ = (
+        "data", "rooms", "items", "answers", "rewards", "locks", "graph",
+        "names", "ids", "start_id", "rendered", "event_table",
+    )
+
+    def __init__(self, buffer):
+        data = self.data = WorldBuffer(buffer)
+        self.rooms = SharedRooms(data)
+        self.items = SharedItems(data)
+        self.answers = SharedAnswers(data)
+        self.rewards = SharedColumn(data, data.reward)
+        self.locks = SharedColumn(data, data.lock)
+        self.names = SharedNames(data)
+        self.ids = SharedIds(data)
+        self.graph = SharedGraph(self.names, self.ids, data.exits)
+        self.start_id = data.start_id
+        self.rendered = RenderCache()
+        for string_id in data.item_names:
+            intern_item(data.string(string_id))
+        events = json.loads(bytes(data.events))
+        self.event_table = EventTable(events["events"], events["tags"])
+        self.event_table.compile()
+
+
+class SharedWorld:
+    """Упакованный мир в блоке общей памяти.
+
+    Attributes:
+        memory (SharedMemory): Блок общей памяти.
+        template (SharedTemplate): Шаблон мира поверх блока.
+    """
+
+    __slots__ = ("memory", "template")
+
+    def __init__(self, memory):
+        self.memory = memory
+        self.template = SharedTemplate(memory.buf)
+
+    @property
+    def name(self):
+        """Имя блока общей памяти для attach_world()."""
+        return self.memory.name
+
+    def close(self):
+        """Отключиться от блока (шаблон после этого не читается)."""
+        self.template.data.release()
+        self.memory.close()
+
+    def unlink(self):
+        """Удалить блок из системы (после закрытия всеми процессами)."""
+        self.memory.unlink()
+
+
+def share_world(template, name=None):
+    """Упаковать шаблон мира в новый блок общей памяти.
+
+    Args:
+        template (WorldTemplate | ProceduralTemplate): Шаблон мира.
+        name (str | None): Имя блока; None - выбрать свободное.
+
+    Returns:
+        SharedWorld: Мир в общей памяти; создатель отвечает за unlink().
+    """
+    count, start_id, sections = pack_world(template)
+    memory = shared_memory.SharedMemory(
+        name=name, create=True, size=packed_size(sections)
+    )
+    write_world(memory.buf, count, start_id, sections)
+    return SharedWorld(memory)
+
+
+def attach_world(name):
+    """Подключиться к миру в общей памяти, созданному share_world().
+
+    Returns:
+        SharedWorld: Мир в общей памяти.
+    """
+    memory = shared_memory.SharedMemory(name=name)
+    # До Python 3.13 подключение тоже регистрирует блок в resource_tracker,
+    # и тот удалил бы блок при выходе этого процесса.
+    resource_tracker.unregister(memory._name, "shared_memory")
+    return SharedWorld(memory)
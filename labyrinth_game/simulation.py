@@ -0,0 +1,374 @@
+# labyrinth_game/simulation.py
+"""Пакетная симуляция игр без консольного ввода-вывода.
+
+Прогоняет партии через process_command() по сценарию или по
+стратегии (policy), раскладывает миллионы партий по процессам
+ProcessPoolExecutor и по мере готовности частей отдаёт сводную
+статистику: долю побед и смертей, распределение числа шагов,
+частоту потерь предметов и пропускную способность (партий в секунду
+на ядро). Стратегия lookahead проверяет каждый ход на дешёвом
+ответвлении партии (GameState.fork()).
+
+Пример:
+    python -m labyrinth_game.simulation --games 1000000 --policy random
+"""
+
+import argparse
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from labyrinth_game.main import new_game_state, process_command
+
+WALKTHROUGH = (
+    "east",
+    "solve",
+    "шаг шаг шаг",
+    "west",
+    "north",
+    "north",
+    "solve",
+    "да",
+    "10",
+)
+
+LOOKAHEAD_TRIES = 4
+
+
+def random_policy(game_state, rng, accuracy=0.5):
+    """Выбрать случайную допустимую команду.
+
+    На вопросы отвечает правильно с вероятностью accuracy,
+    на предложение ввести код от сундука всегда соглашается.
+
+    Args:
+        game_state (GameState): Состояние игры.
+        rng (random.Random): Генератор случайных чисел партии.
+        accuracy (float): Вероятность правильного ответа на загадку.
+
+    Returns:
+        str: Следующая команда.
+    """
+    world = game_state.world
+    room_name = game_state.current_room
+
+    match game_state.pending_prompt:
+        case "puzzle_answer":
+            if rng.random() < accuracy:
+                return world.puzzle(room_name)[1]
+            return "не знаю"
+        case "treasure_confirm":
+            return "да"
+        case "treasure_code":
+            puzzle = world.puzzle("treasure_room")
+            return puzzle[1] if puzzle else "0"
+
+    choices = list(world.exits(room_name))
+    choices.extend(
+        f"take {item}" for item in world.items(room_name) if item != "treasure_chest"
+    )
+    choices.extend(f"use {item}" for item in game_state.inventory_names())
+    if world.puzzle(room_name) or room_name == "treasure_room":
+        choices.append("solve")
+    return rng.choice(choices)
+
+
+def lookahead_policy(game_state, rng, accuracy=0.5, tries=LOOKAHEAD_TRIES):
+    """Выбрать случайную команду, проверив её на ответвлении партии.
+
+    Команда random_policy() сначала выполняется на копии партии
+    (GameState.fork()); если там теряется предмет или игрок гибнет,
+    выбирается другая, пока не кончатся попытки.
+
+    Args:
+        game_state (GameState): Состояние игры.
+        rng (random.Random): Генератор случайных чисел партии.
+        accuracy (float): Вероятность правильного ответа на загадку.
+        tries (int): Сколько команд проверить перед тем, как сдаться.
+
+    Returns:
+        str: Следующая команда.
+    """
+    command = random_policy(game_state, rng, accuracy)
+    for _ in range(tries):
+        branch = game_state.fork()
+        process_command(branch, command)
+        if branch.outcome != "death" and not any(
+            event[0] == "item_lost" for event in branch.events
+        ):
+            break
+        command = random_policy(game_state, rng, accuracy)
+    return command
+
+
+class ScriptedPolicy:
+    """Стратегия, которая отдаёт команды из заранее заданного сценария.
+
+    Attributes:
+        commands (tuple[str]): Команды сценария.
+    """
+
+    def __init__(self, commands):
+        self.commands = tuple(commands)
+
+    def __call__(self, game_state, rng):
+        """Вернуть следующую команду сценария или "quit" в конце."""
+        index = game_state.commands_issued
+        if index < len(self.commands):
+            return self.commands[index]
+        return "quit"
+
+
+POLICIES = {
+    "random": random_policy,
+    "lookahead": lookahead_policy,
+    "walkthrough": ScriptedPolicy(WALKTHROUGH),
+}
+
+
+def play_game(seed, policy, max_commands=500, legacy_rng=False):
+    """Сыграть одну партию без отрисовщика событий.
+
+    Args:
+        seed (int): Зерно партии: и стратегии, и случайных событий игры.
+        policy (callable): Стратегия policy(game_state, rng) -> команда.
+        max_commands (int): Предел числа команд; при его достижении
+            партия считается незавершённой ("timeout").
+        legacy_rng (bool): Брать события из прежнего синус-хэша
+            (одинакового для всех партий) вместо генератора с зерном.
+
+    Returns:
+        tuple: (исход, число шагов, список потерянных предметов).
+    """
+    rng = random.Random(seed)
+    game_state = new_game_state(seed=None if legacy_rng else seed, history=False)
+    lost_items = []
+
+    while not game_state.game_over:
+        if game_state.commands_issued >= max_commands:
+            game_state.outcome = "timeout"
+            break
+        command = policy(game_state, rng)
+        if process_command(game_state, command) is False:
+            game_state.game_over = True
+        for event in game_state.events:
+            if event[0] == "item_lost":
+                lost_items.append(event[1])
+
+    return game_state.outcome, game_state.steps_taken, lost_items
+
+
+class SimulationStats:
+    """Сводная статистика серии партий, которую можно объединять.
+
+    Attributes:
+        games (int): Число сыгранных партий.
+        outcomes (Counter): Исход -> число партий.
+        win_steps (Counter): Число шагов до победы -> число партий.
+        lost_items (Counter): Предмет -> сколько раз он был потерян.
+        cpu_seconds (float): Суммарное процессорное время рабочих процессов.
+    """
+
+    def __init__(self):
+        self.games = 0
+        self.outcomes = Counter()
+        self.win_steps = Counter()
+        self.lost_items = Counter()
+        self.cpu_seconds = 0.0
+
+    def record(self, outcome, steps, lost_items):
+        """Учесть результат одной партии."""
+        self.games += 1
+        self.outcomes[outcome] += 1
+        if outcome == "win":
+            self.win_steps[steps] += 1
+        self.lost_items.update(lost_items)
+
+    def merge(self, other):
+        """Добавить статистику другой серии партий."""
+        self.games += other.games
+        self.outcomes.update(other.outcomes)
+        self.win_steps.update(other.win_steps)
+        self.lost_items.update(other.lost_items)
+        self.cpu_seconds += other.cpu_seconds
+
+    def rate(self, outcome):
+        """Вернуть долю партий с данным исходом."""
+        return self.outcomes[outcome] / self.games if self.games else 0.0
+
+    def steps_percentile(self, fraction):
+        """Вернуть перцентиль числа шагов до победы."""
+        total = sum(self.win_steps.values())
+        threshold = fraction * total
+        seen = 0
+        for steps in sorted(self.win_steps):
+            seen += self.win_steps[steps]
+            if seen >= threshold:
+                return steps
+        return 0
+
+    def games_per_core_second(self):
+        """Вернуть пропускную способность: партий в секунду на одно ядро."""
+        return self.games / self.cpu_seconds if self.cpu_seconds else 0.0
+
+
+def run_shard(play, stats, first_seed, count, *args):
+    """Сыграть часть партий в рабочем процессе.
+
+    Args:
+        play (callable): play(stats, seed, *args) - сыграть партию с зерном
+            seed и учесть её в stats. Функция уровня модуля: в рабочий
+            процесс она передаётся по имени.
+        stats: Пустая статистика части (с полем cpu_seconds).
+        first_seed (int): Зерно первой партии; остальные идут подряд.
+        count (int): Число партий.
+        *args: Остальные аргументы play.
+
+    Returns:
+        Статистика этой части.
+    """
+    started = time.process_time()
+
+    for seed in range(first_seed, first_seed + count):
+        play(stats, seed, *args)
+
+    stats.cpu_seconds = time.process_time() - started
+    return stats
+
+
+def iter_shards(play, stats_type, count, workers, shard_size, first_seed, *args):
+    """Разложить партии по процессам частями, отдавая промежуточные итоги.
+
+    Общий механизм simulation и fuzz: зёрна first_seed..first_seed+count
+    делятся на части по shard_size, части играются run_shard()
+    в ProcessPoolExecutor, а их статистика объединяется merge()
+    по мере готовности.
+
+    Args:
+        play (callable): Партия, см. run_shard().
+        stats_type (type): Класс статистики с merge() и cpu_seconds.
+        count (int): Общее число партий.
+        workers (int | None): Число процессов. По умолчанию - число ядер.
+        shard_size (int): Партий в одной задаче рабочего процесса.
+        first_seed (int): Зерно первой партии.
+        *args: Остальные аргументы play.
+
+    Yields:
+        Накопленная статистика (stats_type) после каждой готовой части.
+    """
+    total = stats_type()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(
+                run_shard,
+                play,
+                stats_type(),
+                seed,
+                min(shard_size, first_seed + count - seed),
+                *args,
+            )
+            for seed in range(first_seed, first_seed + count, shard_size)
+        ]
+        for future in as_completed(futures):
+            total.merge(future.result())
+            yield total
+
+
+def record_game(stats, seed, policy_name, max_commands, legacy_rng):
+    """Сыграть партию и учесть её в статистике (см. run_shard())."""
+    stats.record(*play_game(seed, POLICIES[policy_name], max_commands, legacy_rng))
+
+
+def iter_batch(games, policy_name="random", workers=None, shard_size=10_000,
+               max_commands=500, first_seed=0, legacy_rng=False):
+    """Сыграть серию партий параллельно, отдавая промежуточные итоги.
+
+    Args:
+        games (int): Общее число партий.
+        policy_name (str): Имя стратегии из POLICIES.
+        workers (int | None): Число процессов. По умолчанию - число ядер.
+        shard_size (int): Партий в одной задаче рабочего процесса.
+        max_commands (int): Предел числа команд в партии.
+        first_seed (int): Зерно первой партии.
+        legacy_rng (bool): Использовать прежний синус-хэш событий.
+
+    Yields:
+        SimulationStats: Накопленная статистика после каждой готовой части.
+    """
+    yield from iter_shards(
+        record_game, SimulationStats, games, workers, shard_size, first_seed,
+        policy_name, max_commands, legacy_rng,
+    )
+
+
+def format_stats(stats, elapsed):
+    """Сформировать текстовый отчёт по статистике.
+
+    Args:
+        stats (SimulationStats): Статистика.
+        elapsed (float): Прошедшее время в секундах.
+
+    Returns:
+        str: Многострочный отчёт.
+    """
+    lines = [
+        f"Партий:             {stats.games}",
+        f"Побед:              {stats.rate('win'):.2%}",
+        f"Смертей:            {stats.rate('death'):.2%}",
+        f"Не завершено:       {stats.rate('timeout'):.2%}",
+        "Шагов до победы:    "
+        f"p50={stats.steps_percentile(0.5)} "
+        f"p90={stats.steps_percentile(0.9)} "
+        f"p99={stats.steps_percentile(0.99)}",
+        f"Партий в секунду:   {stats.games / elapsed if elapsed else 0:.0f}",
+        f"Партий/с на ядро:   {stats.games_per_core_second():.0f}",
+    ]
+    if stats.lost_items:
+        lost = ", ".join(
+            f"{item}={count / stats.games:.4f}"
+            for item, count in stats.lost_items.most_common()
+        )
+        lines.append(f"Потерь на партию:   {lost}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """Запустить симуляцию из командной строки."""
+    parser = argparse.ArgumentParser(description="Пакетная симуляция партий")
+    parser.add_argument("--games", type=int, default=100_000)
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="random")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--shard-size", type=int, default=10_000)
+    parser.add_argument("--max-commands", type=int, default=500)
+    parser.add_argument(
+        "--legacy-rng",
+        action="store_true",
+        help="события из прежнего синус-хэша, одинаковые во всех партиях",
+    )
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    stats = SimulationStats()
+    for stats in iter_batch(
+        args.games,
+        args.policy,
+        args.workers,
+        args.shard_size,
+        args.max_commands,
+        legacy_rng=args.legacy_rng,
+    ):
+        elapsed = time.perf_counter() - started
+        print(
+            f"\r{stats.games}/{args.games} партий, "
+            f"{stats.games / elapsed:.0f} партий/с",
+            end="",
+            flush=True,
+        )
+    print()
+    print(format_stats(stats, time.perf_counter() - started))
+
+
+if __name__ == "__main__":
+    main()
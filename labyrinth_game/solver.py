@@ -0,0 +1,886 @@
+# labyrinth_game/solver.py
+"""Поиск по пространству состояний игры: подсказки и проверка миров.
+
+Для решателя состояние игры - это комната, инвентарь, поднятые предметы
+и решённые загадки. Учитываются только предметы, от которых зависит
+исход: ключи запертых комнат, treasure_key, bronze_box (пока из неё
+можно достать rusty_key) и предмет, путь к которому ищут. Монеты,
+факел, меч и награды, которые ни к чему не подходят, на победу не
+влияют и пространство состояний не раздувают. Шкатулка выдаёт rusty_key
+один раз и остаётся в инвентаре, поэтому признак "шкатулка открыта"
+хранится битом над битами решённых загадок.
+
+Состояние упаковано в одно целое число: номер комнаты в младших битах,
+выше - маски инвентаря, поднятых предметов и решённых загадок. Поэтому
+множество посещённых состояний - словарь небольших int.
+
+- winning_route() - кратчайшая по числу введённых строк дорога
+  к победе. Поиск A* с эвристикой "расстояние до комнаты сокровищ
+  без учёта дверей"; таблица расстояний считается один раз на шаблон.
+- route_to() - путь до комнаты или предмета. В мире без запертых
+  дверей путь до комнаты ищется двунаправленным поиском в ширину,
+  а дерево обратного поиска от цели сохраняется: подсказки по дороге
+  к той же цели отвечают по готовому дереву, не повторяя поиск.
+- verify() - полный обход состояний с учётом потерь предметов
+  в ловушке. Доказывает, что мир проходим, и находит тупики:
+  потери и действия, после которых победа уже недостижима.
+
+Проверка файла мира: python -m labyrinth_game.solver world.json
+"""
+
+import heapq
+import sys
+from array import array
+from collections import deque
+from collections.abc import Mapping
+from functools import lru_cache
+
+from labyrinth_game.constants import DIRECTIONS
+from labyrinth_game.graph import DIRECTION_IDS, DIRECTIONS_COUNT, NO_EXIT, WorldGraph
+from labyrinth_game.render import format_step
+
+WIN_ROOM = "treasure_room"
+WIN_KEY = "treasure_key"
+CHEST = "treasure_chest"
+BOX_ITEM = "bronze_box"
+BOX_KEY = "rusty_key"
+TRAP_ROOM = "trap_room"
+CONFIRM = "да"
+
+OPPOSITE = tuple(
+    DIRECTION_IDS[name] for name in ("south", "north", "west", "east")
+)
+
+SEARCH_LIMIT = 2_000_000
+
+TREE_LIMIT = 500_000
+
+CACHE_SIZE = 8
+
+WON = -1
+
+
+class SolverModel:
+    """Мир в виде битовых масок для поиска по состояниям.
+
+    Args:
+        template (WorldTemplate | ProceduralTemplate): Шаблон мира.
+        targets (tuple[str]): Предметы, которые нужно отслеживать
+            помимо влияющих на победу (цели запросов "путь к предмету").
+
+    Attributes:
+        template: Шаблон мира.
+        graph: Граф переходов шаблона.
+        items (tuple[str]): Отслеживаемые предметы; маска предмета
+            равна 1 << индекс.
+        pickups (tuple): (номер комнаты, предмет) для отслеживаемых
+            предметов, лежащих в комнатах; подбор i - бит i маски
+            поднятого. Несколько экземпляров одного предмета в комнате
+            считаются одним подбором.
+        puzzles (tuple[str]): Комнаты с загадками, награда за которые
+            отслеживается; загадка i - бит i маски решённых.
+        obtainable (frozenset): Предметы, которые можно где-то получить.
+        locks (dict): Номер комнаты -> маска предмета-ключа.
+        room_pickups (dict): Номер комнаты -> [(бит подбора, маска
+            предмета, команда)].
+        room_puzzles (dict): Номер комнаты -> (бит загадки, маска
+            награды, ответ).
+        win_id, trap_id (int | None): Номера комнаты сокровищ и ловушки.
+        win_code (str | None): Код сундука.
+        win_key, box, box_key (int): Маски treasure_key, bronze_box
+            и rusty_key (0, если предмет не отслеживается).
+        box_spent (int): Бит "шкатулка открыта" в маске решённого
+            (0, если шкатулка не отслеживается).
+        room_mask (int): Маска номера комнаты в ключе состояния.
+        inventory_shift, taken_shift, solved_shift (int): Сдвиги масок.
+    """
+
+    __slots__ = (
+        "template", "graph", "items", "pickups", "puzzles", "obtainable",
+        "locks", "room_pickups", "room_puzzles", "win_id", "trap_id",
+        "win_code", "win_key", "box", "box_key", "box_spent", "room_mask",
+        "inventory_shift", "taken_shift", "solved_shift",
+    )
+
+    def __init__(self, template, targets=()):
+        self.template = template
+        self.graph = template.graph
+        ids = template.ids
+
+        relevant = {*template.locks.values(), WIN_KEY, *targets}
+        if BOX_KEY in relevant:
+            relevant.add(BOX_ITEM)
+        relevant.discard(CHEST)
+
+        # У процедурной карты предметы комнат не перечислить: ключей
+        # и наград в ней нет, а монеты и факелы для поиска не важны.
+        pickups = []
+        if isinstance(template.items, Mapping):
+            pickups = [
+                (ids[room_name], item_name)
+                for room_name, room_items in template.items.items()
+                for item_name in room_items
+                if item_name in relevant
+            ]
+        puzzles = [
+            (room_name, reward)
+            for room_name, reward in template.rewards.items()
+            if reward in relevant
+            and room_name != WIN_ROOM
+            and template.rooms[room_name]["puzzle"]
+        ]
+        obtainable = {item_name for _, item_name in pickups}
+        obtainable.update(reward for _, reward in puzzles)
+        if BOX_ITEM in obtainable:
+            obtainable.add(BOX_KEY)
+            relevant.add(BOX_KEY)
+
+        self.items = tuple(sorted(relevant))
+        masks = {item_name: 1 << index for index, item_name in enumerate(self.items)}
+        self.pickups = tuple(pickups)
+        self.puzzles = tuple(room_name for room_name, _ in puzzles)
+        self.obtainable = frozenset(obtainable)
+        self.locks = {
+            ids[room_name]: masks[item_name]
+            for room_name, item_name in template.locks.items()
+        }
+
+        self.room_pickups = {}
+        for index, (room_id, item_name) in enumerate(pickups):
+            self.room_pickups.setdefault(room_id, []).append(
+                (1 << index, masks[item_name], f"take {item_name}")
+            )
+        self.room_puzzles = {}
+        for index, (room_name, reward) in enumerate(puzzles):
+            room = template.rooms[room_name]
+            answer = room.get("answers", (room["puzzle"][1],))[0]
+            self.room_puzzles[ids[room_name]] = (1 << index, masks[reward], answer)
+
+        self.win_id = ids.get(WIN_ROOM)
+        self.trap_id = ids.get(TRAP_ROOM)
+        self.win_code = None
+        if self.win_id is not None:
+            puzzle = template.rooms[WIN_ROOM]["puzzle"]
+            if puzzle:
+                self.win_code = puzzle[1]
+        self.win_key = masks.get(WIN_KEY, 0)
+        self.box = masks.get(BOX_ITEM, 0)
+        self.box_key = masks.get(BOX_KEY, 0)
+        self.box_spent = 1 << len(self.puzzles) if self.box else 0
+
+        room_bits = max(1, (len(self.graph) - 1).bit_length())
+        self.room_mask = (1 << room_bits) - 1
+        self.inventory_shift = room_bits
+        self.taken_shift = room_bits + len(self.items)
+        self.solved_shift = self.taken_shift + len(self.pickups)
+
+    def pack(self, room_id, inventory, taken, solved):
+        """Упаковать состояние в целое число."""
+        return (
+            room_id
+            | inventory << self.inventory_shift
+            | taken << self.taken_shift
+            | solved << self.solved_shift
+        )
+
+    def unpack(self, key):
+        """Вернуть (комната, инвентарь, поднятое, решённое) по ключу."""
+        return (
+            key & self.room_mask,
+            (key >> self.inventory_shift) & ((1 << len(self.items)) - 1),
+            (key >> self.taken_shift) & ((1 << len(self.pickups)) - 1),
+            key >> self.solved_shift,
+        )
+
+    def start_key(self):
+        """Вернуть ключ начального состояния мира."""
+        return self.pack(self.template.start_id, 0, 0, 0)
+
+    def key_of(self, game_state):
+        """Вернуть ключ состояния текущей сессии.
+
+        Args:
+            game_state (GameState): Состояние игры.
+
+        Returns:
+            int: Ключ состояния.
+        """
+        world = game_state.world
+        names = self.template.names
+        base_items = self.template.items
+        inventory = 0
+        for index, item_name in enumerate(self.items):
+            if game_state.has_item(item_name):
+                inventory |= 1 << index
+        taken = 0
+        for index, (room_id, item_name) in enumerate(self.pickups):
+            room_name = names[room_id]
+            placed = base_items[room_name][item_name]
+            if world.item_count(room_name, item_name) < placed:
+                taken |= 1 << index
+        solved = 0
+        for index, room_name in enumerate(self.puzzles):
+            if world.puzzle(room_name) is None:
+                solved |= 1 << index
+        if game_state.is_spent(BOX_ITEM):
+            solved |= self.box_spent
+        return self.pack(game_state.room_id, inventory, taken, solved)
+
+    def successors(self, key):
+        """Вернуть действия игрока из состояния.
+
+        Returns:
+            list[tuple]: Пары (шаг, новый ключ); шаг - кортеж строк,
+            которые вводятся подряд (команда и ответы на её вопросы).
+        """
+        room_id, inventory, taken, solved = self.unpack(key)
+        result = []
+        locks = self.locks
+        for direction_id, target in self.graph.neighbors(room_id):
+            lock = locks.get(target)
+            if lock is None or inventory & lock:
+                result.append(((DIRECTIONS[direction_id],), key - room_id + target))
+        for taken_bit, item, command in self.room_pickups.get(room_id, ()):
+            if not taken & taken_bit:
+                result.append(
+                    ((command,), self.pack(
+                        room_id, inventory | item, taken | taken_bit, solved
+                    ))
+                )
+        puzzle = self.room_puzzles.get(room_id)
+        if puzzle is not None and not solved & puzzle[0]:
+            solved_bit, reward, answer = puzzle
+            result.append(
+                (("solve", answer), self.pack(
+                    room_id, inventory | reward, taken, solved | solved_bit
+                ))
+            )
+        if (
+            inventory & self.box
+            and not inventory & self.box_key
+            and not solved & self.box_spent
+        ):
+            result.append(
+                ((f"use {BOX_ITEM}",), self.pack(
+                    room_id, inventory | self.box_key, taken, solved | self.box_spent
+                ))
+            )
+        return result
+
+    def sources(self, item):
+        """Вернуть номера комнат, где можно получить предмет с маской item.
+
+        Для rusty_key это и комнаты, где лежит bronze_box: шкатулка
+        выдаёт ключ там же, где её подняли.
+        """
+        rooms = {
+            room_id
+            for room_id, pickups in self.room_pickups.items()
+            for _, mask, _ in pickups
+            if mask & item or (item == self.box_key and mask & self.box)
+        }
+        rooms.update(
+            room_id
+            for room_id, (_, reward, _) in self.room_puzzles.items()
+            if reward & item or (item == self.box_key and reward & self.box)
+        )
+        return tuple(sorted(rooms))
+
+    def finish(self, key):
+        """Вернуть шаг, открывающий сундук из состояния, или None."""
+        if key & self.room_mask != self.win_id:
+            return None
+        if key >> self.inventory_shift & self.win_key:
+            return ("solve",)
+        if self.win_code is not None:
+            return ("solve", CONFIRM, self.win_code)
+        return None
+
+    def losses(self, key):
+        """Вернуть пары (предмет, новый ключ) для потерь в ловушке.
+
+        Ловушка срабатывает только в trap_room (неверный ответ или
+        случайное событие) и отнимает любой из предметов инвентаря.
+        """
+        room_id, inventory, taken, solved = self.unpack(key)
+        if room_id != self.trap_id:
+            return []
+        return [
+            (item_name, self.pack(room_id, inventory & ~(1 << index), taken, solved))
+            for index, item_name in enumerate(self.items)
+            if inventory >> index & 1
+        ]
+
+    def describe(self, key):
+        """Описать состояние для отчёта."""
+        room_id, inventory, taken, solved = self.unpack(key)
+        held = [name for index, name in enumerate(self.items) if inventory >> index & 1]
+        parts = [f"{self.template.names[room_id]}, инвентарь: {', '.join(held) or '-'}"]
+        if taken:
+            parts.append("поднято: " + ", ".join(
+                f"{item_name} ({self.template.names[room_id]})"
+                for index, (room_id, item_name) in enumerate(self.pickups)
+                if taken >> index & 1
+            ))
+        if solved & ~self.box_spent:
+            parts.append("решено: " + ", ".join(
+                room_name
+                for index, room_name in enumerate(self.puzzles)
+                if solved >> index & 1
+            ))
+        if solved & self.box_spent:
+            parts.append("шкатулка открыта")
+        return "; ".join(parts)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def model_for(template, target=None):
+    """Вернуть модель шаблона (с отслеживанием предмета target)."""
+    return SolverModel(template, () if target is None else (target,))
+
+
+class Predecessors:
+    """Обратные рёбра WorldGraph в сжатом виде (CSR).
+
+    Входящие рёбра комнаты room - позиции offsets[room]..offsets[room + 1]
+    массивов sources (откуда) и moves (номер направления).
+    """
+
+    __slots__ = ("offsets", "sources", "moves")
+
+    def __init__(self, graph):
+        exits = graph.exits
+        offsets = array("i", [0]) * (len(graph) + 1)
+        for target in exits:
+            if target != NO_EXIT:
+                offsets[target + 1] += 1
+        for room_id in range(len(graph)):
+            offsets[room_id + 1] += offsets[room_id]
+        sources = array("i", [0]) * offsets[-1]
+        moves = bytearray(offsets[-1])
+        fill = array("i", offsets)
+        for cell, target in enumerate(exits):
+            if target != NO_EXIT:
+                position = fill[target]
+                sources[position], moves[position] = divmod(cell, DIRECTIONS_COUNT)
+                fill[target] = position + 1
+        self.offsets = offsets
+        self.sources = sources
+        self.moves = moves
+
+    def __call__(self, room_id):
+        """Вернуть пары (направление, комната, из которой оно ведёт в room_id)."""
+        start, end = self.offsets[room_id], self.offsets[room_id + 1]
+        return list(zip(self.moves[start:end], self.sources[start:end]))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def predecessors_of(graph):
+    """Вернуть функцию обратных рёбер графа.
+
+    Проходы процедурной карты симметричны, поэтому для неё обратные
+    рёбра - это соседи с противоположными направлениями.
+    """
+    if isinstance(graph, WorldGraph):
+        return Predecessors(graph)
+
+    def predecessors(room_id):
+        return [
+            (OPPOSITE[direction_id], target)
+            for direction_id, target in graph.neighbors(room_id)
+        ]
+
+    return predecessors
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def distances_to(graph, goal_id):
+    """Посчитать расстояния (в переходах) от всех комнат до goal_id.
+
+    Двери не учитываются, поэтому расстояние - нижняя оценка для A*.
+
+    Returns:
+        array: Расстояние по номеру комнаты, NO_EXIT для комнат,
+        из которых до цели не дойти.
+    """
+    predecessors = predecessors_of(graph)
+    offsets, sources = predecessors.offsets, predecessors.sources
+    distances = array("i", [NO_EXIT]) * len(graph)
+    distances[goal_id] = 0
+    queue = deque([goal_id])
+    while queue:
+        room_id = queue.popleft()
+        distance = distances[room_id] + 1
+        for position in range(offsets[room_id], offsets[room_id + 1]):
+            source = sources[position]
+            if distances[source] == NO_EXIT:
+                distances[source] = distance
+                queue.append(source)
+    return distances
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def distances_via(graph, goal_id, sources):
+    """Посчитать длину кратчайшего пути до goal_id через одну из sources.
+
+    Это нижняя оценка для состояний без ключа от комнаты goal_id:
+    сначала нужно зайти за ключом, потом идти к цели. Поиск в ширину
+    от всех sources сразу, где у каждой начальное расстояние - её
+    расстояние до цели; источники вводятся в очередь по возрастанию
+    этого расстояния, так что очередь остаётся упорядоченной.
+
+    Returns:
+        array: Расстояние по номеру комнаты или NO_EXIT.
+    """
+    direct = distances_to(graph, goal_id)
+    predecessors = predecessors_of(graph)
+    offsets, sources_of = predecessors.offsets, predecessors.sources
+    pending = deque(sorted(
+        (direct[room_id], room_id) for room_id in sources
+        if direct[room_id] != NO_EXIT
+    ))
+    distances = array("i", [NO_EXIT]) * len(graph)
+    queue = deque()
+    while queue or pending:
+        if pending and (not queue or pending[0][0] <= distances[queue[0]]):
+            distance, room_id = pending.popleft()
+            if distances[room_id] == NO_EXIT:
+                distances[room_id] = distance
+                queue.append(room_id)
+            continue
+        room_id = queue.popleft()
+        distance = distances[room_id] + 1
+        for position in range(offsets[room_id], offsets[room_id + 1]):
+            source = sources_of[position]
+            if distances[source] == NO_EXIT:
+                distances[source] = distance
+                queue.append(source)
+    return distances
+
+
+class GoalTree:
+    """Растущее дерево обратного поиска в ширину от целевой комнаты.
+
+    Attributes:
+        goal (int): Номер целевой комнаты.
+        hops (dict): Комната -> (направление, следующая комната на пути
+            к цели, расстояние до цели) для всех комнат раскрытых слоёв.
+        frontier (list[int]): Последний раскрытый слой.
+        shortcuts (dict): То же для комнат на уже найденных путях
+            вне раскрытых слоёв. Хранятся отдельно от hops: иначе
+            при раскрытии слоя такая комната считалась бы уже
+            пройденной и слой получился бы неполным.
+    """
+
+    __slots__ = ("goal", "hops", "frontier", "shortcuts")
+
+    def __init__(self, goal_id):
+        self.goal = goal_id
+        self.hops = {goal_id: (None, None, 0)}
+        self.frontier = [goal_id]
+        self.shortcuts = {}
+
+    def __contains__(self, room_id):
+        return room_id in self.hops or room_id in self.shortcuts
+
+    def expand(self, predecessors):
+        """Раскрыть следующий слой и вернуть его."""
+        hops = self.hops
+        layer = []
+        for room_id in self.frontier:
+            distance = hops[room_id][2] + 1
+            for direction_id, source in predecessors(room_id):
+                if source not in hops:
+                    hops[source] = (direction_id, room_id, distance)
+                    layer.append(source)
+        self.frontier = layer
+        return layer
+
+    def remember(self, rooms, path):
+        """Запомнить найденный путь до комнаты дерева.
+
+        Args:
+            rooms (list[int]): Комнаты пути по порядку; последняя
+                уже в раскрытых слоях.
+            path (list[int]): Номера направлений между ними.
+        """
+        hops = self.hops
+        total = len(path) + hops[rooms[-1]][2]
+        for index, direction_id in enumerate(path):
+            room_id = rooms[index]
+            if room_id not in hops:
+                self.shortcuts[room_id] = (
+                    direction_id, rooms[index + 1], total - index
+                )
+
+    def path_from(self, room_id):
+        """Вернуть номера направлений от room_id (уже в дереве) до цели."""
+        path = []
+        hops = self.hops
+        shortcuts = self.shortcuts
+        while room_id != self.goal:
+            direction_id, room_id, _ = hops.get(room_id) or shortcuts[room_id]
+            path.append(direction_id)
+        return path
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def goal_tree(graph, goal_id):
+    """Вернуть сохраняемое дерево обратного поиска к комнате goal_id."""
+    return GoalTree(goal_id)
+
+
+def bidirectional_path(graph, start_id, goal_id):
+    """Найти кратчайший путь двунаправленным поиском в ширину.
+
+    Слои раскрываются целиком, каждый раз с той стороны, где слой
+    меньше; как только слои встречаются, путь через любую общую
+    комнату кратчайший. Обратная сторона - дерево goal_tree(),
+    которое переживает запрос; найденный путь дописывается в него,
+    поэтому подсказки из любой комнаты этого пути (и из раскрытых
+    слоёв) читаются по дереву без поиска.
+
+    Args:
+        graph: Граф переходов (WorldGraph или ProceduralGraph).
+        start_id (int): Номер начальной комнаты.
+        goal_id (int): Номер целевой комнаты.
+
+    Returns:
+        list[int] | None: Номера направлений или None, если цель
+        недостижима или поиск превысил SEARCH_LIMIT комнат.
+    """
+    tree = goal_tree(graph, goal_id)
+    if start_id in tree:
+        return tree.path_from(start_id)
+
+    predecessors = predecessors_of(graph)
+    parents = {start_id: None}
+    frontier = [start_id]
+    while frontier and tree.frontier:
+        if len(tree.frontier) < len(frontier) and len(tree.hops) < TREE_LIMIT:
+            meeting = [room_id for room_id in tree.expand(predecessors)
+                       if room_id in parents]
+        else:
+            layer = []
+            for room_id in frontier:
+                for direction_id, target in graph.neighbors(room_id):
+                    if target not in parents:
+                        parents[target] = (room_id, direction_id)
+                        layer.append(target)
+            frontier = layer
+            if len(parents) > SEARCH_LIMIT:
+                return None
+            meeting = [room_id for room_id in layer if room_id in tree.hops]
+        if meeting:
+            rooms, path = _forward_path(parents, meeting[0])
+            tree.remember(rooms, path)
+            return path + tree.path_from(meeting[0])
+    return None
+
+
+def _forward_path(parents, room_id):
+    rooms = [room_id]
+    path = []
+    while parents[room_id] is not None:
+        room_id, direction_id = parents[room_id]
+        rooms.append(room_id)
+        path.append(direction_id)
+    rooms.reverse()
+    path.reverse()
+    return rooms, path
+
+
+def search(model, start, finish, heuristic):
+    """Найти кратчайшую дорогу A* по числу введённых строк.
+
+    Args:
+        model (SolverModel): Модель мира.
+        start (int): Ключ начального состояния.
+        finish (callable): finish(key) -> завершающий шаг (кортеж,
+            возможно пустой) или None, если цель отсюда не достигается
+            одним шагом.
+        heuristic (callable): heuristic(key) -> нижняя оценка
+            оставшихся строк или None, если цель из состояния
+            заведомо недостижима.
+
+    Returns:
+        list[tuple] | None: Шаги по порядку или None.
+    """
+    estimate = heuristic(start)
+    if estimate is None:
+        return None
+    costs = {start: 0}
+    parents = {start: None}
+    heap = [(estimate, 0, start)]
+    while heap:
+        _, negative_cost, key = heapq.heappop(heap)
+        cost = -negative_cost
+        if key == WON:
+            return _trace_steps(parents)
+        if cost > costs[key]:
+            continue
+        last = finish(key)
+        if last is not None:
+            total = cost + len(last)
+            if total < costs.get(WON, total + 1):
+                costs[WON] = total
+                parents[WON] = (key, last)
+                heapq.heappush(heap, (total, -total, WON))
+        for step, target in model.successors(key):
+            new_cost = cost + len(step)
+            if new_cost >= costs.get(target, new_cost + 1):
+                continue
+            estimate = heuristic(target)
+            if estimate is None:
+                continue
+            costs[target] = new_cost
+            parents[target] = (key, step)
+            heapq.heappush(heap, (new_cost + estimate, -new_cost, target))
+        if len(costs) > SEARCH_LIMIT:
+            return None
+    return None
+
+
+def _trace_steps(parents):
+    steps = []
+    key = WON
+    while parents[key] is not None:
+        key, step = parents[key]
+        if step:
+            steps.append(step)
+    steps.reverse()
+    return steps
+
+
+def winning_route(model, key):
+    """Найти кратчайшую дорогу к победе из состояния key.
+
+    Эвристика A* - расстояние до комнаты сокровищ плюс наименьшее
+    число строк, открывающих сундук, а пока нет ключа от комнаты -
+    расстояние через ближайшее место, где ключ можно получить,
+    и ещё команда на это.
+
+    Returns:
+        list[tuple] | None: Шаги или None, если победа недостижима.
+    """
+    if model.win_id is None:
+        return None
+    if isinstance(model.graph, WorldGraph):
+        direct = distances_to(model.graph, model.win_id)
+        via = direct
+        carried = 0
+        lock = model.locks.get(model.win_id)
+        if lock is not None:
+            via = distances_via(model.graph, model.win_id, model.sources(lock))
+            carried = lock | (model.box if lock == model.box_key else 0)
+        carried <<= model.inventory_shift
+        room_mask = model.room_mask
+        win_key = model.win_key << model.inventory_shift
+        # Без treasure_key сундук открывает код (3 строки) или ключ,
+        # который ещё нужно получить (хотя бы 1 строка + solve).
+        opening = 3 if model.win_code is not None else SEARCH_LIMIT
+        if WIN_KEY in model.obtainable:
+            opening = 2
+
+        def heuristic(state):
+            last = 1 if state & win_key else opening
+            if state & carried or lock is None:
+                distance = direct[state & room_mask]
+            else:
+                # Ключ от комнаты ещё нужно получить - хотя бы одна команда.
+                distance = via[state & room_mask] + 1
+            return None if distance < 0 else distance + last
+
+    else:
+
+        def heuristic(state):
+            return 0
+
+    return search(model, key, model.finish, heuristic)
+
+
+def route_to(model, key, target):
+    """Найти кратчайшую дорогу до комнаты или предмета.
+
+    Args:
+        model (SolverModel): Модель, отслеживающая предмет target.
+        key (int): Ключ текущего состояния.
+        target (str): Имя комнаты или предмета.
+
+    Returns:
+        list[tuple] | None: Шаги (пустой список - цель уже достигнута)
+        или None, если цель недостижима.
+
+    Raises:
+        KeyError: Если такой комнаты нет и предмет нигде не получить.
+    """
+    goal_id = model.template.ids.get(target)
+    if goal_id is not None:
+        if not model.locks:
+            path = bidirectional_path(model.graph, key & model.room_mask, goal_id)
+            if path is None:
+                return None
+            return [(DIRECTIONS[direction_id],) for direction_id in path]
+
+        def finish(state):
+            return () if state & model.room_mask == goal_id else None
+
+    elif target in model.obtainable:
+        mask = 1 << (model.items.index(target) + model.inventory_shift)
+
+        def finish(state):
+            return () if state & mask else None
+
+    else:
+        raise KeyError(target)
+
+    return search(model, key, finish, lambda state: 0)
+
+
+class Verdict:
+    """Итог проверки мира.
+
+    Attributes:
+        winnable (bool): Победа достижима из начального состояния.
+        route (list[tuple] | None): Кратчайшая дорога к победе.
+        states (int): Сколько состояний обойдено.
+        complete (bool): Обход не упёрся в SEARCH_LIMIT.
+        dead_ends (list[tuple]): (ключ состояния, причина, ключ после
+            неё): шаг или потеря, после которых победа недостижима,
+            хотя до них была достижима.
+        reached (dict): Ключи обойдённых состояний (значения не нужны).
+        alive (set[int]): Выигрышные состояния среди обойдённых.
+    """
+
+    __slots__ = (
+        "winnable", "route", "states", "complete", "dead_ends", "reached", "alive"
+    )
+
+    def __init__(self, winnable, route, states, complete, dead_ends, reached, alive):
+        self.winnable = winnable
+        self.route = route
+        self.states = states
+        self.complete = complete
+        self.dead_ends = dead_ends
+        self.reached = reached
+        self.alive = alive
+
+
+def verify(template, limit=SEARCH_LIMIT):
+    """Обойти все достижимые состояния мира и найти тупики.
+
+    Обход учитывает и действия игрока, и потери предметов в ловушке.
+    Состояние выигрышное, если из него есть дорога к победе из одних
+    действий игрока; выигрышные состояния собираются обратным обходом
+    от тех, где открывается сундук.
+
+    Args:
+        template (WorldTemplate): Шаблон мира.
+        limit (int): Наибольшее число состояний в обходе.
+
+    Returns:
+        Verdict: Итог проверки.
+    """
+    model = SolverModel(template)
+    start = model.start_key()
+    seen = {start: None}
+    incoming = {}
+    winning = []
+    queue = deque([start])
+    complete = True
+    while queue:
+        if len(seen) > limit:
+            complete = False
+            break
+        key = queue.popleft()
+        if model.finish(key) is not None:
+            winning.append(key)
+        for _, target, by_player in _transitions(model, key):
+            if by_player:
+                incoming.setdefault(target, []).append(key)
+            if target not in seen:
+                seen[target] = None
+                queue.append(target)
+
+    alive = set(winning)
+    stack = list(winning)
+    while stack:
+        for source in incoming.get(stack.pop(), ()):
+            if source not in alive:
+                alive.add(source)
+                stack.append(source)
+
+    dead_ends = [
+        (key, cause, target)
+        for key in seen
+        if key in alive
+        for cause, target, _ in _transitions(model, key)
+        if target in seen and target not in alive
+    ]
+    route = winning_route(model, start) if start in alive or not complete else None
+    return Verdict(
+        route is not None, route, len(seen), complete, dead_ends, seen, alive
+    )
+
+
+def _transitions(model, key):
+    transitions = [
+        (format_step(step), target, True) for step, target in model.successors(key)
+    ]
+    transitions.extend(
+        (f"потеря {item_name}", target, False)
+        for item_name, target in model.losses(key)
+    )
+    return transitions
+
+
+def main(argv=None):
+    """Проверить, что мир из файла (или встроенный) проходим.
+
+    Args:
+        argv (list[str] | None): Аргументы командной строки.
+
+    Returns:
+        int: Код выхода: 0 - мир проходим, 1 - победа недостижима,
+        2 - мир не загружается.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Проверка проходимости мира")
+    parser.add_argument("path", nargs="?", help="файл мира (.json или .toml)")
+    parser.add_argument(
+        "--dead-ends", type=int, default=10, metavar="N",
+        help="сколько тупиков показать (по умолчанию 10)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.path is None:
+        from labyrinth_game.world import DEFAULT_TEMPLATE as template
+    else:
+        from labyrinth_game.loader import WorldDataError, load_world
+
+        try:
+            template = load_world(args.path)
+        except (OSError, WorldDataError) as error:
+            print(f"Ошибка: {error}", file=sys.stderr)
+            return 2
+
+    verdict = verify(template)
+    model = SolverModel(template)
+    print(f"Состояний: {verdict.states}"
+          + ("" if verdict.complete else " (обход прерван по пределу)"))
+    if verdict.route is None:
+        print("Победа недостижима.")
+    else:
+        commands = sum(len(step) for step in verdict.route)
+        print(f"Мир проходим: победа за {commands} команд.")
+        for step in verdict.route:
+            print(f"  {format_step(step)}")
+    print(f"Тупиков: {len(verdict.dead_ends)}")
+    for key, cause, _ in verdict.dead_ends[:args.dead_ends]:
+        print(f"  {model.describe(key)}: {cause}")
+    return 0 if verdict.winnable else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,327 @@
+# labyrinth_game/state.py
+"""Компактное состояние игровой сессии.
+
+GameState хранит поля в __slots__, текущую комнату - целым номером,
+а инвентарь - битовой маской интернированных предметов плюс одним целым
+числом со счётчиками складываемых предметов (монет), по COUNT_BITS бит
+на предмет. Проверка "есть ли предмет" - это одна битовая операция
+вместо прохода по списку.
+
+Порядок, в котором игрок получал предметы, хранится отдельно строкой:
+символ chr(номер) на каждый экземпляр, по байту на предмет в обычном
+мире. По этому порядку инвентарь выводится, а ловушка выбирает
+предмет по месту, как в прежнем списке player_inventory: сессии
+в режиме совместимости (rng.SinHashRNG) повторяются в точности.
+Повторы сохраняются так же, как в списке: rusty_key, поднятый
+в trap_room и полученный за её загадку, лежит в инвентаре дважды.
+
+Для прежнего кода, работавшего со словарём состояния, GameState
+поддерживает доступ по ключам: game_state["current_room"],
+game_state["player_inventory"] (списочное представление инвентаря) и т.д.
+"""
+
+from labyrinth_game.constants import ROOMS, STACKABLE_ITEMS
+
+ITEM_IDS = {}
+ITEM_NAMES = []
+
+
+def intern_item(item_name):
+    """Вернуть номер предмета, присвоив новый при первом обращении.
+
+    Args:
+        item_name (str): Название предмета.
+
+    Returns:
+        int: Номер бита предмета в маске инвентаря.
+    """
+    item_id = ITEM_IDS.get(item_name)
+    if item_id is None:
+        item_id = len(ITEM_NAMES)
+        ITEM_IDS[item_name] = item_id
+        ITEM_NAMES.append(item_name)
+    return item_id
+
+
+for _room in ROOMS.values():
+    for _item_name in _room["items"]:
+        intern_item(_item_name)
+for _room in ROOMS.values():
+    if "reward" in _room:
+        intern_item(_room["reward"])
+for _item_name in sorted(STACKABLE_ITEMS):
+    intern_item(_item_name)
+
+STACKABLE_MASK = sum(1 << intern_item(item_name) for item_name in STACKABLE_ITEMS)
+
+COUNT_BITS = 32
+COUNT_MASK = (1 << COUNT_BITS) - 1
+STACKABLE_SHIFTS = {
+    ITEM_IDS[item_name]: slot * COUNT_BITS
+    for slot, item_name in enumerate(sorted(STACKABLE_ITEMS))
+}
+
+
+class InventoryView:
+    """Списочное представление инвентаря для прежнего кода.
+
+    Поддерживает in, len, итерацию, append, remove и pop(index);
+    все операции меняют инвентарь исходного GameState.
+    """
+
+    __slots__ = ("state",)
+
+    def __init__(self, state):
+        self.state = state
+
+    def __contains__(self, item_name):
+        return self.state.has_item(item_name)
+
+    def __iter__(self):
+        return self.state.inventory_items()
+
+    def __len__(self):
+        return self.state.inventory_size()
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def append(self, item_name):
+        self.state.add_item(item_name)
+
+    def remove(self, item_name):
+        if not self.state.remove_item(item_name):
+            raise ValueError(f"{item_name!r} is not in inventory")
+
+    def pop(self, index=-1):
+        return self.state.remove_at(index)
+
+
+class GameState:
+    """Состояние одной игровой сессии.
+
+    Attributes:
+        room_id (int): Номер текущей комнаты в шаблоне мира.
+        steps_taken (int): Число совершённых перемещений.
+        game_over (bool): Игра закончена.
+        pending_prompt (str | None): Вопрос, на который ждут ответа.
+        outcome (str | None): Исход: "win", "death", "quit" или None.
+        commands_issued (int): Число обработанных строк ввода.
+        inventory_mask (int): Битовая маска предметов инвентаря.
+        inventory_counts (int): Упакованные количества складываемых
+            предметов, по COUNT_BITS бит на предмет (см. STACKABLE_SHIFTS).
+        inventory_order (str): Экземпляры предметов в порядке получения,
+            символ chr(номер предмета) на экземпляр.
+        spent_mask (int): Маска предметов, чьё одноразовое действие уже
+            использовано (bronze_box отдала ключ).
+        world (World): Мир сессии.
+        rng: Генератор случайных событий сессии (см. rng.make_rng()).
+        events (list): События последней команды.
+        renderer (callable | None): Отрисовщик событий.
+        history (History | None): История ходов для undo/redo
+            (см. history); None - ходы не запоминаются.
+        probe (Probe | None): Измеритель команд сессии (см. metrics);
+            None - команды не измеряются.
+    """
+
+    __slots__ = (
+        "room_id",
+        "steps_taken",
+        "game_over",
+        "pending_prompt",
+        "outcome",
+        "commands_issued",
+        "inventory_mask",
+        "inventory_counts",
+        "inventory_order",
+        "spent_mask",
+        "world",
+        "rng",
+        "events",
+        "renderer",
+        "history",
+        "probe",
+    )
+
+    def __init__(self, world, rng, renderer=None):
+        self.room_id = world.template.start_id
+        self.steps_taken = 0
+        self.game_over = False
+        self.pending_prompt = None
+        self.outcome = None
+        self.commands_issued = 0
+        self.inventory_mask = 0
+        self.inventory_counts = 0
+        self.inventory_order = ""
+        self.spent_mask = 0
+        self.world = world
+        self.rng = rng
+        self.events = []
+        self.renderer = renderer
+        self.history = None
+        self.probe = None
+
+    @property
+    def current_room(self):
+        """Имя текущей комнаты."""
+        return self.world.template.names[self.room_id]
+
+    @current_room.setter
+    def current_room(self, room_name):
+        self.room_id = self.world.template.ids[room_name]
+
+    def fork(self, renderer=None):
+        """Ответвить независимую копию партии, например для просмотра вперёд.
+
+        Мир копируется через World.fork(), генератор общий (он
+        не хранит состояния), история ходов не копируется.
+
+        Args:
+            renderer (callable | None): Отрисовщик событий копии.
+
+        Returns:
+            GameState: Копия партии.
+        """
+        clone = GameState(self.world.fork(), self.rng, renderer)
+        clone.room_id = self.room_id
+        clone.steps_taken = self.steps_taken
+        clone.game_over = self.game_over
+        clone.pending_prompt = self.pending_prompt
+        clone.outcome = self.outcome
+        clone.commands_issued = self.commands_issued
+        clone.inventory_mask = self.inventory_mask
+        clone.inventory_counts = self.inventory_counts
+        clone.inventory_order = self.inventory_order
+        clone.spent_mask = self.spent_mask
+        return clone
+
+    def has_item(self, item_name):
+        """Проверить, есть ли предмет в инвентаре."""
+        item_id = ITEM_IDS.get(item_name)
+        return item_id is not None and (self.inventory_mask >> item_id) & 1 == 1
+
+    def is_spent(self, item_name):
+        """Проверить, использовано ли одноразовое действие предмета."""
+        item_id = ITEM_IDS.get(item_name)
+        return item_id is not None and (self.spent_mask >> item_id) & 1 == 1
+
+    def spend_item(self, item_name):
+        """Отметить одноразовое действие предмета как использованное."""
+        self.spent_mask |= 1 << intern_item(item_name)
+
+    def item_count(self, item_name):
+        """Вернуть количество предмета в инвентаре."""
+        item_id = ITEM_IDS.get(item_name)
+        if item_id is None or not (self.inventory_mask >> item_id) & 1:
+            return 0
+        shift = STACKABLE_SHIFTS.get(item_id)
+        if shift is None:
+            return self.inventory_order.count(chr(item_id))
+        return (self.inventory_counts >> shift) & COUNT_MASK
+
+    def add_item(self, item_name, count=1):
+        """Положить предмет в инвентарь (в конец порядка получения)."""
+        item_id = intern_item(item_name)
+        bit = 1 << item_id
+        if bit & STACKABLE_MASK:
+            shift = STACKABLE_SHIFTS[item_id]
+            counts = self.inventory_counts
+            held = (counts >> shift) & COUNT_MASK
+            count = min(held + count, COUNT_MASK) - held
+            counts &= ~(COUNT_MASK << shift)
+            self.inventory_counts = counts | ((held + count) << shift)
+        self.inventory_order += chr(item_id) * count
+        self.inventory_mask |= bit
+
+    def remove_item(self, item_name, count=1):
+        """Убрать предмет из инвентаря.
+
+        Убираются первые по порядку получения экземпляры, как
+        list.remove() в прежнем списке.
+
+        Returns:
+            bool: True если предмет был в инвентаре, False иначе.
+        """
+        item_id = ITEM_IDS.get(item_name)
+        if item_id is None or not (self.inventory_mask >> item_id) & 1:
+            return False
+        self.inventory_order = self.inventory_order.replace(chr(item_id), "", count)
+        self._forget(item_id, count)
+        return True
+
+    def remove_at(self, index):
+        """Убрать экземпляр предмета по месту в порядке получения.
+
+        Returns:
+            str: Название убранного предмета.
+        """
+        order = self.inventory_order
+        item_id = ord(order[index])
+        index %= len(order)
+        self.inventory_order = order[:index] + order[index + 1:]
+        self._forget(item_id, 1)
+        return ITEM_NAMES[item_id]
+
+    def _forget(self, item_id, count):
+        """Обновить счётчик и маску после того, как убраны count экземпляров."""
+        shift = STACKABLE_SHIFTS.get(item_id)
+        if shift is not None:
+            left = ((self.inventory_counts >> shift) & COUNT_MASK) - count
+            self.inventory_counts &= ~(COUNT_MASK << shift)
+            if left > 0:
+                self.inventory_counts |= left << shift
+                return
+        elif chr(item_id) in self.inventory_order:
+            return
+        self.inventory_mask &= ~(1 << item_id)
+
+    def inventory_stacks(self):
+        """Перебрать пары (предмет, количество) в порядке первого получения."""
+        order = self.inventory_order
+        for char in dict.fromkeys(order):
+            yield ITEM_NAMES[ord(char)], order.count(char)
+
+    def inventory_names(self):
+        """Перебрать различные предметы инвентаря (без повторов)."""
+        for char in dict.fromkeys(self.inventory_order):
+            yield ITEM_NAMES[ord(char)]
+
+    def inventory_items(self):
+        """Перебрать экземпляры предметов в порядке получения."""
+        for char in self.inventory_order:
+            yield ITEM_NAMES[ord(char)]
+
+    def inventory_size(self):
+        """Вернуть число предметов в инвентаре с учётом количеств."""
+        return len(self.inventory_order)
+
+    def item_at(self, index):
+        """Вернуть предмет по месту в порядке получения."""
+        return ITEM_NAMES[ord(self.inventory_order[index])]
+
+    def __getitem__(self, key):
+        if key == "player_inventory":
+            return InventoryView(self)
+        if key == "current_room":
+            return self.current_room
+        if key in self.__slots__:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key == "current_room":
+            self.current_room = value
+        elif key in self.__slots__:
+            setattr(self, key, value)
+        else:
+            raise KeyError(key)
+
+    def get(self, key, default=None):
+        """Вернуть значение по ключу, как dict.get()."""
+        try:
+            return self[key]
+        except KeyError:
+            return default
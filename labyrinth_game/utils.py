@@ -3,24 +3,45 @@
 
 Содержит функции для описания комнат, решения загадок,
 генерации случайных событий и управления игровой логикой.
+Все сообщения игроку передаются через emit() в виде событий.
 """
 
-import math
-
+from labyrinth_game.answers import normalize_answer
 from labyrinth_game.constants import (
     EVENT_PROBABILITY,
-    EVENT_TYPES_COUNT,
-    ROOMS,
     TRAP_DAMAGE_RANGE,
     TRAP_DAMAGE_THRESHOLD,
 )
+from labyrinth_game.rng import STREAM_EVENTS, STREAM_TRAPS
+from labyrinth_game.schedule import sin_fraction
+
+
+def emit(game_state, kind, *args):
+    """Породить игровое событие.
+
+    Игровая логика ничего не печатает: каждое сообщение - это кортеж
+    (kind, *args) в списке game_state.events. Если у сессии есть
+    отрисовщик, он сразу превращает событие в текст.
+
+    Args:
+        game_state (GameState): Состояние игры.
+        kind (str): Вид события (ключ MESSAGES или особый вид).
+        *args: Данные события.
+    """
+    event = (kind, *args)
+    game_state.events.append(event)
+    renderer = game_state.renderer
+    if renderer is not None:
+        renderer(game_state, event)
 
 
 def pseudo_random(seed, modulo):
     """Генерировать псевдослучайное число на основе синуса.
 
     Использует детерминированный алгоритм на основе синуса для создания
-    предсказуемых, но выглядящих как случайные значения.
+    предсказуемых, но выглядящих как случайные значения. Игровая логика
+    берёт случайные числа из генератора сессии (game_state.rng),
+    который в режиме совместимости повторяет эту функцию.
 
     Args:
         seed (int): Начальное значение для генератора (обычно steps_taken).
@@ -29,11 +50,7 @@ def pseudo_random(seed, modulo):
     Returns:
         int: Целое число в диапазоне [0, modulo).
     """
-    sin_value = math.sin(seed * 12.9898)
-    stretched = sin_value * 43758.5453
-    fractional_part = stretched - math.floor(stretched)
-    result = fractional_part * modulo
-    return int(result)
+    return int(sin_fraction(seed) * modulo)
 
 
 def trigger_trap(game_state):
@@ -43,168 +60,151 @@ def trigger_trap(game_state):
     либо наносит потенциально смертельный урон.
 
     Args:
-        game_state (dict): Словарь состояния игры.
+        game_state (GameState): Состояние игры.
 
     Side Effects:
-        - Выводит сообщения в консоль
-        - Может удалить предмет из инвентаря
-        - Может установить game_over = True
+        - Порождает события с сообщениями
+        - Может удалить предмет из инвентаря (событие "item_lost")
+        - Может установить game_over = True и outcome = "death"
     """
-    print("Ловушка активирована! Пол стал дрожать...")
+    emit(game_state, "trap_activated")
 
-    inventory = game_state["player_inventory"]
+    rng = game_state.rng
+    steps = game_state.steps_taken
 
-    if inventory:
-        random_index = pseudo_random(game_state["steps_taken"], len(inventory))
-        lost_item = inventory.pop(random_index)
-        print(f"Вы потеряли: {lost_item}")
+    if game_state.inventory_mask:
+        random_index = rng.randbelow(STREAM_TRAPS, steps, game_state.inventory_size())
+        lost_item = game_state.remove_at(random_index)
+        emit(game_state, "item_lost", lost_item)
     else:
-        random_damage = pseudo_random(game_state["steps_taken"], TRAP_DAMAGE_RANGE)
+        random_damage = rng.randbelow(STREAM_TRAPS, steps, TRAP_DAMAGE_RANGE)
         if random_damage < TRAP_DAMAGE_THRESHOLD:
-            print("Ловушка нанесла смертельный урон! Вы погибли!")
-            game_state["game_over"] = True
+            game_state.game_over = True
+            game_state.outcome = "death"
+            emit(game_state, "death")
         else:
-            print("Вам удалось избежать опасности!")
+            emit(game_state, "trap_evaded")
 
 
 def random_event(game_state):
     """Генерировать случайное событие при перемещении.
 
-    Проверяет вероятность события и генерирует один из трёх типов:
-        0: Находка - игрок находит монету
-        1: Испуг - игрок слышит шорох
-        2: Ловушка - срабатывание ловушки
+    С вероятностью 1/EVENT_PROBABILITY выбирает по весам одно из событий,
+    возможных в текущей комнате (таблица событий мира, см. events),
+    и выполняет его действия, если выполнены условия по предметам.
+    Во встроенной таблице три события равного веса:
+        coin: Находка - игрок находит монету
+        rustle: Испуг - игрок слышит шорох
+        trap: Ловушка - срабатывание ловушки в trap_room без факела
 
     Args:
-        game_state (dict): Словарь состояния игры.
+        game_state (GameState): Состояние игры.
 
     Side Effects:
-        - Выводит сообщения в консоль
-        - Может вызвать trigger_trap()
+        - Порождает события с сообщениями
+        - Может изменить предметы комнаты и инвентарь, вызвать trigger_trap()
     """
-    event_chance = pseudo_random(game_state["steps_taken"], EVENT_PROBABILITY)
+    rng = game_state.rng
+    steps = game_state.steps_taken
+    event_chance = rng.randbelow(STREAM_EVENTS, steps, EVENT_PROBABILITY)
 
     if event_chance != 0:
         return
 
-    event_type = pseudo_random(game_state["steps_taken"] + 1, EVENT_TYPES_COUNT)
-
-    current_room_name = game_state["current_room"]
-    room = ROOMS[current_room_name]
-
-    if event_type == 0:
-        print("\nВы нашли монетку на полу!")
-        room["items"].append("coin")
-    elif event_type == 1:
-        print("\n🎵 Вы слышите странный шорох...")
-        if "sword" in game_state["player_inventory"]:
-            print("Вы отпугиваете существо своим мечом!")
-    elif event_type == 2:
-        if (
-            current_room_name == "trap_room"
-            and "torch" not in game_state["player_inventory"]
-        ):
-            print("\nОпасность! Вы активировали ловушку!")
-            trigger_trap(game_state)
+    room_events = game_state.world.template.event_table.room(game_state.current_room)
+    if not room_events.total:
+        return
+    action = room_events.pick(
+        rng.randbelow(STREAM_EVENTS, steps, room_events.total, lane=1)
+    )
+    if action is None:
+        return
+
+    need, avoid, effects = action
+    mask = game_state.inventory_mask
+    if mask & need != need or mask & avoid:
+        return
+    for need, avoid, apply, argument in effects:
+        mask = game_state.inventory_mask
+        if mask & need == need and not mask & avoid:
+            apply(game_state, argument)
 
 
 def describe_current_room(game_state):
-    """Вывести описание текущей комнаты.
+    """Описать текущую комнату.
 
-    Отображает полную информацию о текущей комнате:
-    название, описание, предметы, выходы и наличие загадки.
+    Порождает событие "room": название, описание, предметы, выходы
+    и наличие загадки формирует отрисовщик сессии.
 
     Args:
-        game_state (dict): Словарь состояния игры.
+        game_state (GameState): Состояние игры.
 
     Side Effects:
-        - Выводит информацию в консоль
+        - Порождает событие "room"
     """
-    current_room_name = game_state["current_room"]
-    room = ROOMS[current_room_name]
+    emit(game_state, "room", game_state.current_room)
 
-    print(f"\n== {current_room_name.upper()} ==")
-    print(room["description"])
 
-    if room["items"]:
-        items_list = ", ".join(room["items"])
-        print(f"\nЗаметные предметы: {items_list}")
+def solve_puzzle(game_state):
+    """Начать решение загадки в текущей комнате.
 
-    exits_list = ", ".join(room["exits"].keys())
-    print(f"Выходы: {exits_list}")
+    Если в комнате есть загадка, выводит вопрос и переводит сессию
+    в ожидание ответа: следующая введённая строка будет передана
+    в check_puzzle_answer(), а не разобрана как команда.
 
-    if room["puzzle"]:
-        print("Кажется, здесь есть загадка (используйте команду solve).")
+    Args:
+        game_state (GameState): Состояние игры.
 
+    Side Effects:
+        - Порождает событие "puzzle" с вопросом
+        - Устанавливает pending_prompt = "puzzle_answer"
+    """
+    puzzle = game_state.world.puzzle(game_state.current_room)
 
-def solve_puzzle(game_state):
-    """Попытаться решить загадку в текущей комнате.
+    if not puzzle:
+        emit(game_state, "no_puzzle")
+        return
+
+    question, _ = puzzle
+    emit(game_state, "puzzle", question)
+    game_state.pending_prompt = "puzzle_answer"
 
-    Если в комнате есть загадка, выводит вопрос и получает ответ.
-    Сравнивает ответ с правильным (включая альтернативные варианты).
+
+def check_puzzle_answer(game_state, answer):
+    """Проверить ответ на загадку текущей комнаты.
+
+    Ответ приводится к нормальной форме (см. answers.normalize_answer())
+    и ищется в заранее собранном множестве допустимых ответов загадки.
 
     При успехе: удаляет загадку и добавляет награду.
     При неудаче в trap_room: вызывает trigger_trap().
 
     Args:
-        game_state (dict): Словарь состояния игры.
+        game_state (GameState): Состояние игры.
+        answer (str): Ответ, введённый пользователем.
 
     Side Effects:
-        - Выводит вопрос и реакцию в консоль
-        - Запрашивает ввод у пользователя
+        - Порождает события с реакцией
         - Может вызвать trigger_trap()
     """
-    from labyrinth_game.player_actions import get_input
-
-    current_room_name = game_state["current_room"]
-    room = ROOMS[current_room_name]
+    current_room_name = game_state.current_room
+    world = game_state.world
+    puzzle = world.puzzle(current_room_name)
 
-    if not room["puzzle"]:
-        print("Загадок здесь нет.")
+    if not puzzle:
+        emit(game_state, "no_puzzle")
         return
 
-    question, correct_answer = room["puzzle"]
-    print(f"\n{question}")
-
-    user_answer = get_input("Ваш ответ: ").strip().lower()
-    correct_answer_lower = correct_answer.lower()
-
-    answer_variants = {
-        "10": ["10", "десять"],
-        "шаг шаг шаг": ["шаг шаг шаг"],
-        "резонанс": ["резонанс"],
-        "луна": ["луна"],
-        "молчание": ["молчание"],
-    }
-
-    is_correct = False
-    for variants_list in answer_variants.values():
-        if user_answer in [v.lower() for v in variants_list]:
-            if correct_answer_lower in [v.lower() for v in variants_list]:
-                is_correct = True
-                break
+    if normalize_answer(answer) in world.answers(current_room_name):
+        emit(game_state, "puzzle_solved", current_room_name)
+        world.clear_puzzle(current_room_name)
 
-    if is_correct:
-        print("Верно! Загадка решена!")
-        room["puzzle"] = None
-
-        if current_room_name == "trap_room":
-            game_state["player_inventory"].append("rusty_key")
-            print("Вы получили: rusty_key")
-        elif current_room_name == "hall":
-            game_state["player_inventory"].append("treasure_key")
-            print("Вы получили: treasure_key")
-        elif current_room_name == "library":
-            game_state["player_inventory"].append("ancient_scroll")
-            print("Вы получили: ancient_scroll")
-        elif current_room_name == "crystal_chamber":
-            game_state["player_inventory"].append("crystal_key")
-            print("Вы получили: crystal_key")
-        elif current_room_name == "underground_river":
-            game_state["player_inventory"].append("artifact_key")
-            print("Вы получили: artifact_key")
+        reward = world.reward(current_room_name)
+        if reward is not None:
+            game_state.add_item(reward)
+            emit(game_state, "item_received", reward)
     else:
-        print("✗ Неверно. Попробуйте снова.")
+        emit(game_state, "wrong_answer", current_room_name)
         if current_room_name == "trap_room":
             trigger_trap(game_state)
 
@@ -214,51 +214,83 @@ def attempt_open_treasure(game_state):
 
     Проверяет два способа открытия:
         1. С ключом treasure_key (если он есть)
-        2. С кодом (если игрок знает правильный)
+        2. С кодом: сессия переходит в ожидание ответа "да/нет",
+           дальше ввод обрабатывают confirm_treasure_code()
+           и enter_treasure_code()
+
+    Args:
+        game_state (GameState): Состояние игры.
 
     Returns:
         bool: True если сундук открыт (победа), False иначе.
 
     Side Effects:
-        - Выводит сообщения в консоль
-        - Может завершить игру (победа)
+        - Порождает события с сообщениями
+        - При победе устанавливает outcome = "win"
+        - Может установить pending_prompt = "treasure_confirm"
     """
-    from labyrinth_game.player_actions import get_input
-
-    if "treasure_key" in game_state["player_inventory"]:
-        print("Вы применяете ключ, и замок щёлкает. Сундук открыт!")
-        ROOMS["treasure_room"]["items"].remove("treasure_chest")
-        print("\nВ сундуке сокровище! Вы победили!")
+    if game_state.has_item("treasure_key"):
+        emit(game_state, "chest_opened_key")
+        game_state.world.remove_item("treasure_room", "treasure_chest")
+        game_state.outcome = "win"
+        emit(game_state, "win")
         return True
 
-    response = get_input("Сундук заперт. Ввести код? (да/нет): ").strip().lower()
+    game_state.pending_prompt = "treasure_confirm"
+    return False
 
-    if response == "да":
-        code = get_input("Введите код: ").strip()
-        room = ROOMS["treasure_room"]
-        if room["puzzle"] and code == room["puzzle"][1]:
-            print("✓ Правильный код! Сундук открыт!")
-            ROOMS["treasure_room"]["items"].remove("treasure_chest")
-            print("\nВ сундуке сокровище! Вы победили!")
-            return True
-        else:
-            print("✗ Неверный код.")
-            return False
+
+def confirm_treasure_code(game_state, response):
+    """Обработать ответ на вопрос "Ввести код? (да/нет)".
+
+    Args:
+        game_state (GameState): Состояние игры.
+        response (str): Ответ пользователя.
+
+    Side Effects:
+        - При ответе "да" устанавливает pending_prompt = "treasure_code"
+        - Иначе порождает событие "chest_retreat"
+    """
+    if response.strip().lower() == "да":
+        game_state.pending_prompt = "treasure_code"
     else:
-        print("Вы отступаете от сундука.")
-        return False
+        emit(game_state, "chest_retreat")
 
 
-def show_help():
-    """Показать доступные команды игры.
+def enter_treasure_code(game_state, code):
+    """Проверить введённый код от сундука.
 
-    Выводит список всех доступных команд с описанием каждой.
+    Args:
+        game_state (GameState): Состояние игры.
+        code (str): Код, введённый пользователем.
+
+    Returns:
+        bool: True если код верный и сундук открыт (победа), False иначе.
 
     Side Effects:
-        - Выводит справку в консоль
+        - Порождает события с сообщениями
+        - При победе устанавливает outcome = "win"
     """
-    from labyrinth_game.constants import COMMANDS
+    world = game_state.world
+    puzzle = world.puzzle("treasure_room")
+    if puzzle and code.strip() == puzzle[1]:
+        emit(game_state, "chest_opened_code")
+        world.remove_item("treasure_room", "treasure_chest")
+        game_state.outcome = "win"
+        emit(game_state, "win")
+        return True
+
+    emit(game_state, "wrong_code")
+    return False
+
 
-    print("\nДоступные команды:")
-    for command, description in COMMANDS.items():
-        print(f"  {command:<16} - {description}")
+def show_help(game_state):
+    """Показать доступные команды игры.
+
+    Args:
+        game_state (GameState): Состояние игры.
+
+    Side Effects:
+        - Порождает событие "help"
+    """
+    emit(game_state, "help")
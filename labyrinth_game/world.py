@@ -0,0 +1,371 @@
+# labyrinth_game/world.py
+"""Мир отдельной игровой сессии.
+
+Статические данные комнат (описания, выходы, тексты загадок) общие для
+всех сессий и никогда не изменяются. Изменения конкретной сессии
+(поднятые предметы, решённые загадки, найденные монеты) хранятся в
+небольшом оверлее, который создаётся при первой записи в комнату.
+
+Предметы комнаты хранятся мультимножеством (предмет -> количество):
+найденные монеты складываются в один счётчик, а не растят список.
+
+Записи оверлея могут разделяться ответвлениями партии (World.fork())
+и историей ходов (см. history): мир меняет на месте только записи,
+которыми владеет, а чужую перед записью копирует.
+"""
+
+from collections.abc import Mapping
+from types import MappingProxyType
+
+from labyrinth_game.answers import compile_answers
+from labyrinth_game.constants import DIRECTIONS, EVENTS, ROOMS, START_ROOM
+from labyrinth_game.events import DEFAULT_EVENTS, EventTable
+from labyrinth_game.graph import DIRECTIONS_COUNT, compile_graph
+from labyrinth_game.state import intern_item
+
+NO_ITEMS = MappingProxyType({})
+
+EXTRA_FIELDS = ("answers", "reward", "locked_by", "tags")
+
+NO_DIRECTION = 0xFF
+
+
+class WorldTemplate:
+    """Общие неизменяемые данные мира, разделяемые всеми сессиями.
+
+    Attributes:
+        rooms (Mapping): Данные комнат: имя -> описание, выходы, предметы;
+            словарь ROOMS или компактная RoomTable.
+        items (dict): Имя комнаты -> исходные предметы {предмет: количество};
+            комнат без предметов в словаре нет.
+        answers (dict): Имя комнаты -> нормальные формы ответов на загадку
+            (ключ "answers" комнаты, по умолчанию - ответ из "puzzle").
+        rewards (dict): Имя комнаты -> предмет за решение загадки
+            (ключ "reward" комнаты).
+        locks (dict): Имя комнаты -> предмет, без которого в неё
+            не войти (ключ "locked_by" комнаты).
+        graph (WorldGraph): Граф переходов по номерам комнат.
+        names (tuple[str]): Имена комнат по номерам (graph.names).
+        ids (dict): Имя комнаты -> номер (graph.ids).
+        start_id (int): Номер стартовой комнаты.
+        rendered (dict): Имя комнаты -> готовое описание нетронутой
+            комнаты; общее для всех сессий (см. render.render_room()).
+        event_table (EventTable): Случайные события мира (описание
+            events с метками комнат из ключа "tags").
+    """
+
+    __slots__ = (
+        "rooms", "items", "answers", "rewards", "locks", "graph", "names",
+        "ids", "start_id", "rendered", "event_table",
+    )
+
+    def __init__(self, rooms, start=START_ROOM, compact=False, events=EVENTS):
+        self.rooms = rooms
+        self.items = {
+            name: count_items(room["items"])
+            for name, room in rooms.items()
+            if room["items"]
+        }
+        self.answers = {
+            name: compile_answers(room.get("answers", (room["puzzle"][1],)))
+            for name, room in rooms.items()
+            if room["puzzle"]
+        }
+        self.rewards = {
+            name: room["reward"] for name, room in rooms.items() if "reward" in room
+        }
+        self.locks = {
+            name: room["locked_by"]
+            for name, room in rooms.items()
+            if "locked_by" in room
+        }
+        self.graph = compile_graph(rooms)
+        self.names = self.graph.names
+        self.ids = self.graph.ids
+        self.start_id = self.ids[start]
+        self.rendered = {}
+        room_tags = {
+            name: room["tags"] for name, room in rooms.items() if "tags" in room
+        }
+        if events is EVENTS and not room_tags:
+            self.event_table = DEFAULT_EVENTS
+        else:
+            self.event_table = EventTable(events, room_tags)
+        if compact:
+            self.rooms = RoomTable(rooms, self.graph, self.items)
+        intern_items(self)
+
+
+def intern_items(template):
+    """Присвоить номера предметам шаблона в порядке комнат.
+
+    Номер предмета - его бит в маске инвентаря и в ключах решателя.
+    Номера должны зависеть только от мира, а не от того, в каком порядке
+    игроки процесса впервые подбирали предметы: тогда маски одного
+    и того же состояния совпадают во всех процессах.
+
+    Предметы из таблицы событий получают номера последними, когда
+    таблица компилируется.
+
+    Args:
+        template (WorldTemplate): Шаблон мира.
+    """
+    for room_items in template.items.values():
+        for item_name in room_items:
+            intern_item(item_name)
+    for reward in template.rewards.values():
+        intern_item(reward)
+    template.event_table.compile()
+
+
+class RoomTable(Mapping):
+    """Компактное хранилище комнат большого мира.
+
+    Вместо словаря на каждую комнату хранит кортеж описаний, порядок
+    выходов (по байту на направление) и редкие поля (загадки, награды,
+    замки) только для комнат, где они есть; выходы берутся из графа,
+    предметы - из WorldTemplate.items. Словарь комнаты в виде ROOMS
+    собирается при обращении. Такая таблица сохраняется в кэш
+    и читается из него в разы быстрее словарей (см. loader).
+
+    Args:
+        rooms (dict): Комнаты в виде ROOMS.
+        graph (WorldGraph): Граф переходов этих комнат.
+        items (dict): Исходные предметы комнат (WorldTemplate.items).
+    """
+
+    __slots__ = ("graph", "items", "descriptions", "exit_order", "puzzles", "extras")
+
+    def __init__(self, rooms, graph, items):
+        self.graph = graph
+        self.items = items
+        self.descriptions = tuple(room["description"] for room in rooms.values())
+        order = bytearray([NO_DIRECTION]) * (len(rooms) * DIRECTIONS_COUNT)
+        for room_id, room in enumerate(rooms.values()):
+            base = room_id * DIRECTIONS_COUNT
+            for offset, direction in enumerate(room["exits"]):
+                order[base + offset] = DIRECTIONS.index(direction)
+        self.exit_order = bytes(order)
+        self.puzzles = {
+            name: room["puzzle"] for name, room in rooms.items() if room["puzzle"]
+        }
+        self.extras = {}
+        for name, room in rooms.items():
+            extra = {field: room[field] for field in EXTRA_FIELDS if field in room}
+            if extra:
+                self.extras[name] = extra
+
+    def __getitem__(self, room_name):
+        graph = self.graph
+        room_id = graph.ids[room_name]
+        base = room_id * DIRECTIONS_COUNT
+        exits = {}
+        for direction_id in self.exit_order[base:base + DIRECTIONS_COUNT]:
+            if direction_id == NO_DIRECTION:
+                break
+            exits[DIRECTIONS[direction_id]] = graph.names[
+                graph.neighbor(room_id, direction_id)
+            ]
+        room = {
+            "description": self.descriptions[room_id],
+            "exits": exits,
+            "items": [
+                item_name
+                for item_name, count in self.items.get(room_name, NO_ITEMS).items()
+                for _ in range(count)
+            ],
+            "puzzle": self.puzzles.get(room_name),
+        }
+        room.update(self.extras.get(room_name, NO_ITEMS))
+        return room
+
+    def __iter__(self):
+        return iter(self.graph.names)
+
+    def __len__(self):
+        return len(self.graph.names)
+
+    def __contains__(self, room_name):
+        return room_name in self.graph.ids
+
+
+def count_items(item_names):
+    """Собрать список предметов в мультимножество.
+
+    Args:
+        item_names (Iterable[str]): Предметы, возможно с повторами.
+
+    Returns:
+        dict: Предмет -> количество в порядке первого появления.
+    """
+    counts = {}
+    for item_name in item_names:
+        counts[item_name] = counts.get(item_name, 0) + 1
+    return counts
+
+
+DEFAULT_TEMPLATE = WorldTemplate(ROOMS)
+
+
+class World:
+    """Состояние лабиринта одной сессии поверх общих данных комнат.
+
+    Чтение идёт из оверлея, если комната уже менялась в этой сессии,
+    иначе из общих данных. Запись копирует комнату в оверлей
+    (copy-on-write), поэтому общие данные остаются нетронутыми.
+
+    Attributes:
+        template (WorldTemplate): Общие неизменяемые данные мира.
+        rooms (dict): Данные комнат шаблона.
+        base_items (dict): Исходные предметы комнат шаблона.
+        overlay (dict): Изменённые комнаты: имя -> {"items", "puzzle"}.
+        versions (dict): Имя комнаты -> число изменений в этой сессии;
+            нет в словаре - комната не менялась (версия 0).
+        rendered (dict): Имя изменённой комнаты -> (версия, описание).
+        owned (set): Комнаты, чьи записи оверлея принадлежат только
+            этому миру и меняются на месте; остальные копируются
+            при первой записи.
+        touched (dict | None): Комнаты, изменённые с начала хода:
+            имя -> прежняя запись оверлея (None - комнаты в нём не было).
+            None - изменения не отслеживаются.
+    """
+
+    __slots__ = (
+        "template", "rooms", "base_items", "overlay", "versions", "rendered",
+        "owned", "touched",
+    )
+
+    def __init__(self, template=DEFAULT_TEMPLATE):
+        self.template = template
+        self.rooms = template.rooms
+        self.base_items = template.items
+        self.overlay = {}
+        self.versions = {}
+        self.rendered = {}
+        self.owned = set()
+        self.touched = None
+
+    def description(self, room_name):
+        """Вернуть описание комнаты."""
+        return self.rooms[room_name]["description"]
+
+    def exits(self, room_name):
+        """Вернуть словарь выходов комнаты: направление -> комната."""
+        return self.rooms[room_name]["exits"]
+
+    def items(self, room_name):
+        """Вернуть предметы комнаты {предмет: количество} (только для чтения)."""
+        changed = self.overlay.get(room_name)
+        if changed is not None:
+            return changed["items"]
+        return self.base_items.get(room_name, NO_ITEMS)
+
+    def version(self, room_name):
+        """Вернуть версию комнаты: 0 у нетронутой, далее +1 за изменение."""
+        return self.versions.get(room_name, 0)
+
+    def reward(self, room_name):
+        """Вернуть предмет-награду за загадку комнаты или None."""
+        return self.template.rewards.get(room_name)
+
+    def lock(self, room_name):
+        """Вернуть предмет, нужный для входа в комнату, или None."""
+        return self.template.locks.get(room_name)
+
+    def answers(self, room_name):
+        """Вернуть нормальные формы допустимых ответов на загадку комнаты."""
+        return self.template.answers.get(room_name, frozenset())
+
+    def item_count(self, room_name, item_name):
+        """Вернуть количество предмета в комнате."""
+        return self.items(room_name).get(item_name, 0)
+
+    def puzzle(self, room_name):
+        """Вернуть загадку комнаты или None, если её нет или она решена."""
+        changed = self.overlay.get(room_name)
+        if changed is not None:
+            return changed["puzzle"]
+        return self.rooms[room_name]["puzzle"]
+
+    def add_item(self, room_name, item_name, count=1):
+        """Положить предмет (count экземпляров) в комнату."""
+        items = self._edit(room_name)["items"]
+        items[item_name] = items.get(item_name, 0) + count
+
+    def remove_item(self, room_name, item_name, count=1):
+        """Убрать из комнаты до count экземпляров предмета.
+
+        Returns:
+            int: Сколько экземпляров убрано (0, если предмета нет).
+        """
+        available = self.items(room_name).get(item_name, 0)
+        if not available:
+            return 0
+        items = self._edit(room_name)["items"]
+        if count >= available:
+            del items[item_name]
+            return available
+        items[item_name] = available - count
+        return count
+
+    def clear_puzzle(self, room_name):
+        """Отметить загадку комнаты как решённую."""
+        self._edit(room_name)["puzzle"] = None
+
+    def restore(self, room_name, changed):
+        """Вернуть комнате прежнюю запись оверлея.
+
+        Args:
+            room_name (str): Имя комнаты.
+            changed (dict | None): Запись оверлея; None - исходная комната.
+
+        Returns:
+            dict | None: Запись, которая была в оверлее до восстановления.
+        """
+        current = self.overlay.get(room_name)
+        if changed is None:
+            self.overlay.pop(room_name, None)
+        else:
+            self.overlay[room_name] = changed
+        self.owned.discard(room_name)
+        self.versions[room_name] = self.versions.get(room_name, 0) + 1
+        return current
+
+    def fork(self):
+        """Ответвить независимую копию мира.
+
+        Копируются только словари оверлея и версий; сами записи оверлея
+        становятся общими, и оба мира скопируют запись перед её изменением.
+
+        Returns:
+            World: Копия мира.
+        """
+        clone = World(self.template)
+        clone.overlay = dict(self.overlay)
+        clone.versions = dict(self.versions)
+        clone.rendered = dict(self.rendered)
+        self.owned.clear()
+        return clone
+
+    def _edit(self, room_name):
+        """Вернуть изменяемую копию комнаты, создав её при первой записи.
+
+        Каждый вызов предшествует изменению комнаты и повышает её версию,
+        поэтому закэшированное описание комнаты перестаёт совпадать.
+        """
+        self.versions[room_name] = self.versions.get(room_name, 0) + 1
+        changed = self.overlay.get(room_name)
+        if room_name in self.owned:
+            return changed
+        if self.touched is not None:
+            self.touched.setdefault(room_name, changed)
+        if changed is None:
+            changed = {
+                "items": dict(self.base_items.get(room_name, NO_ITEMS)),
+                "puzzle": self.rooms[room_name]["puzzle"],
+            }
+        else:
+            changed = {"items": dict(changed["items"]), "puzzle": changed["puzzle"]}
+        self.overlay[room_name] = changed
+        self.owned.add(room_name)
+        return changed